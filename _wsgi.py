@@ -28,8 +28,11 @@ logging.config.dictConfig({
   }
 })
 
+from flask import Response, jsonify
 from label_studio_ml.api import init_app
-from engine import AssistedBoundingBox
+from engine import AssistedBoundingBox, preload_tracking_engine
+from jobs import get_tracking_jobs
+from metrics import REGISTRY
 
 
 _DEFAULT_CONFIG_PATH = os.path.join(os.path.dirname(__file__), 'config.json')
@@ -44,6 +47,16 @@ def get_kwargs_from_config(config_path=_DEFAULT_CONFIG_PATH):
     return config
 
 
+def job_status(task_id):
+    """Returns the status and progress of the tracking job of a task (see ASYNC_PREDICTIONS)."""
+    return jsonify(get_tracking_jobs().status(task_id))
+
+
+def prometheus_metrics():
+    """Returns the metrics of the ML backend in the Prometheus text format (see metrics.REGISTRY)."""
+    return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='Label studio')
     parser.add_argument(
@@ -105,6 +118,8 @@ if __name__ == "__main__":
         print('Check "' + AssistedBoundingBox.__name__ + '" instance creation..')
         model = AssistedBoundingBox(**kwargs)
 
+    # the metrics dumped by the processes of a previous run are not counted again
+    REGISTRY.clear()
     app = init_app(
         model_class=AssistedBoundingBox,
         model_dir=os.environ.get('MODEL_DIR', args.model_dir),
@@ -113,11 +128,17 @@ if __name__ == "__main__":
         redis_port=os.environ.get('REDIS_PORT', 6379),
         **kwargs
     )
+    app.add_url_rule('/jobs/<task_id>', view_func=job_status)
+    # replaces the empty /metrics endpoint of label_studio_ml
+    app.view_functions['metrics'] = prometheus_metrics
 
     app.run(host=args.host, port=args.port, debug=args.debug)
 
 else:
     # for uWSGI use
+    # the app is loaded once by the uWSGI master, the metrics dumped by the workers of a previous run are not counted
+    # again
+    REGISTRY.clear()
     app = init_app(
         model_class=AssistedBoundingBox,
         model_dir=os.environ.get('MODEL_DIR', os.path.dirname(__file__)),
@@ -125,3 +146,10 @@ else:
         redis_host=os.environ.get('REDIS_HOST', 'localhost'),
         redis_port=os.environ.get('REDIS_PORT', 6379)
     )
+    app.add_url_rule('/jobs/<task_id>', view_func=job_status)
+    # replaces the empty /metrics endpoint of label_studio_ml
+    app.view_functions['metrics'] = prometheus_metrics
+
+    if os.environ.get('PRELOAD_MODELS', 'false').lower() == 'true':
+        # the app is loaded by the uWSGI master (no lazy-apps), so the workers forked from it share the models
+        preload_tracking_engine()
@@ -0,0 +1,38 @@
+"""
+Benchmarks the Compute backends (see parser.vectorized.COMPUTE_BACKENDS) on parser/examples/test_very_large_input.txt.
+
+Usage: python benchmarks/compute.py [--repeat 5]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+
+from parser.vectorized import COMPUTE_BACKENDS
+
+INPUT = ROOT / "parser" / "examples" / "test_very_large_input.txt"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=5, help="number of timed runs per backend")
+    args = parser.parse_args()
+
+    timings = {}
+    for name, compute_class in COMPUTE_BACKENDS.items():
+        best = float("inf")
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            compute_class(file_path=str(INPUT)).process()
+            best = min(best, time.perf_counter() - start)
+        timings[name] = best
+        print(f"{name:>8}: {best * 1E3:7.1f}ms")
+    print(f"speedup: {timings['python'] / timings['numpy']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
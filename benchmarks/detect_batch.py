@@ -0,0 +1,44 @@
+"""
+Benchmarks detecting the frames of a video one by one against in batches (track.run(detect_batch=B)).
+
+A torchvision MobileNetV3 backbone stands in for the YOLO model, on letterboxed 640x384 frames, with the thread
+limits of track.py. Every batch size processes the same --frames frames.
+
+Usage: python benchmarks/detect_batch.py [--frames 64] [--batch-sizes 1 2 4 8 16] [--device cuda]
+"""
+import os
+
+os.environ["OMP_NUM_THREADS"] = "1"
+
+import argparse
+import time
+
+import torch
+import torchvision
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--frames", type=int, default=64, help="number of frames detected per batch size")
+    parser.add_argument("--batch-sizes", nargs="+", type=int, default=[1, 2, 4, 8, 16])
+    parser.add_argument("--device", default="cpu", help="cpu or cuda")
+    args = parser.parse_args()
+
+    model = torchvision.models.mobilenet_v3_large().features.eval().to(args.device)
+    frames = torch.rand(args.frames, 3, 384, 640, device=args.device)
+    results = {}
+    with torch.no_grad():
+        model(frames[:1])  # warmup
+        for batch_size in args.batch_sizes:
+            start = time.perf_counter()
+            for i in range(0, args.frames, batch_size):
+                model(frames[i:i + batch_size])
+            if args.device.startswith("cuda"):
+                torch.cuda.synchronize()
+            results[batch_size] = args.frames / (time.perf_counter() - start)
+            print(f"batch {batch_size:>3}: {results[batch_size]:6.1f} frames/s "
+                  f"({results[batch_size] / results[args.batch_sizes[0]]:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
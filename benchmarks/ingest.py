@@ -0,0 +1,86 @@
+"""
+Benchmarks the time to the first decoded frame and the total time of downloading a video before decoding it versus
+decoding it while it is downloaded (see engine.open_video), from a local range server throttled to --bandwidth.
+
+Usage: python benchmarks/ingest.py [--video video.mp4] [--bandwidth 50]
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+
+from utils.streaming import RangedDownload, RangeServer
+
+
+class ThrottledFile:
+    """Range server source reading a local file at a bounded bandwidth."""
+
+    def __init__(self, path, bandwidth):
+        self.data = Path(path).read_bytes()
+        self.size = len(self.data)
+        self.bandwidth = bandwidth
+
+    def read(self, offset, length):
+        data = self.data[offset:offset + length]
+        time.sleep(len(data) / self.bandwidth)
+        return data
+
+
+def make_video(path, frames=600, size=(1280, 720)):
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"mp4v"), 30, size)
+    rng = np.random.default_rng(0)
+    for _ in range(frames):
+        writer.write(rng.integers(0, 256, (size[1], size[0], 3), dtype=np.uint8))
+    writer.release()
+
+
+def decode(source, start):
+    cap = cv2.VideoCapture(str(source), cv2.CAP_FFMPEG)
+    first, frames = None, 0
+    while cap.read()[0]:
+        frames += 1
+        if first is None:
+            first = time.perf_counter() - start
+    cap.release()
+    return first, time.perf_counter() - start, frames
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--video", type=str, default=None, help="MP4 video, a noisy 1280x720 video by default")
+    parser.add_argument("--bandwidth", type=float, default=50, help="origin bandwidth in MB/s")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        video = Path(args.video or Path(directory) / "source.mp4")
+        if args.video is None:
+            make_video(video)
+        origin = RangeServer(ThrottledFile(video, args.bandwidth * 1e6), "source.mp4")
+        print(f"{video.stat().st_size / 1e6:.1f}MB video at {args.bandwidth:g}MB/s")
+
+        start = time.perf_counter()
+        download = RangedDownload(origin.url, Path(directory) / "download.mp4").start()
+        download.wait()
+        download.close()
+        first, total, frames = decode(download.destination, start)
+        print(f"download: first frame {first * 1000:.0f}ms, {frames} frames in {total * 1000:.0f}ms")
+
+        start = time.perf_counter()
+        download = RangedDownload(origin.url, Path(directory) / "stream.mp4").start()
+        with RangeServer(download, "stream.mp4") as server:
+            first, total, frames = decode(server.url, start)
+        download.close()
+        print(f"stream: first frame {first * 1000:.0f}ms, {frames} frames in {total * 1000:.0f}ms")
+        origin.close()
+
+
+if __name__ == "__main__":
+    main()
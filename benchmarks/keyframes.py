@@ -0,0 +1,90 @@
+"""
+Benchmarks the keyframe mode of track.run (detect_every=K, the detections are propagated by template matching between
+the keyframes) on the bundled MOT17-mini: the tracking fps against the HOTA and IDF1 lost compared with K=1.
+
+The models are loaded once by a TrackingEngine so that the fps only covers the tracking. The tracks of every K are
+written in the MOT layout of val.py and scored by val.py --eval-existing, which downloads TrackEval on first use.
+
+Usage: python benchmarks/keyframes.py [--tracking-method ocsort] [--detect-every 1 2 3 5]
+"""
+import argparse
+import configparser
+import os
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+TRACKING_ROOT = ROOT / "yolov8_tracking"
+os.chdir(TRACKING_ROOT)  # val.py resolves the assets and its tools relative to the working directory
+if str(TRACKING_ROOT) not in sys.path:
+    sys.path.append(str(TRACKING_ROOT))
+
+from track import TrackingEngine
+from val import Evaluator, parse_opt
+
+SEQUENCES = Path("assets") / "MOT17-mini" / "train"
+PROJECT = Path("runs") / "val"
+
+
+class MOTSink:
+    """Writes the records of the engine, in percent of the image, as MOT rows in pixels."""
+
+    def __init__(self, path, width, height):
+        self.file = open(path, "w")
+        self.width, self.height = width, height
+
+    def write(self, frame_idx, id, bbox, cls):
+        left, top, w, h = bbox
+        self.file.write(f"{frame_idx},{int(id)},{left * self.width / 100:.2f},{top * self.height / 100:.2f},"
+                        f"{w * self.width / 100:.2f},{h * self.height / 100:.2f},1,-1,-1,-1\n")
+
+    def close(self):
+        self.file.close()
+
+
+def track_sequences(engine, name, **kwargs):
+    """Tracks every sequence into PROJECT/name/tracks with the run() arguments `kwargs`, returns the tracking fps."""
+    tracks = PROJECT / name / "tracks"
+    tracks.mkdir(parents=True, exist_ok=True)
+    frames, elapsed = 0, 0.0
+    for sequence in sorted(p for p in SEQUENCES.iterdir() if p.is_dir()):
+        info = configparser.ConfigParser()
+        info.read(sequence / "seqinfo.ini")
+        images = sequence / sequence.name  # val.py moves img1 there
+        if not images.is_dir():
+            images = sequence / "img1"
+        sink = MOTSink(tracks / f"{sequence.name}.txt", int(info["Sequence"]["imWidth"]), int(info["Sequence"]["imHeight"]))
+        start = time.perf_counter()
+        engine.track(images, sink, **kwargs)
+        elapsed += time.perf_counter() - start
+        sink.close()
+        frames += len(list(images.glob("*.jpg")))
+    return frames / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tracking-method", default="ocsort", help="deepocsort, botsort, strongsort, ocsort, bytetrack")
+    parser.add_argument("--yolo-weights", default="weights/yolov8n.pt")
+    parser.add_argument("--detect-every", nargs="+", type=int, default=[1, 2, 3, 5], help="values of K to compare")
+    args = parser.parse_args()
+
+    engine = TrackingEngine(yolo_weights=args.yolo_weights, tracking_method=args.tracking_method, classes=[0])
+    results = {}
+    for k in args.detect_every:
+        name = f"keyframes-{args.tracking_method}-{k}"
+        fps = track_sequences(engine, name, detect_every=k)
+        opt = parse_opt(["--benchmark", "MOT17-mini", "--tracking-method", args.tracking_method,
+                         "--project", str(PROJECT), "--eval-existing", name])
+        results[k] = fps, Evaluator(opt).run(opt)
+
+    base_fps, base = results[min(results)]
+    print(f"{'K':>3} {'fps':>7} {'gain':>6} {'HOTA':>6} {'loss':>6} {'IDF1':>6} {'loss':>6}")
+    for k, (fps, metrics) in results.items():
+        print(f"{k:>3} {fps:7.1f} {fps / base_fps:5.2f}x {metrics['HOTA']:6.2f} {base['HOTA'] - metrics['HOTA']:6.2f} "
+              f"{metrics['IDF1']:6.2f} {base['IDF1'] - metrics['IDF1']:6.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Benchmarks the MOT result write paths of track.py.
+
+Compares the previous write path (opening the results file for every row) against the buffered
+MOTWriter and the NpyWriter, on rows taken from parser/examples/test_very_large_input.txt.
+
+Usage: python benchmarks/mot_writer.py [--repeat 20]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+
+from yolov8_tracking.result_writers import MOTWriter, NpyWriter
+
+INPUT = ROOT / "parser" / "examples" / "test_very_large_input.txt"
+
+
+def load_rows(repeat):
+    with open(INPUT) as f:
+        rows = [line.strip().split(",") for line in f]
+    names = {int(row[11]): row[10] for row in rows}
+    last_frame = max(int(row[0]) for row in rows)
+    records = []
+    # repeat the video to emulate a longer one
+    for r in range(repeat):
+        for frame_id, id, x, y, w, h, *_, label_id in rows:
+            records.append((int(frame_id) + r * last_frame, int(id), (float(x), float(y), float(w), float(h)), int(label_id)))
+    return records, names
+
+
+def write_per_row(path, records, names):
+    # previous track.py write path, one open() per row
+    for frame_idx, id, bbox, c in records:
+        with open(str(path) + ".txt", "a") as f:
+            f.write(("%g," * 10 + "%s,%s" + "\n") % (frame_idx, id, *bbox, -1, -1, -1, 0, names[c], c))
+
+
+def write_with(writer_class):
+    def write(path, records, names):
+        with writer_class(path, names) as writer:
+            for record in records:
+                writer.write(*record)
+    return write
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=20, help="number of times the input rows are repeated")
+    args = parser.parse_args()
+
+    records, names = load_rows(args.repeat)
+    print(f"{len(records)} rows")
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, write in (
+            ("open per row", write_per_row),
+            ("MOTWriter", write_with(MOTWriter)),
+            ("NpyWriter", write_with(NpyWriter)),
+        ):
+            path = Path(tmp) / name.replace(" ", "_")
+            start = time.perf_counter()
+            write(path, records, names)
+            elapsed = time.perf_counter() - start
+            size = sum(os.path.getsize(p) for p in Path(tmp).glob(path.name + ".*"))
+            print(f"{name:>14}: {elapsed * 1E3:8.1f}ms, {size / 1E6:.1f}MB")
+
+
+if __name__ == "__main__":
+    main()
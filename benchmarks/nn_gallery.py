@@ -0,0 +1,82 @@
+"""
+Benchmarks the StrongSORT appearance gallery (trackers/strongsort/sort/nn_matching.NearestNeighborDistanceMetric),
+one ring buffer array for all the tracks, against the dict of lists of samples per track it replaced.
+
+Every frame adds the current feature of each track to the gallery, like Tracker.update, then computes the cosine
+distances of all the tracks to as many detections, like the first level of the matching cascade.
+
+Usage: python benchmarks/nn_gallery.py [--tracks 10 30 100] [--frames 200] [--budget 100]
+"""
+import os
+
+os.environ["OMP_NUM_THREADS"] = "1"
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import torch
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+
+from yolov8_tracking.trackers.strongsort.sort.nn_matching import NearestNeighborDistanceMetric
+
+
+class DictGallery:
+    """The previous gallery: a list of samples per track, a distance loop over the tracks."""
+
+    def __init__(self, budget):
+        self.budget = budget
+        self.samples = {}
+
+    def partial_fit(self, features, targets, active_targets):
+        for feature, target in zip(features, targets):
+            self.samples.setdefault(target, []).append(feature)
+            self.samples[target] = self.samples[target][-self.budget:]
+        self.samples = {k: self.samples[k] for k in active_targets}
+
+    def distance(self, features, targets):
+        cost_matrix = np.zeros((len(targets), len(features)))
+        for i, target in enumerate(targets):
+            x = torch.from_numpy(np.asarray(self.samples[target]))
+            y = torch.from_numpy(np.asarray(features))
+            x = np.asarray(x) / np.linalg.norm(x, axis=1, keepdims=True)
+            y = np.asarray(y) / np.linalg.norm(y, axis=1, keepdims=True)
+            cost_matrix[i, :] = (1. - np.dot(x, y.T)).min(axis=0)
+        return cost_matrix
+
+
+def run(gallery, tracks, frames, dim, seed=0):
+    rng = np.random.default_rng(seed)
+    targets = list(range(tracks))
+    features = rng.normal(size=(frames, tracks, dim)).astype(np.float32)
+    features /= np.linalg.norm(features, axis=2, keepdims=True)
+    start = time.perf_counter()
+    for frame in range(frames):
+        gallery.partial_fit(features[frame], targets, targets)
+        cost = gallery.distance(features[frame], targets)
+    return (time.perf_counter() - start) / frames * 1E3, cost
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tracks", nargs="+", type=int, default=[10, 30, 100])
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--budget", type=int, default=100, help="nn_budget of the strongsort config")
+    parser.add_argument("--dim", type=int, default=512, help="dimensionality of the ReID features")
+    args = parser.parse_args()
+
+    print(f"{'tracks':>6} {'dict ms':>8} {'array ms':>9} {'speedup':>8} {'max diff':>9}")
+    for tracks in args.tracks:
+        old_ms, old_cost = run(DictGallery(args.budget), tracks, args.frames, args.dim)
+        new_ms, new_cost = run(NearestNeighborDistanceMetric("cosine", 0.2, args.budget), tracks, args.frames,
+                               args.dim)
+        print(f"{tracks:>6} {old_ms:8.2f} {new_ms:9.2f} {old_ms / new_ms:7.2f}x {np.abs(old_cost - new_cost).max():9.1e}")
+
+
+if __name__ == "__main__":
+    main()
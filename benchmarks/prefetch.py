@@ -0,0 +1,75 @@
+"""
+Benchmarks decoding the frames of a video serially with the inference against in a background thread
+(track.run(prefetch=N), see yolov8_tracking.pipeline.Prefetcher).
+
+The frames of a 1280x720 video are decoded and letterboxed to 640x384, a torchvision MobileNetV3 backbone on one
+thread stands in for the YOLO model. The overlap needs a free core for the decode thread.
+
+Usage: python benchmarks/prefetch.py [--video video.mp4] [--prefetch 4]
+"""
+import os
+
+os.environ["OMP_NUM_THREADS"] = "1"
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+import torch
+import torchvision
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+
+from benchmarks.ingest import make_video
+from yolov8_tracking.pipeline import Prefetcher
+
+
+def frames(video):
+    cap = cv2.VideoCapture(str(video), cv2.CAP_FFMPEG)
+    while True:
+        ret, im0 = cap.read()
+        if not ret:
+            break
+        im = cv2.resize(im0, (640, 384)).transpose((2, 0, 1))[::-1]
+        yield np.ascontiguousarray(im)
+    cap.release()
+
+
+def track(model, frames):
+    count = 0
+    start = time.perf_counter()
+    with torch.no_grad():
+        for im in frames:
+            model(torch.from_numpy(im)[None].float() / 255)
+            count += 1
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--video", type=str, default=None, help="MP4 video, a noisy 1280x720 video by default")
+    parser.add_argument("--prefetch", type=int, default=4, help="frames decoded ahead")
+    args = parser.parse_args()
+
+    torch.set_num_threads(1)
+    model = torchvision.models.mobilenet_v3_large().features.eval()
+    with tempfile.TemporaryDirectory() as directory:
+        video = Path(args.video or Path(directory) / "source.mp4")
+        if args.video is None:
+            make_video(video, frames=150)
+        serial = track(model, frames(video))
+        print(f"serial: {serial:.1f} frames/s")
+        prefetcher = Prefetcher(frames(video), depth=args.prefetch)
+        prefetched = track(model, prefetcher)
+        print(f"prefetch {args.prefetch}: {prefetched:.1f} frames/s ({prefetched / serial:.2f}x), "
+              f"decode occupancy {prefetcher.stats.occupancy:.0%}, inference waited {prefetcher.stats.starved:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Benchmarks the memory of forked workers sharing a model preloaded by their parent (as the uWSGI master does with
+PRELOAD_MODELS=true, see engine.preload_tracking_engine) against workers loading their own copy.
+
+A torchvision ResNet-50 stands in for the YOLO and ReID models. Every worker runs --requests inferences on one thread
+and reports its unique (private) and proportional (shared pages divided among the sharing processes) memory.
+
+Usage: python benchmarks/preload.py [--workers 4] [--requests 5]
+"""
+import os
+
+os.environ["OMP_NUM_THREADS"] = "1"
+
+import argparse
+import gc
+import time
+
+import torch
+import torchvision
+
+
+def load_model():
+    model = torchvision.models.resnet50().eval()
+    with torch.no_grad():
+        model(torch.zeros(1, 3, 224, 224))
+    return model
+
+
+def memory():
+    """Returns the unique and proportional set sizes of this process in MB."""
+    fields = {}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if parts[0].endswith(":") and len(parts) == 3:
+                fields[parts[0][:-1]] = int(parts[1]) / 1024
+    return fields["Private_Clean"] + fields["Private_Dirty"], fields["Pss"]
+
+
+def worker(model, requests, pipe):
+    if model is None:
+        model = load_model()
+    image = torch.rand(1, 3, 224, 224)
+    start = time.perf_counter()
+    with torch.no_grad():
+        for _ in range(requests):
+            model(image)
+    elapsed = time.perf_counter() - start
+    os.write(pipe, ("%f %f %f\n" % (*memory(), requests / elapsed)).encode())
+    os._exit(0)
+
+
+def run(workers, requests, preload):
+    model = None
+    if preload:
+        model = load_model()
+        gc.freeze()
+    read, write = os.pipe()
+    pids = []
+    for _ in range(workers):
+        pid = os.fork()
+        if pid == 0:
+            worker(model, requests, write)
+        pids.append(pid)
+    for pid in pids:
+        os.waitpid(pid, 0)
+    os.close(write)
+    with os.fdopen(read) as f:
+        results = [tuple(map(float, line.split())) for line in f]
+    if preload:
+        gc.unfreeze()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=4, help="number of forked workers")
+    parser.add_argument("--requests", type=int, default=5, help="number of inferences per worker")
+    args = parser.parse_args()
+
+    torch.set_num_threads(1)
+    for preload in (False, True):
+        results = run(args.workers, args.requests, preload)
+        uss = sum(r[0] for r in results)
+        pss = sum(r[1] for r in results)
+        rate = sum(r[2] for r in results)
+        name = "preloaded" if preload else "per worker"
+        print(f"{name:>10}: {args.workers} workers, private {uss:6.0f}MB, pss {pss:6.0f}MB, {rate:5.1f} inferences/s")
+
+
+if __name__ == "__main__":
+    main()
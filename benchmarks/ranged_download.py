@@ -0,0 +1,67 @@
+"""
+Benchmarks the parallel ranged download of utils.streaming.RangedDownload against a local range server standing in
+for GCS, which caps the bandwidth of every connection at --bandwidth and adds --latency to every request.
+
+Usage: python benchmarks/ranged_download.py [--size 256] [--bandwidth 50] [--latency 20] [--workers 1 2 4 8 16]
+"""
+import argparse
+import base64
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import google_crc32c
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+
+from utils.streaming import RangedDownload, RangeServer
+
+
+class ThrottledBytes:
+    """Range server source capping the bandwidth of every request, which start at multiples of chunk_size."""
+
+    def __init__(self, data, bandwidth, latency, chunk_size):
+        self.data = data
+        self.size = len(data)
+        self.bandwidth = bandwidth
+        self.latency = latency
+        self.chunk_size = chunk_size
+
+    def read(self, offset, length):
+        if offset % self.chunk_size == 0:
+            time.sleep(self.latency)
+        data = self.data[offset:offset + length]
+        time.sleep(len(data) / self.bandwidth)
+        return data
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=256, help="object size in MB")
+    parser.add_argument("--bandwidth", type=float, default=50, help="bandwidth of a connection in MB/s")
+    parser.add_argument("--latency", type=float, default=20, help="latency of a request in ms")
+    parser.add_argument("--chunk-size", type=int, default=8, help="chunk size in MB")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    args = parser.parse_args()
+
+    data = os.urandom(args.size << 20)
+    crc32c = base64.b64encode(google_crc32c.Checksum(data).digest()).decode()
+    source = ThrottledBytes(data, args.bandwidth * 1e6, args.latency / 1000, args.chunk_size << 20)
+    with tempfile.TemporaryDirectory() as directory, RangeServer(source, "video.mp4") as server:
+        for workers in args.workers:
+            destination = Path(directory) / f"video-{workers}.mp4"
+            start = time.perf_counter()
+            download = RangedDownload(server.url, destination, args.chunk_size << 20, workers=workers, crc32c=crc32c)
+            download.start().wait()
+            download.close()
+            elapsed = time.perf_counter() - start
+            print(f"{workers:2d} workers: {elapsed * 1000:6.0f}ms, {args.size / elapsed:6.1f}MB/s (verified)")
+            destination.unlink()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Benchmarks ReID on demand (track.run reid_on_demand=True) on the bundled MOT17-mini: the fraction of the ReID forwards
+saved, the tracking fps and the HOTA and IDF1 lost compared with running the ReID model on every detection.
+
+The sequences are tracked with the ReID gate off then on, by the same TrackingEngine, and both runs are scored by
+val.py --eval-existing, which downloads TrackEval on first use. The ReID forwards of a run are the reid_crops of the
+frame spans of its trace.
+
+Usage: python benchmarks/reid_on_demand.py [--tracking-method strongsort botsort deepocsort]
+"""
+import argparse
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+
+from benchmarks.keyframes import PROJECT, track_sequences  # chdirs to yolov8_tracking and puts it on the path
+
+from track import TrackingEngine
+from utils.tracing import Tracer
+from val import Evaluator, parse_opt
+
+
+def reid_crops(tracer):
+    """Returns the number of detections the ReID model ran on, summed over the frame spans of a trace."""
+    return sum(event["args"].get("reid_crops", 0) for event in tracer.events if event["name"] == "frame")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tracking-method", nargs="+", default=["strongsort", "botsort", "deepocsort"])
+    parser.add_argument("--yolo-weights", default="weights/yolov8n.pt")
+    parser.add_argument("--reid-weights", default="weights/osnet_x0_25_msmt17.pt")
+    args = parser.parse_args()
+
+    print(f"{'tracker':>10} {'saved':>6} {'fps':>7} {'gain':>6} {'HOTA':>6} {'loss':>6} {'IDF1':>6} {'loss':>6}")
+    for method in args.tracking_method:
+        engine = TrackingEngine(yolo_weights=args.yolo_weights, reid_weights=args.reid_weights,
+                                tracking_method=method, classes=[0])
+        results, crops = {}, {}
+        for on_demand in (False, True):
+            name = f"reid-on-demand-{method}-{'on' if on_demand else 'off'}"
+            # the events of every frame are kept, MOT17-mini has fewer frames than the limit
+            tracer = Tracer(name, max_events=1_000_000)
+            fps = track_sequences(engine, name, reid_on_demand=on_demand, tracer=tracer)
+            crops[on_demand] = reid_crops(tracer)
+            opt = parse_opt(["--benchmark", "MOT17-mini", "--tracking-method", method,
+                             "--project", str(PROJECT), "--eval-existing", name])
+            results[on_demand] = fps, Evaluator(opt).run(opt)
+        saved = 1 - crops[True] / max(crops[False], 1)
+        (base_fps, base), (fps, metrics) = results[False], results[True]
+        print(f"{method:>10} {saved:6.1%} {fps:7.1f} {fps / base_fps:5.2f}x {metrics['HOTA']:6.2f} "
+              f"{base['HOTA'] - metrics['HOTA']:6.2f} {metrics['IDF1']:6.2f} {base['IDF1'] - metrics['IDF1']:6.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Benchmarks the Kalman filter work of a StrongSORT frame track by track (KalmanFilter.predict, update and
+gating_distance) against all the tracks at once (multi_predict, multi_update and multi_gating_distance).
+
+Every frame predicts all the tracks, gates them against as many detections and updates them with one detection each,
+like Tracker.predict, linear_assignment.gate_cost_matrix and Tracker.update.
+
+Usage: python benchmarks/strongsort_kalman.py [--tracks 10 30 100 300] [--frames 100]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+
+from yolov8_tracking.trackers.strongsort.sort.kalman_filter import KalmanFilter
+
+
+def per_track(kf, means, covariances, measurements, confidences):
+    means = [kf.predict(mean, covariance) for mean, covariance in zip(means, covariances)]
+    for mean, covariance in means:
+        kf.gating_distance(mean, covariance, measurements)
+    states = [kf.update(mean, covariance, measurement, confidence)
+              for (mean, covariance), measurement, confidence in zip(means, measurements, confidences)]
+    return np.asarray([mean for mean, _ in states]), np.asarray([covariance for _, covariance in states])
+
+
+def batched(kf, means, covariances, measurements, confidences):
+    means, covariances = kf.multi_predict(means, covariances)
+    kf.multi_gating_distance(means, covariances, measurements)
+    return kf.multi_update(means, covariances, measurements, confidences)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tracks", nargs="+", type=int, default=[10, 30, 100, 300])
+    parser.add_argument("--frames", type=int, default=100)
+    args = parser.parse_args()
+
+    kf = KalmanFilter()
+    rng = np.random.default_rng(0)
+    print(f"{'tracks':>6} {'per track ms':>13} {'batched ms':>11} {'speedup':>8} {'max diff':>9}")
+    for tracks in args.tracks:
+        states = [kf.initiate(np.r_[rng.uniform(100, 1800, 2), rng.uniform(0.3, 0.6), rng.uniform(50, 200)])
+                  for _ in range(tracks)]
+        means0, covariances0 = np.asarray([m for m, _ in states]), np.asarray([c for _, c in states])
+        results = {}
+        for name, step in (("per track", per_track), ("batched", batched)):
+            means, covariances = means0, covariances0
+            start = time.perf_counter()
+            for frame in range(args.frames):
+                measurements = means[:, :4] + np.r_[1.0, 1.0, 0.0, 0.5] * np.sin(frame)
+                means, covariances = step(kf, means, covariances, measurements, np.full(tracks, 0.8))
+            results[name] = (time.perf_counter() - start) / args.frames * 1E3, means
+        (per_ms, per_means), (batch_ms, batch_means) = results["per track"], results["batched"]
+        print(f"{tracks:>6} {per_ms:13.2f} {batch_ms:11.2f} {per_ms / batch_ms:7.1f}x "
+              f"{np.abs(per_means - batch_means).max():9.1e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,412 @@
+import gc
+import math
+import multiprocessing
+import os
 import shutil
+import threading
+import time
 import uuid
-from parser.compute import Compute
+from bisect import bisect_left
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
+from parser.stream import StreamingCompute
 from pathlib import Path
-from subprocess import run
 
+import torch
 from label_studio_ml.model import LabelStudioMLBase
 
-from utils.gcs import download_public_file, get_metadata_from_url
+from jobs import JobProgress, get_tracking_jobs
+from metrics import REGISTRY
+from utils.cache import cache_key, file_digest, get_blob_cache, get_prediction_cache
+from utils.gcs import (
+    download_public_file,
+    get_metadata_from_url,
+    get_object_identity,
+    get_public_url,
+    get_ranged_download,
+)
+from utils.streaming import RangeServer
+from utils.tracing import current_tracer, span, trace
+from yolov8_tracking.track import TrackingEngine
+
+# keys of the task data restricting the predictions to a window of the video, in 1-based frames or in seconds
+WINDOW_KEYS = ("start_frame", "end_frame", "start_time", "end_time")
+
+# buckets of the per frame timings, in seconds
+FRAME_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1)
+
+# ranges of active tracks labelling the tracker update timings, by upper bound
+TRACKS_RANGES = (0, 5, 10, 20, 50)
+TRACKS_LABELS = ("0", "1-5", "6-10", "11-20", "21-50", "51+")
+
+PREDICTIONS = REGISTRY.counter("predictions_total", "Predictions of a video by status", ["status"])
+PREDICTION_SECONDS = REGISTRY.histogram(
+    "prediction_seconds", "End-to-end latency of the predictions of a video", ["cache"]
+)
+PREDICTION_CACHE_REQUESTS = REGISTRY.counter(
+    "prediction_cache_requests_total", "Lookups of the prediction cache by result", ["result"]
+)
+DOWNLOAD_BYTES = REGISTRY.counter("video_download_bytes_total", "Bytes of the videos downloaded from GCS")
+DOWNLOAD_SECONDS = REGISTRY.counter("video_download_seconds_total", "Time spent downloading videos from GCS")
+STAGE_SECONDS = REGISTRY.histogram(
+    "tracking_stage_seconds",
+    "Time per frame of the tracking stages (decode, preprocess, inference, nms, propagate, tracker)",
+    ["stage"],
+    FRAME_BUCKETS,
+)
+TRACKER_UPDATE_SECONDS = REGISTRY.histogram(
+    "tracker_update_seconds", "Time of a tracker update by number of active tracks", ["tracks"], FRAME_BUCKETS
+)
+STAGE_OCCUPANCY = REGISTRY.histogram(
+    "tracking_stage_occupancy",
+    "Busy fraction of the decode, track and write stages of a video tracked with PREFETCH_FRAMES",
+    ["stage"],
+    (0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1),
+)
+COMPUTE_SECONDS = REGISTRY.histogram("compute_seconds", "Time to build the Label Studio predictions from the tracks")
+
+# tracking engine of this worker, the models are loaded on first use and kept resident
+_tracking_engine = None
+
+# semaphore bounding the number of videos tracked at the same time, shared by the forked workers when preloaded
+_tracking_slots = None
+
+# guards the creation of the engine and the slots, the prediction threads of a worker may ask for them at the same time
+_tracking_init_lock = threading.Lock()
+
+
+def get_tracking_engine():
+    """Returns the tracking engine of this worker, loading the YOLO and ReID weights on the first call."""
+    global _tracking_engine
+    # ADAPTIVE_STRIDE skips the detector on low-motion frames, their boxes are interpolated
+    # DETECT_EVERY runs the detector every K frames, the detections are propagated by template matching in between
+    # DETECT_BATCH detects that many frames of a video in one forward pass, worth it on accelerators
+    # PREFETCH_FRAMES decodes that many frames ahead in a background thread and writes the results in another one
+    # REID_ON_DEMAND runs the ReID model only on the detections IoU does not associate unambiguously
+    if _tracking_engine is None:
+        with _tracking_init_lock:
+            if _tracking_engine is None:
+                _tracking_engine = TrackingEngine(
+                    adaptive_stride=os.environ.get("ADAPTIVE_STRIDE", "false").lower() == "true",
+                    detect_every=int(os.environ.get("DETECT_EVERY", 1)),
+                    detect_batch=int(os.environ.get("DETECT_BATCH", 1)),
+                    prefetch=int(os.environ.get("PREFETCH_FRAMES", 0)),
+                    reid_on_demand=os.environ.get("REID_ON_DEMAND", "false").lower() == "true",
+                )
+    return _tracking_engine
+
+
+def _tracking_concurrency():
+    # track.py limits every tracking to one thread, so one video per CPU core keeps all the cores busy
+    return int(os.environ.get("TRACKING_CONCURRENCY", os.cpu_count() or 1))
+
+
+def get_tracking_slots():
+    """Returns the semaphore bounding the number of videos tracked at the same time to TRACKING_CONCURRENCY.
+
+    The semaphore is created by preload_tracking_engine() in the server process before it forks, so that the slots
+    are shared by all the workers, otherwise it only bounds the threads of this worker. A slot is taken by
+    TrackingEngine.track once it holds the engine, so the threads waiting for the engine of a worker do not take the
+    slots of the other workers.
+    """
+    global _tracking_slots
+    if _tracking_slots is None:
+        with _tracking_init_lock:
+            if _tracking_slots is None:
+                _tracking_slots = threading.BoundedSemaphore(_tracking_concurrency())
+    return _tracking_slots
+
+
+def preload_tracking_engine():
+    """Loads the tracking engine before the server forks its workers, which then share the weights copy-on-write.
+
+    The weights are only preloaded on CPU, a CUDA context cannot be used across a fork, so every worker loads its
+    own engine on GPU hosts.
+    """
+    global _tracking_slots
+    _tracking_slots = multiprocessing.BoundedSemaphore(_tracking_concurrency())
+    if torch.cuda.is_available():
+        print("CUDA is available, the tracking engine is loaded by every worker instead of being preloaded")
+        return None
+    tracking_engine = get_tracking_engine()
+    # move the objects loaded so far out of the reach of the garbage collector, so that the collections in the
+    # workers do not write to (and copy) the memory pages holding them
+    gc.freeze()
+    return tracking_engine
+
+
+def get_window(task):
+    """Returns the window of the video to predict given by the task data, None for the whole video.
+
+    Frames are positive integers and times are non-negative seconds, given as numbers or strings. Raises ValueError
+    if a value is invalid or the window ends before it starts.
+    """
+    window = {}
+    for key in WINDOW_KEYS:
+        value = task["data"].get(key)
+        if value is None or value == "":
+            continue
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"Task {task.get('id')}: {key} must be a number, got {value!r}") from None
+        if key.endswith("_frame"):
+            if not value.is_integer() or value < 1:
+                raise ValueError(f"Task {task.get('id')}: {key} must be a positive integer, got {value:g}")
+            value = int(value)
+        elif not math.isfinite(value) or value < 0:
+            raise ValueError(f"Task {task.get('id')}: {key} must be a non-negative number of seconds, got {value:g}")
+        window[key] = value
+    for unit in ("frame", "time"):
+        start, end = window.get(f"start_{unit}"), window.get(f"end_{unit}")
+        if start is not None and end is not None and end < start:
+            raise ValueError(f"Task {task.get('id')}: end_{unit} {end:g} is before start_{unit} {start:g}")
+    return window or None
+
+
+def prediction_key(tracking_engine, video_identity, keyframe_tolerance=None, window=None):
+    """Returns the cache key of the predictions of a video version with the configuration of the tracking engine.
+
+    :param tracking_engine: the tracking engine running the predictions
+    :param video_identity: the identity of the GCS object, including its generation and etag
+    :param keyframe_tolerance: the tolerance of the keyframe compression of the sequences
+    :param window: the window of the video, see get_window
+    """
+    return cache_key(
+        video=video_identity,
+        yolo_weights=file_digest(tracking_engine.yolo_weights),
+        reid_weights=file_digest(tracking_engine.reid_weights) if tracking_engine.reid_model is not None else None,
+        tracking_method=tracking_engine.tracking_method,
+        tracking_config=file_digest(tracking_engine.tracking_config),
+        imgsz=tracking_engine.imgsz,
+        params=tracking_engine.kwargs,
+        keyframe_tolerance=keyframe_tolerance,
+        window=window,
+    )
+
+
+def observe_timing(stage, seconds, tracks=None):
+    """Records the time of a tracking stage for one frame, see the timings argument of track.run."""
+    STAGE_SECONDS.observe(seconds, stage=stage)
+    if tracks is not None:
+        TRACKER_UPDATE_SECONDS.observe(seconds, tracks=TRACKS_LABELS[bisect_left(TRACKS_RANGES, tracks)])
+
+
+def observe_occupancy(stage, fraction):
+    """Records the busy fraction of a pipeline stage for one video, see the occupancy argument of track.run."""
+    STAGE_OCCUPANCY.observe(fraction, stage=stage)
+
+
+def download_video(bucket_name, video_path, video_destination):
+    """Downloads a GCS video and records the download throughput."""
+    start = time.perf_counter()
+    download_public_file(bucket_name, video_path, video_destination)
+    DOWNLOAD_SECONDS.inc(time.perf_counter() - start)
+    DOWNLOAD_BYTES.inc(os.path.getsize(video_destination))
+
+
+@contextmanager
+def open_video(bucket_name, video_path, video_destination, video_ingest="download", generation=None, window=None):
+    """Makes a GCS video available to the tracking engine.
+
+    Videos are read from the blob cache when one is configured (see utils.cache.get_blob_cache) and the generation
+    of the blob is known, a missing video is then written to the cache instead of the destination. The window of a
+    video is read from the cache if the video is cached, otherwise only the ranges the decoder reads are fetched and
+    the cache is not filled.
+
+    :param video_ingest: "download" downloads the video before tracking it, "stream" downloads it in ranged chunks
+      to the destination while the decoder reads the downloaded chunks from a local range server, and "direct"
+      decodes it from its public URL without writing it to disk
+    :param generation: the generation of the blob
+    :param window: the window of the video to track, see get_window
+
+    :returns: the source to track and whether it must be decoded as a stream
+    """
+    blob_cache = get_blob_cache()
+    if window and video_ingest != "direct":
+        if blob_cache is not None and generation is not None:
+            with blob_cache.lookup(bucket_name, video_path, generation) as path:
+                if path is not None:
+                    yield path, False
+                    return
+        with _read_video(bucket_name, video_path, video_destination, video_ingest, partial=True) as video:
+            yield video
+        return
+
+    if blob_cache is None or generation is None or video_ingest == "direct":
+        with _read_video(bucket_name, video_path, video_destination, video_ingest) as video:
+            yield video
+        return
+
+    with blob_cache.entry(bucket_name, video_path, generation) as entry:
+        if not entry.exists and video_ingest == "download":
+            download_video(bucket_name, video_path, entry.tmp_path)
+            entry.commit()
+        if entry.exists:
+            yield entry.path, False
+            return
+        # the video is written to the cache while it is streamed to the decoder, the entry is committed as soon as the
+        # download is complete, so the other requests for the video do not wait for the end of this tracking
+        with _read_video(bucket_name, video_path, entry.tmp_path, video_ingest, on_complete=entry.commit) as video:
+            yield video
+
+
+class _DownloadCompletion(threading.Thread):
+    """Waits for a ranged download in the background and calls `on_complete` once it is complete and verified."""
+
+    def __init__(self, download, on_complete):
+        super().__init__(name="download-completion", daemon=True)
+        self.download = download
+        self.on_complete = on_complete
+        self.error = None
+
+    def run(self):
+        try:
+            self.download.wait()
+            self.on_complete()
+        except BaseException as e:
+            self.error = e
+
+    def result(self):
+        """Waits for the completion and raises its error if any."""
+        self.join()
+        if self.error is not None:
+            raise self.error
+
+
+@contextmanager
+def _read_video(bucket_name, video_path, video_destination, video_ingest, on_complete=None, partial=False):
+    """Reads a GCS video as given by video_ingest (see open_video), in "stream" mode `on_complete` is called in the
+    background once the whole video is downloaded to the destination and verified. A `partial` read, of a window of
+    the video, only fetches the chunks read by the decoder whether the video ingest is "download" or "stream"."""
+    if partial and video_ingest in ("download", "stream"):
+        with ExitStack() as stack:
+            download = get_ranged_download(bucket_name, video_path, video_destination, on_demand=True)
+            stack.callback(download.close)
+            download.start()
+            server = stack.enter_context(RangeServer(download, f"video{Path(video_path).suffix}"))
+            yield server.url, True
+            # the partial video is never complete, it is neither waited for nor verified
+            DOWNLOAD_BYTES.inc(download.fetched_bytes)
+    elif video_ingest == "download":
+        download_video(bucket_name, video_path, video_destination)
+        yield video_destination, False
+    elif video_ingest == "stream":
+        with ExitStack() as stack:
+            start = time.perf_counter()
+            download = get_ranged_download(bucket_name, video_path, video_destination)
+            completion = _DownloadCompletion(download, on_complete) if on_complete is not None else None
+            if completion is not None:
+                # joined once the download is closed, which ends the wait of an incomplete download
+                stack.callback(completion.join)
+            stack.callback(download.close)
+            download.start()
+            if completion is not None:
+                completion.start()
+            # the decoder selects the container format by the extension of the URL
+            server = stack.enter_context(RangeServer(download, f"video{Path(video_path).suffix}"))
+            yield server.url, True
+            if completion is not None:
+                # the completion owns the wait, the destination may already have been moved by on_complete
+                completion.result()
+            else:
+                download.wait()
+            # the download overlaps with the tracking, its time runs until the last chunk has arrived
+            DOWNLOAD_SECONDS.inc(time.perf_counter() - start)
+            DOWNLOAD_BYTES.inc(download.size)
+    elif video_ingest == "direct":
+        yield get_public_url(bucket_name, video_path), True
+    else:
+        raise ValueError(f"Unknown video ingest: {video_ingest}")
+
+
+@trace("run_tracker")
+def run_tracker(vid_path, keyframe_tolerance=None, progress=None, video_ingest="download", window=None,
+                raise_errors=False):
+    """Runs the Yolov8 object tracking algorithm on the given video and returns the list of predictions.
+
+    :param vid_path: path of the input video from GCS. An example is given as below:
+      gs://ucf-crime-dataset/Abuse/Abuse001_x264.mp4
+    :param keyframe_tolerance: optional tolerance of the keyframe compression of the sequences
+    :param progress: optional callback receiving the number of processed frames and the total number of frames
+    :param video_ingest: how the video is read from GCS, see open_video
+    :param window: optional window of the video to track, with start_frame/end_frame (1-based, inclusive) or
+      start_time/end_time (in seconds) keys. The frames of the predictions are numbered from the start of the video.
+
+    :param raise_errors: whether a failure raises, instead of being printed and returning no predictions
+
+    A sample of the calls is traced, see utils.tracing.trace.
+
+    :returns: A list of prediction as required by label studio
+    """
+    results = []
+    start, status, cache_result = time.perf_counter(), "error", "disabled"
+    # generate a random directory to store the video and model output
+    DIR_PREFIX = str(uuid.uuid4())
+
+    try:
+        # make directory is does not exist
+        Path(DIR_PREFIX).mkdir(parents=True, exist_ok=True)
+        # get metadata from url passed in
+        bucket_name, video_path, video_name = get_metadata_from_url(vid_path)
+        video_destination = Path(f"{DIR_PREFIX}/{video_name}.mp4")
+        tracking_engine = get_tracking_engine()
+
+        # predictions of the same video version and tracking configuration are served from the cache
+        cache, key, cached, identity = get_prediction_cache(), None, None, None
+        if cache is not None or get_blob_cache() is not None:
+            identity = get_object_identity(bucket_name, video_path)
+        if cache is not None:
+            key = prediction_key(tracking_engine, identity, keyframe_tolerance, window)
+            with span("prediction_cache.get"):
+                cached = cache.get(key)
+            cache_result = "miss" if cached is None else "hit"
+            PREDICTION_CACHE_REQUESTS.inc(result=cache_result)
+
+        if cached is not None:
+            results = cached
+        else:
+            # read video from GCS and run yolov8 model in-process, the label studio output is built as the tracks
+            # are emitted
+            sink = StreamingCompute(tracking_engine.names, keyframe_tolerance)
+            generation = identity["generation"] if identity is not None else None
+            video = open_video(bucket_name, video_path, video_destination, video_ingest, generation, window)
+            with video as (source, stream_video), span("track", source=str(source)):
+                tracking_engine.track(
+                    source,
+                    sink,
+                    slots=get_tracking_slots(),
+                    progress=progress,
+                    timings=observe_timing,
+                    occupancy=observe_occupancy,
+                    tracer=current_tracer(),
+                    stream_video=stream_video,
+                    **(window or {}),
+                )
+            compute_start = time.perf_counter()
+            results = sink.process()
+            COMPUTE_SECONDS.observe(time.perf_counter() - compute_start)
+            if key is not None:
+                cache.set(key, results)
+        status = "ok"
+    except Exception as e:
+        print("Error in running tracker with error: " + str(e))
+        if raise_errors:
+            raise
+    finally:
+        # remove temp directory after successful / error run
+        # this is used to ensure storage does not get filled up
+        shutil.rmtree(DIR_PREFIX, ignore_errors=True)
+        PREDICTIONS.inc(status=status)
+        PREDICTION_SECONDS.observe(time.perf_counter() - start, cache=cache_result)
+        REGISTRY.flush()
+    return results
+
+
+def run_tracking_job(vid_path, keyframe_tolerance=None, progress=None, video_ingest="download", window=None):
+    """Runs run_tracker as an RQ job: a failure raises, so that RQ marks the job failed and the next prediction
+    request of the task submits it again, instead of serving no predictions as the finished result of the job."""
+    return run_tracker(vid_path, keyframe_tolerance, progress, video_ingest, window, raise_errors=True)
 
 
 class AssistedBoundingBox(LabelStudioMLBase):
@@ -17,6 +417,23 @@ class AssistedBoundingBox(LabelStudioMLBase):
     :param from_name: A string representing source data block.
     :param to_name: A string representing target data block.
     :param labels : The list of labels to use for labeling the data.
+    :param keyframe_tolerance: Optional tolerance (in percent of the video size) below which frames that Label Studio
+      can interpolate between keyframes are dropped from the predicted sequences.
+
+    Predictions run as RQ jobs when the ASYNC_PREDICTIONS environment variable is set to true. A prediction request
+    then enqueues the tracking of the task, waits up to PREDICTION_TIMEOUT seconds (0 by default) for it and returns
+    an empty prediction if the job has not finished yet. The next request for the task returns the stored result.
+
+    VIDEO_INGEST selects how the videos are read from GCS (see open_video): "download" (the default) downloads them
+    before tracking, "stream" starts tracking while they are downloaded and "direct" decodes them from their public
+    URL without a temporary file.
+
+    The task data may restrict the predictions to a window of the video with start_frame/end_frame (1-based,
+    inclusive) or start_time/end_time (in seconds), only the window is decoded and tracked.
+
+    Every task of a batch is predicted. Synchronous predictions run on a pool of PREDICTION_WORKERS threads (2 by
+    default), so the next videos are downloaded while the current one is tracked. Asynchronous predictions enqueue
+    one job per task, which are spread over the RQ workers.
 
     Sample format of the prediction is as follows:
     {
@@ -61,6 +478,14 @@ class AssistedBoundingBox(LabelStudioMLBase):
         self.from_name = from_name
         self.to_name = schema["to_name"][0]
         self.labels = schema["labels"]
+        # KEYFRAME_TOLERANCE compresses the sequences to their keyframes (in percent of the video size), unset or empty
+        # keeps every frame
+        keyframe_tolerance = os.environ.get("KEYFRAME_TOLERANCE") or kwargs.get("keyframe_tolerance")
+        self.keyframe_tolerance = float(keyframe_tolerance) if keyframe_tolerance not in (None, "") else None
+        self.async_predictions = os.environ.get("ASYNC_PREDICTIONS", "false").lower() == "true"
+        self.prediction_timeout = float(os.environ.get("PREDICTION_TIMEOUT", 0))
+        self.prediction_workers = int(os.environ.get("PREDICTION_WORKERS", 2))
+        self.video_ingest = os.environ.get("VIDEO_INGEST", "download").lower()
 
     def predict(self, tasks, **kwargs):
         """Returns the list of predictions based on the input list of tasks.
@@ -68,45 +493,69 @@ class AssistedBoundingBox(LabelStudioMLBase):
         :param tasks: list of input tasks. An example is given as below:
           [{'id': 1908, 'data': {'video_url': 'gs://ucf-crime-dataset/Abuse/Abuse001_x264.mp4'}, 'meta': {}, 'created_at': '2023-04-29T14:47:06.171943Z', 'updated_at': '2023-04-29T14:47:06.171976Z', 'is_labeled': False, 'overlap': 1, 'inner_id': 1, 'total_annotations': 0, 'cancelled_annotations': 0, 'total_predictions': 0, 'comment_count': 0, 'unresolved_comment_count': 0, 'last_comment_updated_at': None, 'project': 3, 'updated_by': None, 'file_upload': None, 'comment_authors': [], 'annotations': [], 'predictions': []}]
 
-        :return: A list of prediction as required by label studio
+        :return: A list of prediction as required by label studio, one per task in the order of the tasks
         """
-        video_url = tasks[0]["data"]["video_url"]
-        predictions = self._run_tracker(video_url)
-        return [predictions]
+        if self.async_predictions:
+            return self._submit_trackers(tasks)
+
+        with ThreadPoolExecutor(max_workers=self.prediction_workers) as pool:
+            return list(pool.map(self._predict_task, tasks))
+
+    def _predict_task(self, task):
+        """Returns the predictions of a task, none if the window of the task is invalid (see get_window)."""
+        try:
+            window = get_window(task)
+        except ValueError as e:
+            print("Invalid window: " + str(e))
+            return []
+        return self._run_tracker(task["data"]["video_url"], window)
 
-    def _run_tracker(self, vid_path):
+    def _run_tracker(self, vid_path, window=None):
         """Runs the Yolov8 object tracking algorithm on the given video and returns the list of predictions.
 
         :param vid_path: path of the input video from GCS. An example is given as below:
           gs://ucf-crime-dataset/Abuse/Abuse001_x264.mp4
+        :param window: optional window of the video to track, see get_window
 
         :returns: A list of prediction as required by label studio
         """
-        results = []
-        # generate a random directory to store the video and model output
-        DIR_PREFIX = str(uuid.uuid4())
+        return run_tracker(vid_path, self.keyframe_tolerance, video_ingest=self.video_ingest, window=window)
 
-        try:
-            # make directory is does not exist
-            Path(DIR_PREFIX).mkdir(parents=True, exist_ok=True)
-            # get metadata from url passed in
-            bucket_name, video_path, video_name = get_metadata_from_url(vid_path)
-            video_destination = Path(f"{DIR_PREFIX}/{video_name}.mp4")
-            model_output_destination = Path(f"{DIR_PREFIX}/{video_name}_results")
-
-            # download video from GCS
-            download_public_file(bucket_name, video_path, video_destination)
-
-            # run yolov8 model
-            command = f"python3 yolov8_tracking/track.py --source {video_destination} --save-txt --save-txt-path {model_output_destination}"
-            run(command.split(), check=True)
-
-            # run the compute script to parse the labels from Yolov8
-            results = Compute(str(model_output_destination) + ".txt").process()
-        except Exception as e:
-            print("Error in running tracker with error: " + e)
-        finally:
-            # remove temp directory after successful / error run
-            # this is used to ensure storage does not get filled up
-            shutil.rmtree(DIR_PREFIX)
-            return results
+    def _submit_trackers(self, tasks):
+        """Runs the tracking of the given tasks as RQ jobs and returns their predictions once the jobs are finished.
+
+        :param tasks: list of input tasks
+
+        :returns: A list of prediction as required by label studio per task, empty while the job of the task is pending
+        """
+        jobs = get_tracking_jobs()
+        # enqueue every task before waiting, so that the jobs can run concurrently on the workers
+        submitted = []
+        for task in tasks:
+            try:
+                window = get_window(task)
+            except ValueError as e:
+                # only this task gets no predictions
+                print("Invalid window: " + str(e))
+                submitted.append(None)
+                continue
+            video_url = task["data"]["video_url"]
+            inputs = {"video_url": video_url, "keyframe_tolerance": self.keyframe_tolerance, "window": window}
+            submitted.append(
+                jobs.submit(
+                    task["id"],
+                    run_tracking_job,
+                    video_url,
+                    self.keyframe_tolerance,
+                    JobProgress(),
+                    self.video_ingest,
+                    window,
+                    inputs=inputs,
+                )
+            )
+        deadline = time.monotonic() + self.prediction_timeout
+        predictions = []
+        for job in submitted:
+            results = jobs.wait(job, max(deadline - time.monotonic(), 0)) if job is not None else None
+            predictions.append([] if results is None else results)
+        return predictions
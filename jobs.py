@@ -0,0 +1,145 @@
+import hashlib
+import json
+import os
+import time
+
+from redis import Redis
+from rq import Queue, get_current_job
+from rq.job import Job, JobStatus
+from rq.exceptions import NoSuchJobError
+
+# jobs in these states are submitted again on the next prediction request
+RETRY_STATUSES = (JobStatus.FAILED, JobStatus.STOPPED, JobStatus.CANCELED)
+
+# tracking jobs of this process, connected on first use
+_tracking_jobs = None
+
+
+def get_tracking_jobs():
+    """Returns the tracking jobs of this process, connected to the Redis instance of the ML backend."""
+    global _tracking_jobs
+    if _tracking_jobs is None:
+        connection = Redis(host=os.environ.get("REDIS_HOST", "localhost"), port=int(os.environ.get("REDIS_PORT", 6379)))
+        _tracking_jobs = TrackingJobs(connection, os.environ.get("RQ_QUEUE_NAME", "default"))
+    return _tracking_jobs
+
+
+class JobProgress:
+    """Progress callback storing the processed frames in the meta of the RQ job it runs in.
+
+    The job is looked up on the first call, so the callback can be passed as an argument of the job itself.
+    Outside of a job the callback does nothing.
+
+    :param interval: minimum number of seconds between two updates of the job meta.
+    """
+
+    def __init__(self, interval=1.0):
+        self.interval = interval
+        self.updated_at = None
+
+    def __call__(self, frame, frames):
+        """Stores the progress of the current job.
+
+        :param frame: the number of frames processed
+        :param frames: the total number of frames, 0 if unknown
+        """
+        job = get_current_job()
+        if job is None:
+            return
+        now = time.monotonic()
+        if self.updated_at is not None and now - self.updated_at < self.interval and frame != frames:
+            return
+        self.updated_at = now
+        job.meta["progress"] = {"frame": frame, "frames": frames}
+        job.save_meta()
+
+
+class TrackingJobs:
+    """Runs the tracking of tasks as jobs on an RQ queue.
+
+    There is at most one job per task and inputs (the video, the tracking options and the window of the task), so that
+    repeated prediction requests for a task poll the same job while a task whose inputs changed gets a new one. The
+    results of finished jobs are kept in Redis for `result_ttl` seconds, and the last job submitted for a task is
+    recorded so that its status can be looked up by task.
+
+    :param connection: the Redis connection.
+    :param queue_name: the name of the RQ queue, served by the `rq worker` of supervisord.conf.
+    :param result_ttl: the number of seconds the results of a finished job are kept.
+    :param job_timeout: the maximum number of seconds a job may run.
+    """
+
+    def __init__(self, connection, queue_name="default", result_ttl=24 * 60 * 60, job_timeout=60 * 60, is_async=True):
+        self.queue = Queue(queue_name, connection=connection, is_async=is_async)
+        self.result_ttl = result_ttl
+        self.job_timeout = job_timeout
+
+    @staticmethod
+    def job_id(task_id, inputs=None):
+        """Returns the id of the tracking job of a task with the given inputs, a JSON serializable dict."""
+        if inputs is None:
+            return f"tracking-{task_id}"
+        digest = hashlib.sha256(json.dumps(inputs, sort_keys=True, default=str).encode()).hexdigest()
+        return f"tracking-{task_id}-{digest[:16]}"
+
+    @staticmethod
+    def _last_job_key(task_id):
+        return f"tracking-task:{task_id}"
+
+    def fetch(self, task_id, inputs=None):
+        """Returns the tracking job of a task with the given inputs, or the last job submitted for the task if the
+        inputs are None. Returns None if there is no such job."""
+        if inputs is None:
+            last_job_id = self.queue.connection.get(self._last_job_key(task_id))
+            job_id = last_job_id.decode() if last_job_id is not None else self.job_id(task_id)
+        else:
+            job_id = self.job_id(task_id, inputs)
+        try:
+            return Job.fetch(job_id, connection=self.queue.connection)
+        except NoSuchJobError:
+            return None
+
+    def submit(self, task_id, func, *args, inputs=None):
+        """Enqueues func(*args) as the tracking job of a task, unless the task already has a pending or finished job
+        with the same inputs.
+
+        :param inputs: the inputs of the job identifying it among the jobs of the task, see job_id
+        :return: the tracking job of the task
+        """
+        job = self.fetch(task_id, inputs)
+        if job is None or job.get_status() in RETRY_STATUSES:
+            job = self.queue.enqueue(
+                func,
+                *args,
+                job_id=self.job_id(task_id, inputs),
+                result_ttl=self.result_ttl,
+                job_timeout=self.job_timeout,
+                meta={"task_id": task_id},
+            )
+        self.queue.connection.set(self._last_job_key(task_id), job.id, ex=self.result_ttl + self.job_timeout)
+        return job
+
+    def wait(self, job, timeout=0, interval=0.5):
+        """Polls a job until it is finished or the timeout expires.
+
+        :return: the result of the job, None if it is not finished
+        """
+        deadline = time.monotonic() + timeout
+        while job.get_status() != JobStatus.FINISHED:
+            if job.get_status() in RETRY_STATUSES or time.monotonic() >= deadline:
+                return None
+            time.sleep(interval)
+        return job.return_value()
+
+    def status(self, task_id):
+        """Returns the status and progress of the tracking job of a task."""
+        job = self.fetch(task_id)
+        if job is None:
+            return {"task_id": task_id, "status": None}
+        return {
+            "task_id": task_id,
+            "status": job.get_status(),
+            "progress": job.get_meta().get("progress"),
+            "enqueued_at": job.enqueued_at,
+            "started_at": job.started_at,
+            "ended_at": job.ended_at,
+        }
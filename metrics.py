@@ -0,0 +1,186 @@
+import json
+import os
+import threading
+from bisect import bisect_left
+from pathlib import Path
+
+# default buckets of the histograms, in seconds
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+
+def _format_labels(names, values, extra=()):
+    labels = [f'{name}="{value}"' for name, value in list(zip(names, values)) + list(extra)]
+    return "{" + ",".join(labels) + "}" if labels else ""
+
+
+def _format_value(value):
+    return "+Inf" if value == float("inf") else repr(float(value))
+
+
+class Counter:
+    """Prometheus counter, a monotonically increasing value per combination of label values.
+
+    :param name: the name of the metric.
+    :param documentation: the help text of the metric.
+    :param labelnames: the names of the labels of the metric.
+    """
+
+    type = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def dump(self):
+        with self.lock:
+            return [[list(key), value] for key, value in self.values.items()]
+
+    def merge(self, samples, into):
+        for key, value in samples:
+            into[tuple(key)] = into.get(tuple(key), 0) + value
+
+    def render(self, values):
+        for key, value in sorted(values.items()):
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class Histogram:
+    """Prometheus histogram, the distribution of the observed values per combination of label values.
+
+    :param name: the name of the metric.
+    :param documentation: the help text of the metric.
+    :param labelnames: the names of the labels of the metric.
+    :param buckets: the upper bounds of the buckets.
+    """
+
+    type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        # label values: [count per bucket (not cumulative), sum]
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        bucket = bisect_left(self.buckets, value)
+        with self.lock:
+            counts, total = self.values.get(key) or ([0] * len(self.buckets), 0)
+            counts[bucket] += 1
+            self.values[key] = (counts, total + value)
+
+    def dump(self):
+        with self.lock:
+            return [[list(key), list(counts), total] for key, (counts, total) in self.values.items()]
+
+    def merge(self, samples, into):
+        for key, counts, total in samples:
+            current, current_total = into.get(tuple(key)) or ([0] * len(self.buckets), 0)
+            into[tuple(key)] = ([a + b for a, b in zip(current, counts)], current_total + total)
+
+    def render(self, values):
+        for key, (counts, total) in sorted(values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, [("le", _format_value(bound))])
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}"
+            yield f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}"
+
+
+def _process_name():
+    """Returns the name of the metrics dump of this process: the id of a uWSGI worker, kept by the worker respawned
+    in its place, or the PID of any other process."""
+    try:
+        import uwsgi
+    except ImportError:
+        return str(os.getpid())
+    # the id of the master is 0
+    return f"uwsgi-{uwsgi.worker_id()}" if uwsgi.worker_id() else str(os.getpid())
+
+
+class Registry:
+    """Collection of metrics rendered in the Prometheus text format.
+
+    With a directory, every process dumps its metrics there (see flush) and render() adds up the metrics of all the
+    processes, so a scrape answered by any uWSGI worker covers the whole server, RQ workers included. A respawned
+    uWSGI worker replaces the dump of the worker it replaces, and the server clears the dumps of the previous run
+    when it starts (see clear).
+
+    :param directory: the directory shared by the processes, None to only render the metrics of this process.
+    """
+
+    def __init__(self, directory=None):
+        self.directory = Path(directory) if directory else None
+        self.metrics = {}
+
+    def register(self, metric):
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def _path(self, name):
+        return self.directory / f"{name}.json"
+
+    def dump(self):
+        return {name: metric.dump() for name, metric in self.metrics.items()}
+
+    def flush(self):
+        """Writes the metrics of this process to the directory."""
+        if self.directory is None:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._path(_process_name())
+        tmp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+        tmp_path.write_text(json.dumps(self.dump()))
+        os.replace(tmp_path, path)
+
+    def clear(self):
+        """Removes the metrics dumped by all the processes, the server calls it before it starts its workers."""
+        if self.directory is None or not self.directory.exists():
+            return
+        for path in self.directory.glob("*.json"):
+            path.unlink(missing_ok=True)
+
+    def render(self):
+        """Returns the metrics of this process, and of the other processes if there is a directory."""
+        dumps = [self.dump()]
+        if self.directory is not None and self.directory.exists():
+            for path in self.directory.glob("*.json"):
+                if path == self._path(_process_name()):
+                    continue
+                try:
+                    dumps.append(json.loads(path.read_text()))
+                except (FileNotFoundError, ValueError):
+                    continue
+
+        lines = []
+        for name, metric in self.metrics.items():
+            values = {}
+            for dump in dumps:
+                metric.merge(dump.get(name, []), values)
+            lines.append(f"# HELP {name} {metric.documentation}")
+            lines.append(f"# TYPE {name} {metric.type}")
+            lines.extend(metric.render(values))
+        return "\n".join(lines) + "\n"
+
+
+# metrics of the ML backend, shared across processes through METRICS_DIR when it is set
+REGISTRY = Registry(os.environ.get("METRICS_DIR"))
@@ -1,4 +1,22 @@
 import random
+import sys
+from functools import lru_cache
+
+import numpy as np
+
+from parser.keyframes import compress_keyframes
+from utils.tracing import traced
+
+
+@lru_cache(maxsize=None)
+def _capitalize_label(label):
+    """
+    Capitalizes the first letter of the label. The result is interned so that all frames share one string per label.
+
+    :param label: the label of the object
+    :return: the capitalized label
+    """
+    return sys.intern(label.capitalize())
 
 
 class FrameData:
@@ -6,6 +24,9 @@ class FrameData:
     Represents data for a single frame of a video.
     """
 
+    # a long video holds millions of frames in memory, slots drop the per-instance __dict__
+    __slots__ = ("frame_id", "id", "x", "y", "w", "h", "label", "label_id")
+
     def __init__(self, frame_id, id, x, y, w, h, label, label_id):
         """
         Initializes a new FrameData object.
@@ -27,7 +48,7 @@ class FrameData:
         self.h = float(h)
 
         # Capitalize the first letter of the label
-        self.label = label.capitalize()
+        self.label = _capitalize_label(label)
         self.label_id = int(label_id)
 
     def generate_frame_json(self, interpolation=False):
@@ -60,20 +81,30 @@ class Compute:
     Performs computation on the data in the input file to generate a JSON output.
     """
 
-    def __init__(self, file_path=None):
+    def __init__(self, file_path=None, lines=None, keyframe_tolerance=None):
         """
         Initializes a new Compute object.
 
         :param file_path: the path to the input file
+        :param lines: the MOT lines already held in memory, used instead of reading the input file
+        :param keyframe_tolerance: if set, frames within this tolerance (in percent of the video size) of the
+          interpolation between keyframes are dropped from the sequences
         """
         self.file_path = file_path
+        self.lines = lines
+        self.keyframe_tolerance = keyframe_tolerance
 
     def _read_file(self):
         """
-        Reads the input file and returns its contents as a list of lines.
+        Reads the input file and returns its contents as a list of lines. A .npy file written by the tracker
+        is loaded as a list of rows with the same columns as the lines.
 
         :return: the list of lines
         """
+        if self.lines is not None:
+            return self.lines
+        if str(self.file_path).endswith(".npy"):
+            return np.load(self.file_path).tolist()
         with open(self.file_path) as f:
             lines = f.readlines()
         return lines
@@ -87,9 +118,10 @@ class Compute:
         """
         cluster = {}
         for line in lines:
-            # strip to remove trailing newline
-            line = line.strip()
-            frame_id, id, x, y, w, h, _, _, _, _, label, label_id = line.split(",")
+            if isinstance(line, str):
+                # strip to remove trailing newline
+                line = line.strip().split(",")
+            frame_id, id, x, y, w, h, _, _, _, _, label, label_id = line
             frame = FrameData(frame_id, id, x, y, w, h, label, label_id)
 
             # grouping by two keys - frame_id and label_id (treated as primary key)
@@ -168,6 +200,7 @@ class Compute:
             )
         return {"result": results}
 
+    @traced("compute.process")
     def process(self):
         """
         Reads the input file, groups the FrameData objects, groups the FrameData objects by continuous frames,
@@ -179,7 +212,18 @@ class Compute:
         cluster = self._group_by_id(lines)
         grouped_cluster = self._group_by_continuous_frames(cluster)
         json_result = self._generate_ls_json(grouped_cluster)
-        return json_result
+        return self._compress(json_result)
+
+    def _compress(self, json_result):
+        """
+        Applies the optional keyframe compression to the generated JSON object.
+
+        :param json_result: JSON prediction object in label-studio format
+        :return: the JSON prediction object, with compressed sequences if a keyframe tolerance is set
+        """
+        if self.keyframe_tolerance is None:
+            return json_result
+        return compress_keyframes(json_result, self.keyframe_tolerance)
 
     def pretty_print_grouped_cluster(self, grouped_cluster):
         """
@@ -0,0 +1,87 @@
+import numpy as np
+
+
+def _split_runs(sequence):
+    """
+    Splits a videorectangle sequence into its runs of continuous frames. An enabled frame interpolates to the next
+    frame of the sequence, so a run ends at the first frame that is not enabled.
+
+    :param sequence: the list of frame JSON objects of one object
+    :return: the list of runs, each a list of frame JSON objects
+    """
+    runs, run = [], []
+    for frame in sequence:
+        run.append(frame)
+        if not frame["enabled"]:
+            runs.append(run)
+            run = []
+    if run:
+        runs.append(run)
+    return runs
+
+
+def _keyframes(run, tolerance):
+    """
+    Selects the keyframes of a run with the Douglas-Peucker algorithm over (x, y, width, height) versus frame.
+    A frame is dropped when its box lies within the tolerance of the linear interpolation between the keyframes
+    around it.
+
+    :param run: the list of frame JSON objects of one run of continuous frames
+    :param tolerance: the maximum deviation allowed on each box coordinate, in percent of the video size
+    :return: the sorted list of indices of the keyframes
+    """
+    frames = np.array([frame["frame"] for frame in run], dtype=np.float64)
+    boxes = np.array([[frame["x"], frame["y"], frame["width"], frame["height"]] for frame in run])
+
+    keep = {0, len(run) - 1}
+    # iterative to avoid hitting the recursion limit on long runs
+    segments = [(0, len(run) - 1)]
+    while segments:
+        start, end = segments.pop()
+        if end - start < 2:
+            continue
+        t = (frames[start + 1:end] - frames[start]) / (frames[end] - frames[start])
+        interpolated = boxes[start] + t[:, None] * (boxes[end] - boxes[start])
+        deviation = np.abs(boxes[start + 1:end] - interpolated).max(axis=1)
+        i = int(deviation.argmax())
+        if deviation[i] > tolerance:
+            split = start + 1 + i
+            keep.add(split)
+            segments.append((start, split))
+            segments.append((split, end))
+    return sorted(keep)
+
+
+def compress_sequence(sequence, tolerance):
+    """
+    Drops the frames of a videorectangle sequence that Label Studio reproduces by interpolating between keyframes.
+
+    :param sequence: the list of frame JSON objects of one object
+    :param tolerance: the maximum deviation allowed on each box coordinate, in percent of the video size
+    :return: the compressed list of frame JSON objects
+    """
+    compressed = []
+    for run in _split_runs(sequence):
+        if len(run) < 3:
+            compressed.extend(run)
+            continue
+        keyframes = _keyframes(run, tolerance)
+        for i in keyframes:
+            # every keyframe but the last one interpolates to the next keyframe
+            compressed.append(dict(run[i], enabled=i != keyframes[-1]))
+    return compressed
+
+
+def compress_keyframes(json_result, tolerance):
+    """
+    Compresses the sequences of every videorectangle of a prediction.
+
+    :param json_result: JSON prediction object in label-studio format
+    :param tolerance: the maximum deviation allowed on each box coordinate, in percent of the video size
+    :return: the JSON prediction object with compressed sequences
+    """
+    results = []
+    for result in json_result["result"]:
+        value = dict(result["value"], sequence=compress_sequence(result["value"]["sequence"], tolerance))
+        results.append(dict(result, value=value))
+    return {"result": results}
@@ -0,0 +1,73 @@
+from parser.compute import FrameData
+from parser.keyframes import compress_keyframes
+
+from utils.tracing import traced
+
+
+class StreamingCompute:
+    """
+    Builds the Label Studio JSON output incrementally from the track records emitted by the tracker.
+
+    This produces the same output as Compute.process() on the MOT file written by the tracker, without writing
+    and re-parsing that file. Each record is rounded exactly as the MOT writer formats it ("%g").
+    """
+
+    def __init__(self, names, keyframe_tolerance=None):
+        """
+        Initializes a new StreamingCompute object.
+
+        :param names: the mapping of class ID to label name of the detection model
+        :param keyframe_tolerance: if set, frames within this tolerance (in percent of the video size) of the
+          interpolation between keyframes are dropped from the sequences
+        """
+        self.names = names
+        self.keyframe_tolerance = keyframe_tolerance
+        # sequences are stored by object ID and label ID, in order of first appearance
+        self.tracks = {}
+
+    def write(self, frame_idx, id, bbox, cls):
+        """
+        Adds a single track record to the output.
+
+        :param frame_idx: the ID of the frame (starting at 1)
+        :param id: the ID of the tracked object
+        :param bbox: the (x, y, w, h) of the object's bounding box, scaled to 100 x 100
+        :param cls: the ID of the label
+        """
+        x, y, w, h = (float("%g" % v) for v in bbox)
+        frame = FrameData(frame_idx, id, x, y, w, h, self.names[int(cls)], int(cls))
+
+        key = (frame.id, frame.label_id)
+        if key not in self.tracks:
+            # the object name is the label of the first frame of the object
+            self.tracks[key] = (frame.label, [])
+        _, sequence = self.tracks[key]
+
+        # a frame continuing the previous frame makes the previous frame the start of an interpolation,
+        # the last frame of a group of continuous frames is never enabled
+        if sequence and sequence[-1]["frame"] + 1 == frame.frame_id:
+            sequence[-1]["enabled"] = True
+        sequence.append(frame.generate_frame_json(interpolation=False))
+
+    @traced("compute.process")
+    def process(self):
+        """
+        Generates the JSON object of the records written so far.
+
+        :return: JSON prediction object in label-studio format
+        """
+        results = []
+        for obj_name, sequence in self.tracks.values():
+            results.append(
+                {
+                    "value": {"sequence": sequence, "labels": [obj_name]},
+                    "from_name": "box",
+                    "to_name": "video",
+                    "type": "videorectangle",
+                    "origin": "yolov8",
+                }
+            )
+        json_result = {"result": results}
+        if self.keyframe_tolerance is not None:
+            json_result = compress_keyframes(json_result, self.keyframe_tolerance)
+        return json_result
@@ -0,0 +1,60 @@
+import numpy as np
+
+from yolov8_tracking.adaptive_stride import AdaptiveStride
+
+
+def frame(value=0):
+    return np.full((72, 128, 3), value, dtype=np.uint8)
+
+
+def test_static_frames_are_skipped_up_to_max_skip():
+    gate = AdaptiveStride(max_skip=2)
+    assert gate.detect(1, frame())
+    gate.update(1, [])
+    assert [gate.detect(n, frame()) for n in (2, 3, 4)] == [False, False, True]
+
+
+def test_motion_triggers_detection():
+    gate = AdaptiveStride()
+    assert gate.detect(1, frame())
+    gate.update(1, [])
+    assert gate.detect(2, frame(100))
+
+
+def test_skipped_frames_are_interpolated():
+    gate = AdaptiveStride(drift_threshold=1.0)
+    gate.detect(1, frame())
+    gate.update(1, [[0, 0, 100, 100, 7, 0, 0.9], [0, 0, 10, 10, 8, 0, 0.9]])
+    assert not gate.detect(2, frame())
+    assert not gate.detect(3, frame())
+    gate.detect(4, frame(100))
+    records = gate.update(4, [[30, 0, 130, 100, 7, 0, 0.9]])
+    assert [(f, id) for f, id, _, _ in records] == [(2, 7), (3, 7)]
+    np.testing.assert_allclose(records[0][2], [10, 0, 110, 100])
+    np.testing.assert_allclose(records[1][2], [20, 0, 120, 100])
+
+
+def test_fast_tracks_trigger_detection():
+    gate = AdaptiveStride(drift_threshold=0.1)
+    gate.detect(1, frame())
+    gate.update(1, [[0, 0, 100, 100, 7, 0, 0.9]])
+    gate.detect(2, frame(100))
+    gate.update(2, [[20, 0, 120, 100, 7, 0, 0.9]])  # moves by a fifth of its size per frame
+    assert gate.detect(3, frame(100))
+
+
+def test_frames_skipped_at_the_end_are_flushed():
+    gate = AdaptiveStride(drift_threshold=1.0)
+    gate.detect(1, frame())
+    gate.update(1, [[0, 0, 100, 100, 7, 0, 0.9], [0, 0, 10, 10, 8, 0, 0.9]])
+    gate.detect(2, frame(100))
+    gate.update(2, [[10, 0, 110, 100, 7, 0, 0.9], [0, 0, 10, 10, 8, 0, 0.9]])
+    # the video ends after two skipped frames
+    assert not gate.detect(3, frame(100))
+    assert not gate.detect(4, frame(100))
+    records = gate.flush()
+    assert [(f, id) for f, id, _, _ in records] == [(3, 7), (3, 8), (4, 7), (4, 8)]
+    np.testing.assert_allclose(records[0][2], [20, 0, 120, 100])
+    np.testing.assert_allclose(records[2][2], [30, 0, 130, 100])
+    np.testing.assert_allclose(records[3][2], [0, 0, 10, 10])
+    assert gate.flush() == []
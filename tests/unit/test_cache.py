@@ -0,0 +1,138 @@
+import os
+import threading
+import time
+
+import pytest
+from utils.cache import BlobCache, DiskCache, PredictionCache, RedisCache, cache_key, file_digest
+
+
+def test_cache_key_is_deterministic():
+    key = cache_key(video={"name": "a.mp4", "generation": 1}, imgsz=[640, 640])
+
+    assert key == cache_key(imgsz=[640, 640], video={"generation": 1, "name": "a.mp4"})
+    assert key != cache_key(video={"name": "a.mp4", "generation": 2}, imgsz=[640, 640])
+
+
+def test_file_digest_changes_with_content(tmp_path):
+    path = tmp_path / "weights.pt"
+    path.write_bytes(b"weights")
+    digest = file_digest(path)
+    assert digest == file_digest(path)
+
+    path.write_bytes(b"new weights")
+    os.utime(path, ns=(0, 0))
+    assert file_digest(path) != digest
+
+
+def test_disk_cache_evicts_least_recently_used(tmp_path):
+    cache = DiskCache(tmp_path, max_bytes=10)
+    cache.set("a", b"aaaa")
+    cache.set("b", b"bbbb")
+    os.utime(tmp_path / "a.json", (1, 1))
+    os.utime(tmp_path / "b.json", (2, 2))
+    # reading a makes b the least recently used value
+    assert cache.get("a") == b"aaaa"
+    cache.set("c", b"cccc")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == b"aaaa"
+    assert cache.get("c") == b"cccc"
+    assert not list(tmp_path.glob("*.part"))
+
+
+def test_redis_cache_evicts_least_recently_used():
+    fakeredis = pytest.importorskip("fakeredis")
+    cache = RedisCache(fakeredis.FakeStrictRedis(), max_bytes=10)
+    cache.set("a", b"aaaa")
+    cache.set("b", b"bbbb")
+    cache.get("a")
+    cache.set("c", b"cccc")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == b"aaaa"
+    assert cache.get("c") == b"cccc"
+
+
+def test_prediction_cache_counts_hits_and_misses(tmp_path):
+    cache = PredictionCache(DiskCache(tmp_path, max_bytes=1 << 20))
+    prediction = {"result": [{"value": {"sequence": [], "labels": ["Person"]}}]}
+
+    assert cache.get("key") is None
+    cache.set("key", prediction)
+    assert cache.get("key") == prediction
+    assert cache.stats() == {"hits": 1, "misses": 1, "hit_rate": 0.5}
+
+
+def fill(cache, generation, data, fills=None):
+    with cache.entry("bucket", "Abuse/Abuse001_x264.mp4", generation) as entry:
+        if not entry.exists:
+            if fills is not None:
+                fills.append(generation)
+                time.sleep(0.05)
+            entry.tmp_path.write_bytes(data)
+            entry.commit()
+        return entry.path.read_bytes(), entry.path
+
+
+def test_blob_cache_fills_once(tmp_path):
+    cache = BlobCache(tmp_path, max_bytes=1 << 20)
+    fills, results = [], []
+    threads = [
+        threading.Thread(target=lambda: results.append(fill(cache, 1, b"video", fills))) for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert fills == [1]
+    assert [data for data, _ in results] == [b"video"] * 4
+    assert results[0][1].suffix == ".mp4"
+    # a new generation of the object is a new entry
+    assert fill(cache, 2, b"new video", fills)[0] == b"new video"
+    assert fills == [1, 2]
+
+
+def test_blob_cache_evicts_least_recently_used(tmp_path):
+    cache = BlobCache(tmp_path, max_bytes=10)
+    _, first = fill(cache, 1, b"aaaa")
+    _, second = fill(cache, 2, b"bbbb")
+    os.utime(first, (1, 1))
+    os.utime(second, (2, 2))
+    # reading the first generation makes the second the least recently used blob
+    fill(cache, 1, b"")
+    fill(cache, 3, b"cccc")
+
+    assert first.exists() and not second.exists()
+    assert not list(tmp_path.glob("*.part"))
+
+
+def test_blob_cache_keeps_blobs_being_read(tmp_path):
+    cache = BlobCache(tmp_path, max_bytes=4)
+    with cache.entry("bucket", "video.mp4", 1) as entry:
+        entry.tmp_path.write_bytes(b"aaaa")
+        entry.commit()
+        fill(cache, 2, b"bbbb")
+        assert entry.path.exists()
+
+
+def test_blob_cache_evicts_lock_files(tmp_path):
+    cache = BlobCache(tmp_path, max_bytes=4)
+    _, first = fill(cache, 1, b"aaaa")
+    os.utime(first, (1, 1))
+    _, second = fill(cache, 2, b"bbbb")
+
+    assert not first.exists() and second.exists()
+    assert [lock.name for lock in (tmp_path / "locks").iterdir()] == [f"{second.name}.lock"]
+    # the evicted entry is filled again with a new lock file
+    assert fill(cache, 1, b"cccc")[0] == b"cccc"
+
+
+def test_blob_cache_lookup_does_not_fill(tmp_path):
+    cache = BlobCache(tmp_path, max_bytes=1 << 20)
+    with cache.lookup("bucket", "Abuse/Abuse001_x264.mp4", 1) as path:
+        assert path is None
+    assert not list((tmp_path / "locks").iterdir())
+    _, cached = fill(cache, 1, b"video")
+    with cache.lookup("bucket", "Abuse/Abuse001_x264.mp4", 1) as path:
+        assert path == cached
@@ -164,3 +164,9 @@ def test_process(file_path):
     }
 
     assert res == expected_result
+
+
+def test_process_from_lines(file_path):
+    with open(file_path) as f:
+        lines = f.readlines()
+    assert Compute(lines=lines).process() == Compute(file_path=file_path).process()
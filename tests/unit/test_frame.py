@@ -35,3 +35,10 @@ def test_frame_data_str():
         string
         == "frame_id: 1, id: 2, x: 3.0, y: 4.0, w: 5.0, h: 6.0, label: Label, label_id: 7"
     )
+
+
+def test_frame_data_is_compact():
+    frame = FrameData(1, 2, 3, 4, 5, 6, "parking meter", 7)
+    other = FrameData(2, 2, 3, 4, 5, 6, "parking meter", 7)
+    assert not hasattr(frame, "__dict__")
+    assert frame.label is other.label
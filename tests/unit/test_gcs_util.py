@@ -1,8 +1,16 @@
-from utils.gcs import get_metadata_from_url
+from utils.gcs import get_metadata_from_url, get_public_url, get_storage_client
 
 BUCKET = "ucf-crime-dataset"
 TEST_VIDEO = "Assault/Assault038_x264.mp4"
 
 def test_get_metadata_from_url():
     url = f"gs://{BUCKET}/{TEST_VIDEO}"
-    assert get_metadata_from_url(url) == (BUCKET, TEST_VIDEO, "Assault038_x264.mp4")
\ No newline at end of file
+    assert get_metadata_from_url(url) == (BUCKET, TEST_VIDEO, "Assault038_x264.mp4")
+
+def test_get_public_url():
+    assert get_public_url(BUCKET, "Road Accidents/RoadAccidents001_x264.mp4") == (
+        f"https://storage.googleapis.com/{BUCKET}/Road%20Accidents/RoadAccidents001_x264.mp4"
+    )
+
+def test_storage_client_is_shared():
+    assert get_storage_client() is get_storage_client()
@@ -0,0 +1,81 @@
+import pytest
+from jobs import JobProgress, TrackingJobs
+from rq.job import JobStatus
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+def fake_tracker(video_url, progress=None):
+    for frame in range(1, 4):
+        if progress is not None:
+            progress(frame, 3)
+    return {"result": [video_url]}
+
+
+@pytest.fixture
+def connection():
+    return fakeredis.FakeStrictRedis()
+
+
+def test_submit_runs_job_and_stores_result(connection):
+    jobs = TrackingJobs(connection, is_async=False)
+    job = jobs.submit(1908, fake_tracker, "gs://bucket/video.mp4", JobProgress(interval=0))
+
+    assert jobs.wait(job) == {"result": ["gs://bucket/video.mp4"]}
+    status = jobs.status(1908)
+    assert status["status"] == JobStatus.FINISHED
+    assert status["progress"] == {"frame": 3, "frames": 3}
+
+
+def test_submit_reuses_job_of_task(connection):
+    jobs = TrackingJobs(connection)
+    job = jobs.submit(1908, fake_tracker, "gs://bucket/video.mp4")
+    again = jobs.submit(1908, fake_tracker, "gs://bucket/video.mp4")
+
+    assert again.id == job.id == TrackingJobs.job_id(1908)
+    assert len(jobs.queue) == 1
+
+
+def test_pending_job(connection):
+    jobs = TrackingJobs(connection)
+    job = jobs.submit(1908, fake_tracker, "gs://bucket/video.mp4")
+
+    assert jobs.wait(job, timeout=0) is None
+    assert jobs.status("1908")["status"] == JobStatus.QUEUED
+    assert jobs.status("1908")["progress"] is None
+
+
+def test_status_without_job(connection):
+    assert TrackingJobs(connection).status(1) == {"task_id": 1, "status": None}
+
+
+def test_progress_outside_job():
+    # nothing to update when not running in a job
+    JobProgress()(1, 10)
+
+
+def failing_tracker(video_url):
+    raise RuntimeError(f"cannot track {video_url}")
+
+
+def test_failed_job_is_submitted_again(connection):
+    jobs = TrackingJobs(connection, is_async=False)
+    job = jobs.submit(1908, failing_tracker, "gs://bucket/video.mp4")
+    assert job.get_status() == JobStatus.FAILED
+    assert jobs.wait(job) is None
+
+    again = jobs.submit(1908, fake_tracker, "gs://bucket/video.mp4")
+    assert jobs.wait(again) == {"result": ["gs://bucket/video.mp4"]}
+
+
+def test_submit_with_other_inputs_runs_new_job(connection):
+    jobs = TrackingJobs(connection)
+    inputs = {"video_url": "gs://bucket/video.mp4", "window": None}
+    job = jobs.submit(1908, fake_tracker, "gs://bucket/video.mp4", inputs=inputs)
+    same = jobs.submit(1908, fake_tracker, "gs://bucket/video.mp4", inputs=dict(inputs))
+    windowed = jobs.submit(1908, fake_tracker, "gs://bucket/video.mp4", inputs=dict(inputs, window={"end_frame": 10}))
+
+    assert same.id == job.id != windowed.id
+    assert len(jobs.queue) == 2
+    # the status of the task is the one of its last job
+    assert jobs.fetch(1908).id == windowed.id
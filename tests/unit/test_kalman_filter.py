@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from yolov8_tracking.trackers.strongsort.sort.kalman_filter import KalmanFilter
+
+
+@pytest.fixture
+def states():
+    kf = KalmanFilter()
+    rng = np.random.default_rng(0)
+    means, covariances = [], []
+    for _ in range(5):
+        mean, covariance = kf.initiate(np.r_[rng.uniform(100, 500, 2), rng.uniform(0.3, 0.6), rng.uniform(50, 200)])
+        mean, covariance = kf.predict(mean, covariance)
+        mean[4:] = rng.normal(size=4)
+        means.append(mean)
+        covariances.append(covariance)
+    measurements = np.asarray(means)[:, :4] + rng.normal(size=(5, 4))
+    return kf, means, covariances, measurements, rng.uniform(0.3, 0.9, 5)
+
+
+def test_multi_predict_matches_predict(states):
+    kf, means, covariances, _, _ = states
+    multi_mean, multi_covariance = kf.multi_predict(np.asarray(means), np.asarray(covariances))
+    for i, (mean, covariance) in enumerate(zip(means, covariances)):
+        expected_mean, expected_covariance = kf.predict(mean, covariance)
+        np.testing.assert_allclose(multi_mean[i], expected_mean)
+        np.testing.assert_allclose(multi_covariance[i], expected_covariance)
+
+
+def test_multi_update_matches_update(states):
+    kf, means, covariances, measurements, confidences = states
+    multi_mean, multi_covariance = kf.multi_update(
+        np.asarray(means), np.asarray(covariances), measurements, confidences)
+    for i, (mean, covariance) in enumerate(zip(means, covariances)):
+        expected_mean, expected_covariance = kf.update(mean, covariance, measurements[i], confidences[i])
+        np.testing.assert_allclose(multi_mean[i], expected_mean)
+        np.testing.assert_allclose(multi_covariance[i], expected_covariance, atol=1e-9)
+
+
+@pytest.mark.parametrize("only_position", [False, True])
+def test_multi_gating_distance_matches_gating_distance(states, only_position):
+    kf, means, covariances, measurements, _ = states
+    distances = kf.multi_gating_distance(np.asarray(means), np.asarray(covariances), measurements, only_position)
+    assert distances.shape == (5, 5)
+    for i, (mean, covariance) in enumerate(zip(means, covariances)):
+        np.testing.assert_allclose(distances[i], kf.gating_distance(mean, covariance, measurements, only_position))
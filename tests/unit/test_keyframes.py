@@ -0,0 +1,67 @@
+import os
+from parser.compute import Compute
+from parser.keyframes import compress_keyframes, compress_sequence
+from parser.vectorized import VectorizedCompute
+
+import pytest
+
+EXAMPLES_DIR = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "../../parser/examples")
+)
+
+
+def frame(frame_id, x, enabled):
+    return {"frame": frame_id, "x": x, "y": 10.0, "width": 5.0, "height": 5.0, "enabled": enabled}
+
+
+def test_compress_sequence_linear_motion():
+    sequence = [frame(i, float(i), True) for i in range(1, 10)] + [frame(10, 10.0, False)]
+    assert compress_sequence(sequence, tolerance=0.0) == [frame(1, 1.0, True), frame(10, 10.0, False)]
+
+
+def test_compress_sequence_keeps_turning_point():
+    xs = [0.0, 1.0, 2.0, 3.0, 2.0, 1.0, 0.0]
+    sequence = [frame(i, x, i < len(xs) - 1) for i, x in enumerate(xs)]
+    assert compress_sequence(sequence, tolerance=0.5) == [
+        frame(0, 0.0, True),
+        frame(3, 3.0, True),
+        frame(6, 0.0, False),
+    ]
+
+
+def test_compress_sequence_within_tolerance():
+    xs = [0.0, 0.2, -0.2, 0.1, 0.0]
+    sequence = [frame(i, x, i < len(xs) - 1) for i, x in enumerate(xs)]
+    assert compress_sequence(sequence, tolerance=0.25) == [frame(0, 0.0, True), frame(4, 0.0, False)]
+    assert len(compress_sequence(sequence, tolerance=0.1)) == 5
+
+
+def test_compress_sequence_keeps_runs_apart():
+    sequence = [
+        frame(1, 1.0, True),
+        frame(2, 2.0, True),
+        frame(3, 3.0, False),
+        frame(7, 7.0, False),
+        frame(9, 9.0, True),
+        frame(10, 10.0, False),
+    ]
+    assert compress_sequence(sequence, tolerance=0.0) == [
+        frame(1, 1.0, True),
+        frame(3, 3.0, False),
+        frame(7, 7.0, False),
+        frame(9, 9.0, True),
+        frame(10, 10.0, False),
+    ]
+
+
+@pytest.mark.parametrize("compute_class", [Compute, VectorizedCompute])
+def test_process_with_keyframe_tolerance(compute_class):
+    file_path = os.path.join(EXAMPLES_DIR, "test_very_large_input.txt")
+    full = Compute(file_path=file_path).process()
+    compressed = compute_class(file_path=file_path, keyframe_tolerance=1.0).process()
+
+    assert compressed == compress_keyframes(full, 1.0)
+    assert len(compressed["result"]) == len(full["result"])
+    assert sum(len(r["value"]["sequence"]) for r in compressed["result"]) < sum(
+        len(r["value"]["sequence"]) for r in full["result"]
+    )
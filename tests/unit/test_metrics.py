@@ -0,0 +1,60 @@
+import json
+import os
+
+from metrics import Registry
+
+
+def test_render_counter_and_histogram():
+    registry = Registry()
+    predictions = registry.counter("predictions_total", "Predictions", ["status"])
+    latency = registry.histogram("prediction_seconds", "Latency", buckets=(1, 10))
+    predictions.inc(status="ok")
+    predictions.inc(2, status="ok")
+    latency.observe(0.5)
+    latency.observe(5)
+
+    assert registry.render().splitlines() == [
+        "# HELP predictions_total Predictions",
+        "# TYPE predictions_total counter",
+        'predictions_total{status="ok"} 3.0',
+        "# HELP prediction_seconds Latency",
+        "# TYPE prediction_seconds histogram",
+        'prediction_seconds_bucket{le="1.0"} 1',
+        'prediction_seconds_bucket{le="10.0"} 2',
+        'prediction_seconds_bucket{le="+Inf"} 2',
+        "prediction_seconds_sum 5.5",
+        "prediction_seconds_count 2",
+    ]
+
+
+def test_render_adds_up_processes(tmp_path):
+    worker = Registry(tmp_path)
+    worker.counter("video_download_bytes_total", "Bytes").inc(100)
+    worker.histogram("compute_seconds", "Compute", buckets=(1,)).observe(2)
+    worker.flush()
+    assert json.loads((tmp_path / f"{os.getpid()}.json").read_text()) == worker.dump()
+    # the metrics of this process are rendered from memory, its dump stands in for another process
+    os.replace(tmp_path / f"{os.getpid()}.json", tmp_path / "1.json")
+
+    server = Registry(tmp_path)
+    server.counter("video_download_bytes_total", "Bytes").inc(50)
+    server.histogram("compute_seconds", "Compute", buckets=(1,)).observe(0.5)
+    lines = server.render().splitlines()
+
+    assert "video_download_bytes_total 150.0" in lines
+    assert 'compute_seconds_bucket{le="1.0"} 1' in lines
+    assert 'compute_seconds_bucket{le="+Inf"} 2' in lines
+    assert "compute_seconds_sum 2.5" in lines
+
+
+def test_clear_removes_the_dumps_of_all_processes(tmp_path):
+    registry = Registry(tmp_path)
+    registry.counter("predictions_total", "Predictions").inc()
+    registry.flush()
+    (tmp_path / "1.json").write_text(json.dumps({"predictions_total": [[[], 5]]}))
+    registry.clear()
+
+    assert not list(tmp_path.glob("*.json"))
+    server = Registry(tmp_path)
+    server.counter("predictions_total", "Predictions").inc()
+    assert "predictions_total 1.0" in server.render().splitlines()
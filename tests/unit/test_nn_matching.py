@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from yolov8_tracking.trackers.strongsort.sort.nn_matching import NearestNeighborDistanceMetric
+
+
+def reference(history, features, targets, budget, metric):
+    """Nearest neighbor distances from the full history of samples of each target."""
+    cost = np.zeros((len(targets), len(features)))
+    for i, target in enumerate(targets):
+        samples = np.array(history[target][-budget:] if budget else history[target])
+        for j, feature in enumerate(features):
+            if metric == "cosine":
+                a = samples / np.linalg.norm(samples, axis=1, keepdims=True)
+                cost[i, j] = (1 - a @ (feature / np.linalg.norm(feature))).min()
+            else:
+                cost[i, j] = np.square(samples - feature).sum(axis=1).min()
+    return cost
+
+
+@pytest.mark.parametrize("metric", ["cosine", "euclidean"])
+@pytest.mark.parametrize("budget", [3, None])
+def test_distance_matches_the_nearest_neighbor_of_the_kept_samples(metric, budget):
+    rng = np.random.default_rng(0)
+    nn = NearestNeighborDistanceMetric(metric, 0.2, budget, capacity=2)
+    history = {}
+    active = [1, 2, 3]
+    for frame in range(8):
+        if frame == 4:
+            active = [2, 3, 4, 5]  # target 1 leaves, its row is reused
+        targets = active + active[:1]  # a target with two features in the same call
+        features = rng.normal(size=(len(targets), 8)).astype(np.float32)
+        for feature, target in zip(features, targets):
+            history.setdefault(target, []).append(feature)
+        nn.partial_fit(features, targets, active)
+        history = {k: history[k] for k in active}
+
+        queries = rng.normal(size=(4, 8)).astype(np.float32)
+        np.testing.assert_allclose(nn.distance(queries, active), reference(history, queries, active, budget, metric),
+                                   rtol=1e-4, atol=1e-4)
+    assert sorted(nn.samples) == active
+    for target in active:
+        kept = history[target][-budget:] if budget else history[target]
+        assert len(nn.samples[target]) == len(kept)
+
+
+def test_empty_features_drop_the_inactive_targets():
+    nn = NearestNeighborDistanceMetric("cosine", 0.2, 10)
+    nn.partial_fit(np.ones((2, 4)), [1, 2], [1, 2])
+    nn.partial_fit(np.empty((0, 4)), [], [2])
+    assert list(nn.samples) == [2]
+    assert nn.distance(np.empty((0, 4)), [2]).shape == (1, 0)
@@ -0,0 +1,23 @@
+import numpy as np
+
+from yolov8_tracking.patch_tracker import PatchTracker
+
+
+def scene(x, y):
+    rng = np.random.default_rng(0)
+    im0 = np.full((240, 320, 3), 128, dtype=np.uint8)
+    im0[y:y + 40, x:x + 30] = rng.integers(0, 255, (40, 30, 3), dtype=np.uint8)
+    return im0
+
+
+def test_boxes_follow_the_patch():
+    tracker = PatchTracker()
+    tracker.reset(scene(100, 80), [[100, 80, 130, 120, 0.9, 0]])
+    boxes = tracker.propagate(scene(106, 77))
+    np.testing.assert_allclose(boxes, [[106, 77, 136, 117, 0.9, 0]], atol=1)
+
+
+def test_lost_patch_falls_back_to_detection():
+    tracker = PatchTracker(min_score=0.5)
+    tracker.reset(scene(100, 80), [[100, 80, 130, 120, 0.9, 0]])
+    assert tracker.propagate(np.full((240, 320, 3), 128, dtype=np.uint8)) is None
@@ -0,0 +1,70 @@
+import time
+
+import pytest
+
+from yolov8_tracking.pipeline import Prefetcher, Worker
+
+
+def test_prefetcher_yields_in_order_and_stops():
+    prefetcher = Prefetcher(range(100), depth=4)
+    assert list(prefetcher) == list(range(100))
+    assert not prefetcher.thread.is_alive()
+
+
+def test_prefetcher_reraises_producer_errors():
+    def frames():
+        yield 1
+        raise ValueError("corrupt frame")
+
+    with pytest.raises(ValueError, match="corrupt frame"):
+        list(Prefetcher(frames(), depth=2))
+
+
+def test_prefetcher_stops_when_the_loop_is_left():
+    produced = []
+
+    def frames():
+        for i in range(1000):
+            produced.append(i)
+            yield i
+
+    prefetcher = Prefetcher(frames(), depth=2)
+    iterator = iter(prefetcher)
+    assert next(iterator) == 0
+    iterator.close()
+    assert not prefetcher.thread.is_alive()
+    assert len(produced) < 10  # backpressure, the producer stays a few items ahead
+
+
+def test_worker_runs_calls_in_order_and_reraises():
+    results = []
+    worker = Worker(depth=2)
+    for i in range(20):
+        worker.submit(results.append, i)
+    worker.close()
+    assert results == list(range(20))
+
+    worker = Worker(depth=2)
+    worker.submit(int, "not a number")
+    with pytest.raises(ValueError):
+        worker.close()
+
+    # a failing submitter stops the worker without its error
+    worker = Worker(depth=2)
+    worker.submit(int, "not a number")
+    worker.close(raise_error=False)
+    assert not worker.thread.is_alive()
+
+
+def test_prefetch_overlaps_the_stages():
+    def frames():
+        for i in range(10):
+            time.sleep(0.01)  # decoding, releases the GIL
+            yield i
+
+    start = time.perf_counter()
+    prefetcher = Prefetcher(frames(), depth=4)
+    for _ in prefetcher:
+        time.sleep(0.01)  # inference
+    assert time.perf_counter() - start < 0.18
+    assert prefetcher.stats.occupancy > 0.4
@@ -0,0 +1,18 @@
+import numpy as np
+import torch
+
+from yolov8_tracking.trackers.reid_crops import crop_rois
+
+
+def test_crops_are_mapped_through_the_letterbox():
+    # 200x100 BGR image letterboxed to 128x128: gain 0.64, 32 pixels of padding above and below
+    img0 = np.zeros((100, 200, 3), dtype=np.uint8)
+    img0[20:60, 50:90] = (255, 0, 0)  # blue square
+    frame = torch.zeros(1, 3, 128, 128)
+    frame[0, 2, 32 + 13:32 + 38, 32:58] = 1  # blue channel of the RGB frame
+
+    crops = crop_rois(frame, [(50, 20, 90, 60)], img0.shape[:2], size=(16, 16))
+    assert crops.shape == (1, 3, 16, 16)
+    # BGR like the crops sliced out of img0, blue on the first channel
+    assert crops[0, 0, 2:-2, 2:-2].min() > 0.9
+    assert crops[0, 1:].max() == 0
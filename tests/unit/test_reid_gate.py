@@ -0,0 +1,34 @@
+import numpy as np
+import torch
+
+from yolov8_tracking.trackers.reid_gate import ReIDGate
+
+
+def embeddings(indices):
+    return torch.tensor([[float(i), 1.0] for i in indices])
+
+
+def test_unambiguous_match_reuses_the_embedding_of_the_track():
+    gate = ReIDGate()
+    tracks = [(0, 0, 10, 10), (100, 100, 110, 110)]
+    features = gate.features(embeddings, [(1, 1, 11, 11), (50, 50, 60, 60)], tracks, [7, 8],
+                             [np.array([9.0, 9.0]), np.array([8.0, 8.0])])
+    # the first detection matches track 7, the second one matches no track and goes through the ReID model
+    assert features.tolist() == [[9.0, 9.0], [1.0, 1.0]]
+    assert (gate.computed, gate.reused) == (1, 1)
+
+
+def test_ambiguous_match_computes_the_embedding():
+    gate = ReIDGate()
+    tracks = [(0, 0, 10, 10), (1, 0, 11, 10)]  # two tracks within the margin of each other
+    calls = []
+    features = gate.features(lambda i: calls.append(list(i)) or embeddings(i), [(0, 0, 10, 10)], tracks, [1, 2],
+                             [np.zeros(2), np.zeros(2)])
+    assert calls == [[0]]
+    assert features.tolist() == [[0.0, 1.0]]
+
+
+def test_reused_embedding_is_refreshed_every_n_frames():
+    gate = ReIDGate(refresh=3)
+    reused = [gate.select([(0, 0, 10, 10)], [(0, 0, 10, 10)], [5])[0] >= 0 for _ in range(8)]
+    assert reused == [True, True, True, False, True, True, True, False]
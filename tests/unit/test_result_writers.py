@@ -0,0 +1,55 @@
+import os
+from parser.compute import Compute
+
+import pytest
+from yolov8_tracking.result_writers import MOTWriter, NpyWriter
+
+
+@pytest.fixture
+def file_path():
+    current_file = os.path.abspath(__file__)
+    relative_path = "../../static/small_input.txt"
+    return os.path.abspath(os.path.join(current_file, relative_path))
+
+
+@pytest.fixture
+def rows(file_path):
+    with open(file_path) as f:
+        return [line.strip().split(",") for line in f]
+
+
+def write_rows(writer, rows):
+    with writer:
+        for frame_id, id, x, y, w, h, _, _, _, source, _, label_id in rows:
+            writer.write(int(frame_id), int(id), (float(x), float(y), float(w), float(h)), int(label_id), source=int(source))
+
+
+def test_mot_writer(tmp_path, file_path, rows):
+    names = {int(row[11]): row[10] for row in rows}
+    writer = MOTWriter(tmp_path / "results", names, buffer_rows=3)
+    write_rows(writer, rows)
+
+    with open(file_path) as expected, open(writer.path) as written:
+        assert written.read().splitlines() == expected.read().splitlines()
+
+
+@pytest.mark.parametrize("writer_class", [MOTWriter, NpyWriter])
+def test_written_results_are_parsed_by_compute(tmp_path, file_path, rows, writer_class):
+    names = {int(row[11]): row[10] for row in rows}
+    writer = writer_class(tmp_path / "results", names)
+    write_rows(writer, rows)
+
+    assert Compute(file_path=writer.path).process() == Compute(file_path=file_path).process()
+
+
+def test_writers_round_the_boxes_alike(tmp_path):
+    names = {0: "Person"}
+    bbox = (100 / 3, 200 / 3, 10 / 7, 20 / 7)
+    results = []
+    for writer_class in (MOTWriter, NpyWriter):
+        with writer_class(tmp_path / writer_class.__name__, names) as writer:
+            for frame in range(1, 4):
+                writer.write(frame, 1, bbox, 0)
+        results.append(Compute(file_path=writer.path).process())
+
+    assert results[0] == results[1]
@@ -0,0 +1,43 @@
+import glob
+import os
+from parser.compute import Compute
+from parser.stream import StreamingCompute
+
+import pytest
+
+EXAMPLES_DIR = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "../../parser/examples")
+)
+
+
+def stream_file(file_path):
+    with open(file_path) as f:
+        rows = [line.strip().split(",") for line in f]
+    names = {int(row[11]): row[10] for row in rows}
+    sink = StreamingCompute(names)
+    for frame_id, id, x, y, w, h, *_, label_id in rows:
+        sink.write(int(frame_id), int(id), (float(x), float(y), float(w), float(h)), int(label_id))
+    return sink
+
+
+@pytest.mark.parametrize(
+    "file_path", sorted(glob.glob(os.path.join(EXAMPLES_DIR, "*.txt")))
+)
+def test_process_matches_compute(file_path):
+    assert stream_file(file_path).process() == Compute(file_path=file_path).process()
+
+
+def test_write_rounds_like_mot_file():
+    sink = StreamingCompute({0: "person"})
+    sink.write(1, 1, (10.123456789, 20, 30, 40), 0)
+    sink.write(2, 1, (10.5, 20, 30, 40), 0)
+    sink.write(5, 1, (11, 20, 30, 40), 0)
+
+    result = sink.process()["result"]
+    assert len(result) == 1
+    assert result[0]["value"]["labels"] == ["Person"]
+    assert result[0]["value"]["sequence"] == [
+        {"frame": 1, "x": 10.1235, "y": 20.0, "width": 30.0, "height": 40.0, "enabled": True},
+        {"frame": 2, "x": 10.5, "y": 20.0, "width": 30.0, "height": 40.0, "enabled": False},
+        {"frame": 5, "x": 11.0, "y": 20.0, "width": 30.0, "height": 40.0, "enabled": False},
+    ]
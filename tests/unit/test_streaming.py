@@ -0,0 +1,160 @@
+import base64
+import hashlib
+import os
+import threading
+
+import google_crc32c
+import pytest
+from utils.streaming import RangedDownload, RangeServer, fetch_range
+
+cv2 = pytest.importorskip("cv2")
+
+
+class BytesSource:
+    def __init__(self, data):
+        self.data = data
+        self.size = len(data)
+        self.reads = []
+
+    def read(self, offset, length):
+        self.reads.append(offset)
+        return self.data[offset:offset + length]
+
+
+@pytest.fixture
+def data():
+    return os.urandom(100_000)
+
+
+def test_range_server_serves_ranges(data):
+    with RangeServer(BytesSource(data), "video.mp4") as server:
+        assert fetch_range(server.url, 10, 19) == (data[10:20], len(data))
+        assert fetch_range(server.url, 99_990, 200_000) == (data[99_990:], len(data))
+
+
+def test_ranged_download(tmp_path, data):
+    source = BytesSource(data)
+    with RangeServer(source, "video.mp4") as server:
+        download = RangedDownload(server.url, tmp_path / "video.mp4", chunk_size=8192).start()
+        # the end of the file is readable before the download has finished
+        assert download.read(99_000, 5000) == data[99_000:]
+        download.wait()
+        download.close()
+
+    assert (tmp_path / "video.mp4").read_bytes() == data
+    assert download.size == len(data)
+
+
+def checksums(data):
+    crc32c = base64.b64encode(google_crc32c.Checksum(data).digest()).decode()
+    return crc32c, base64.b64encode(hashlib.md5(data).digest()).decode()
+
+
+class FailingSource(BytesSource):
+    def __init__(self, data, fail_from):
+        super().__init__(data)
+        self.fail_from = fail_from
+
+    def read(self, offset, length):
+        if offset >= self.fail_from:
+            raise EOFError
+        return super().read(offset, length)
+
+
+def test_parallel_download_verifies_checksums(tmp_path, data):
+    crc32c, md5 = checksums(data)
+    with RangeServer(BytesSource(data), "video.mp4") as server:
+        download = RangedDownload(server.url, tmp_path / "video.mp4", 8192, workers=4, crc32c=crc32c, md5=md5)
+        download.start().wait()
+        download.close()
+
+        assert (tmp_path / "video.mp4").read_bytes() == data
+        assert not download.state_path.exists()
+
+        download = RangedDownload(server.url, tmp_path / "other.mp4", 8192, workers=4, crc32c=crc32c, md5="bad")
+        with pytest.raises(ValueError, match="MD5 mismatch"):
+            download.start().wait()
+        download.close()
+
+
+def test_download_resumes(tmp_path, data):
+    crc32c, md5 = checksums(data)
+    source = FailingSource(data, fail_from=50_000)
+    with RangeServer(source, "video.mp4") as server:
+        download = RangedDownload(server.url, tmp_path / "video.mp4", 8192, crc32c=crc32c, md5=md5, retries=1)
+        with pytest.raises(Exception):
+            download.start().wait()
+        download.close()
+        assert download.state_path.exists()
+
+        source.fail_from, source.reads = len(data), []
+        download = RangedDownload(server.url, tmp_path / "video.mp4", 8192, crc32c=crc32c, md5=md5)
+        download.start().wait()
+        download.close()
+
+    assert (tmp_path / "video.mp4").read_bytes() == data
+    # the chunks before the failure are not fetched again
+    assert min(source.reads) == 7 * 8192
+
+
+def test_decode_while_downloading(tmp_path):
+    path = str(tmp_path / "source.mp4")
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), 25, (64, 48))
+    if not writer.isOpened():
+        pytest.skip("no MP4 encoder")
+    for i in range(50):
+        writer.write(cv2.UMat(48, 64, cv2.CV_8UC3, (i * 5, 0, 0)).get())
+    writer.release()
+
+    with open(path, "rb") as f:
+        origin = RangeServer(BytesSource(f.read()), "source.mp4")
+    download = RangedDownload(origin.url, tmp_path / "video.mp4", chunk_size=4096).start()
+    with RangeServer(download, "video.mp4") as server:
+        cap = cv2.VideoCapture(server.url, cv2.CAP_FFMPEG)
+        frames = 0
+        while cap.read()[0]:
+            frames += 1
+        cap.release()
+    download.close()
+    origin.close()
+
+    assert frames == 50
+
+
+def test_wait_ends_when_the_download_is_closed(tmp_path, data):
+    with RangeServer(BytesSource(data), "video.mp4") as server:
+        download = RangedDownload(server.url, tmp_path / "video.mp4", chunk_size=8192, workers=0).start()
+        download.close()
+        with pytest.raises(EOFError):
+            download.wait()
+
+
+def test_on_demand_download_fetches_the_chunks_read(tmp_path, data):
+    source = BytesSource(data)
+    with RangeServer(source, "video.mp4") as server:
+        download = RangedDownload(server.url, tmp_path / "video.mp4", chunk_size=8192, workers=2, on_demand=True)
+        download.start()
+        assert download.read(50_000, 100) == data[50_000:50_100]
+        download.close()
+
+    # the first chunk, fetched with the size of the object, and the chunk holding the read
+    assert sorted(download.done) == [0, 50_000 // 8192]
+    assert download.fetched_bytes == 2 * 8192
+
+
+def test_concurrent_waits_verify_once(tmp_path, data, monkeypatch):
+    crc32c, md5 = checksums(data)
+    verifications = []
+    verify = RangedDownload._verify
+    monkeypatch.setattr(RangedDownload, "_verify", lambda self: verifications.append(verify(self)))
+    with RangeServer(BytesSource(data), "video.mp4") as server:
+        download = RangedDownload(server.url, tmp_path / "video.mp4", 8192, workers=4, crc32c=crc32c, md5=md5)
+        download.start()
+        threads = [threading.Thread(target=download.wait) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        download.close()
+
+    assert len(verifications) == 1
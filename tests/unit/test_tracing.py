@@ -0,0 +1,48 @@
+import json
+
+from utils.tracing import Tracer, current_tracer, span, trace, traced
+
+
+@traced("work")
+def work():
+    with span("step", size=3):
+        return current_tracer()
+
+
+def test_disabled_by_default(tmp_path, monkeypatch):
+    monkeypatch.delenv("TRACE_SAMPLE_RATE", raising=False)
+    monkeypatch.setenv("TRACE_DIR", str(tmp_path))
+    with trace("prediction") as tracer:
+        assert tracer is None
+        assert work() is None
+
+    assert not list(tmp_path.iterdir())
+
+
+def test_sampled_trace_is_written(tmp_path, monkeypatch):
+    monkeypatch.setenv("TRACE_SAMPLE_RATE", "1")
+    monkeypatch.setenv("TRACE_DIR", str(tmp_path))
+    with trace("prediction") as tracer:
+        assert work() is tracer
+    assert current_tracer() is None
+
+    (path,) = tmp_path.glob("*-prediction-*.json")
+    events = {event["name"]: event for event in json.loads(path.read_text())["traceEvents"]}
+    assert set(events) == {"prediction", "work", "step"}
+    assert events["step"]["args"] == {"size": 3}
+    assert all(event["ph"] == "X" for event in events.values())
+    # the spans nest by time
+    for outer, inner in (("prediction", "work"), ("work", "step")):
+        assert events[outer]["ts"] <= events[inner]["ts"]
+        assert events[inner]["ts"] + events[inner]["dur"] <= events[outer]["ts"] + events[outer]["dur"]
+
+
+def test_events_are_bounded(tmp_path):
+    tracer = Tracer("prediction", max_events=2)
+    for frame in range(5):
+        tracer.complete("frame", frame, 1, frame=frame)
+    tracer.write(tmp_path / "trace.json")
+
+    trace_json = json.loads((tmp_path / "trace.json").read_text())
+    assert len(trace_json["traceEvents"]) == 2
+    assert trace_json["otherData"]["dropped"] == 3
@@ -0,0 +1,54 @@
+import glob
+import os
+from parser.compute import Compute
+from parser.vectorized import VectorizedCompute
+
+import pytest
+
+EXAMPLES_DIR = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "../../parser/examples")
+)
+STATIC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../static"))
+
+
+@pytest.mark.parametrize(
+    "file_path",
+    sorted(glob.glob(os.path.join(EXAMPLES_DIR, "*.txt")))
+    + [os.path.join(STATIC_DIR, "small_input.txt")],
+)
+def test_process_matches_compute(file_path):
+    assert VectorizedCompute(file_path=file_path).process() == Compute(file_path=file_path).process()
+
+
+def test_process_from_lines():
+    with open(os.path.join(STATIC_DIR, "small_input.txt")) as f:
+        lines = f.readlines()
+    assert VectorizedCompute(lines=lines).process() == Compute(lines=lines).process()
+
+
+def test_process_unordered_groups():
+    lines = [
+        "3,2,1,1,1,1,-1,-1,-1,0,car,2\n",
+        "1,1,1,1,1,1,-1,-1,-1,0,person,0\n",
+        "4,2,1,1,1,1,-1,-1,-1,0,car,2\n",
+        "2,1,1,1,1,1,-1,-1,-1,0,person,0\n",
+        "2,1,1,1,1,1,-1,-1,-1,0,truck,7\n",
+    ]
+    assert VectorizedCompute(lines=lines).process() == Compute(lines=lines).process()
+
+
+def test_process_empty():
+    assert VectorizedCompute(lines=[]).process() == {"result": []}
+
+
+def test_process_npy(tmp_path):
+    from yolov8_tracking.result_writers import NpyWriter
+
+    file_path = os.path.join(STATIC_DIR, "small_input.txt")
+    with open(file_path) as f:
+        rows = [line.strip().split(",") for line in f]
+    with NpyWriter(tmp_path / "results", {int(row[11]): row[10] for row in rows}) as writer:
+        for frame_id, id, x, y, w, h, *_, label_id in rows:
+            writer.write(int(frame_id), int(id), (float(x), float(y), float(w), float(h)), int(label_id))
+
+    assert VectorizedCompute(file_path=writer.path).process() == Compute(file_path=file_path).process()
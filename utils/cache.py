@@ -0,0 +1,327 @@
+import fcntl
+import hashlib
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+from pathlib import Path
+
+# prediction cache of this process, created on first use (see get_prediction_cache)
+_prediction_cache = None
+
+# video blob cache of this process, created on first use (see get_blob_cache)
+_blob_cache = None
+
+
+def get_prediction_cache():
+    """Returns the prediction cache configured by the environment, None if caching is disabled.
+
+    PREDICTION_CACHE selects the backend ("disk" or "redis"), PREDICTION_CACHE_MAX_BYTES bounds its size (1GB by
+    default) and PREDICTION_CACHE_DIR is the directory of the disk backend.
+    """
+    global _prediction_cache
+    backend = os.environ.get("PREDICTION_CACHE", "").lower()
+    if _prediction_cache is None and backend:
+        max_bytes = int(os.environ.get("PREDICTION_CACHE_MAX_BYTES", 1 << 30))
+        if backend == "disk":
+            cache_backend = DiskCache(os.environ.get("PREDICTION_CACHE_DIR", "prediction_cache"), max_bytes)
+        elif backend == "redis":
+            from redis import Redis
+
+            connection = Redis(host=os.environ.get("REDIS_HOST", "localhost"), port=int(os.environ.get("REDIS_PORT", 6379)))
+            cache_backend = RedisCache(connection, max_bytes)
+        else:
+            raise ValueError(f"Unknown prediction cache backend: {backend}")
+        _prediction_cache = PredictionCache(cache_backend)
+    return _prediction_cache
+
+
+def get_blob_cache():
+    """Returns the video blob cache configured by the environment, None if caching is disabled.
+
+    VIDEO_CACHE_DIR is the directory of the cache, which may be shared by the workers of a host, and
+    VIDEO_CACHE_MAX_BYTES bounds its size (10GB by default).
+    """
+    global _blob_cache
+    directory = os.environ.get("VIDEO_CACHE_DIR")
+    if _blob_cache is None and directory:
+        _blob_cache = BlobCache(directory, int(os.environ.get("VIDEO_CACHE_MAX_BYTES", 10 << 30)))
+    return _blob_cache
+
+
+@lru_cache(maxsize=None)
+def _file_digest(path, size, mtime):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def file_digest(path):
+    """Returns the SHA-256 of a file, computed once per file version (path, size and modification time)."""
+    stat = os.stat(path)
+    return _file_digest(str(path), stat.st_size, stat.st_mtime_ns)
+
+
+def cache_key(**parts):
+    """Returns the content address of a prediction, the SHA-256 of the JSON of the given parts."""
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class DiskCache:
+    """Cache backend storing one JSON file per key in a local directory.
+
+    The modification time of a file is its last access, the least recently used files are removed once the
+    directory holds more than `max_bytes`.
+
+    :param directory: the directory of the cache files.
+    :param max_bytes: the maximum size of the cache files.
+    """
+
+    def __init__(self, directory, max_bytes):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+
+    def _path(self, key):
+        return self.directory / f"{key}.json"
+
+    def get(self, key):
+        try:
+            value = self._path(key).read_bytes()
+        except FileNotFoundError:
+            return None
+        os.utime(self._path(key))
+        return value
+
+    def set(self, key, value):
+        # write to a temporary file first, so that readers never see a partial file
+        tmp_path = self.directory / f"{key}.{os.getpid()}.{threading.get_ident()}.tmp"
+        tmp_path.write_bytes(value)
+        os.replace(tmp_path, self._path(key))
+        self._evict()
+
+    def _evict(self):
+        files = []
+        for path in self.directory.glob("*.json"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+
+class RedisCache:
+    """Cache backend storing the values in Redis, shared by every worker connected to the same instance.
+
+    The last access of every key is kept in a sorted set, the least recently used keys are removed once the
+    values take more than `max_bytes`.
+
+    :param connection: the Redis connection.
+    :param max_bytes: the maximum size of the cached values.
+    :param prefix: the prefix of the Redis keys of the cache.
+    """
+
+    def __init__(self, connection, max_bytes, prefix="prediction-cache"):
+        self.connection = connection
+        self.max_bytes = max_bytes
+        self.prefix = prefix
+
+    def _key(self, key):
+        return f"{self.prefix}:value:{key}"
+
+    def get(self, key):
+        value = self.connection.get(self._key(key))
+        if value is not None:
+            self.connection.zadd(f"{self.prefix}:lru", {key: time.time()})
+        return value
+
+    def set(self, key, value):
+        pipe = self.connection.pipeline()
+        pipe.set(self._key(key), value)
+        pipe.zadd(f"{self.prefix}:lru", {key: time.time()})
+        pipe.hset(f"{self.prefix}:sizes", key, len(value))
+        pipe.execute()
+        self._evict()
+
+    def _evict(self):
+        total = sum(int(size) for size in self.connection.hvals(f"{self.prefix}:sizes"))
+        while total > self.max_bytes:
+            oldest = self.connection.zrange(f"{self.prefix}:lru", 0, 0)
+            if not oldest:
+                break
+            key = oldest[0].decode()
+            size = int(self.connection.hget(f"{self.prefix}:sizes", key) or 0)
+            pipe = self.connection.pipeline()
+            pipe.delete(self._key(key))
+            pipe.zrem(f"{self.prefix}:lru", key)
+            pipe.hdel(f"{self.prefix}:sizes", key)
+            pipe.execute()
+            total -= size
+
+
+class PredictionCache:
+    """Caches the predictions by content address (see cache_key) on a pluggable backend and counts hits and misses.
+
+    :param backend: the cache backend, with get(key) returning the stored bytes (None if missing) and set(key, value).
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """Returns the cached prediction of the key, None on a miss."""
+        value = self.backend.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(value)
+
+    def set(self, key, prediction):
+        """Stores the prediction of the key."""
+        self.backend.set(key, json.dumps(prediction).encode())
+
+    def stats(self):
+        """Returns the hit and miss counts of this process."""
+        requests = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hits / requests if requests else 0.0}
+
+
+class BlobEntry:
+    """Entry of a BlobCache, see BlobCache.entry."""
+
+    def __init__(self, cache, path, tmp_path, lock):
+        self.cache = cache
+        self.path = path
+        self.tmp_path = tmp_path
+        self.lock = lock
+
+    @property
+    def exists(self):
+        return self.path.exists()
+
+    def commit(self):
+        """Publishes the blob written to `tmp_path`, the workers waiting for the entry can read it from now on."""
+        os.replace(self.tmp_path, self.path)
+        fcntl.flock(self.lock, fcntl.LOCK_SH)
+        self.cache._evict(keep=self.path)
+
+
+class BlobCache:
+    """Cache of downloaded blobs on the local disk, keyed by bucket, object name and generation.
+
+    Every entry has a lock file, held shared while the blob is read and exclusive while it is filled, so that
+    concurrent workers (threads or processes) download a blob only once and never evict a blob being read. The least
+    recently used blobs, and the partial blobs of failed fills, are removed once the directory holds more than
+    `max_bytes`, with the lock file of their entry.
+
+    :param directory: the directory of the cache files.
+    :param max_bytes: the maximum size of the cached blobs.
+    """
+
+    def __init__(self, directory, max_bytes):
+        self.directory = Path(directory)
+        self.locks = self.directory / "locks"
+        self.locks.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+
+    def _name(self, bucket_name, blob_name, generation):
+        key = hashlib.sha256(f"{bucket_name}/{blob_name}#{generation}".encode()).hexdigest()
+        # the extension is kept, the video loaders select the files by extension
+        return key + Path(blob_name).suffix
+
+    @contextmanager
+    def entry(self, bucket_name, blob_name, generation):
+        """Opens the cache entry of a blob.
+
+        The entry is yielded with a shared lock if the blob is cached. Otherwise the entry is yielded with an
+        exclusive lock and the caller fills it by writing `tmp_path` and calling `commit()`, while other workers
+        opening the entry wait for the commit.
+        """
+        name = self._name(bucket_name, blob_name, generation)
+        while True:
+            with open(self._lock_path(name), "a") as lock:
+                # the fills of an entry are exclusive, so the partial blob of a failed fill can be resumed by the next one
+                entry = BlobEntry(self, self.directory / name, self.directory / f"{name}.part", lock)
+                fcntl.flock(lock, fcntl.LOCK_SH)
+                if not self._locks_entry(lock, name):
+                    continue
+                if not entry.exists:
+                    # the upgrade releases the shared lock, the entry may be evicted in between
+                    fcntl.flock(lock, fcntl.LOCK_EX)
+                    if not self._locks_entry(lock, name):
+                        continue
+                    if not entry.exists:
+                        yield entry
+                        return
+                    fcntl.flock(lock, fcntl.LOCK_SH)
+                os.utime(entry.path)
+                yield entry
+                return
+
+    @contextmanager
+    def lookup(self, bucket_name, blob_name, generation):
+        """Yields the path of a cached blob, held with a shared lock, or None if the blob is not cached. Unlike
+        entry(), a missing blob is not filled."""
+        name = self._name(bucket_name, blob_name, generation)
+        path = self.directory / name
+        while path.exists():
+            with open(self._lock_path(name), "a") as lock:
+                fcntl.flock(lock, fcntl.LOCK_SH)
+                if not self._locks_entry(lock, name):
+                    continue
+                if path.exists():
+                    os.utime(path)
+                    yield path
+                    return
+        yield None
+
+    def _lock_path(self, name):
+        return self.locks / f"{name}.lock"
+
+    def _locks_entry(self, lock, name):
+        """Returns whether the locked file is still the lock file of the entry, the eviction removes the lock files."""
+        try:
+            return os.fstat(lock.fileno()).st_ino == self._lock_path(name).stat().st_ino
+        except FileNotFoundError:
+            return False
+
+    def _evict(self, keep):
+        files = []
+        for path in self.directory.iterdir():
+            if path == keep or not path.is_file():
+                continue
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in files) + keep.stat().st_size
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            # partial blobs and their download state are locked by their entry
+            name = path.name.split(".part")[0]
+            with open(self._lock_path(name), "a") as lock:
+                try:
+                    fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    # the blob is being read or filled
+                    continue
+                path.unlink(missing_ok=True)
+                if not any((self.directory / file).exists() for file in (name, f"{name}.part", f"{name}.part.state")):
+                    # the workers waiting on the removed lock file open the entry again, see _locks_entry
+                    self._lock_path(name).unlink(missing_ok=True)
+            total -= size
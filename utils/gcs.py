@@ -1,16 +1,122 @@
+import os
+import threading
+from urllib.parse import quote
+
 from google.cloud import storage
+from requests.adapters import HTTPAdapter
+
+from utils.streaming import RangedDownload
+from utils.tracing import traced
+
+# endpoint serving public objects over HTTP, with support for range requests
+PUBLIC_ENDPOINT = "https://storage.googleapis.com"
+
+# anonymous client of this process, shared by every download so that its HTTP connections are reused
+_storage_client = None
+_storage_client_lock = threading.Lock()
+
+
+def get_storage_client():
+    """Returns the anonymous storage client of this process, created on the first call.
+
+    The client keeps a pool of up to GCS_POOL_SIZE (32 by default) HTTP connections, so that concurrent downloads
+    do not open a new TLS connection per request.
+    """
+    global _storage_client
+    with _storage_client_lock:
+        if _storage_client is None:
+            client = storage.Client.create_anonymous_client()
+            pool_size = int(os.environ.get("GCS_POOL_SIZE", 32))
+            client._http.mount("https://", HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size))
+            _storage_client = client
+    return _storage_client
+
+
+def _reset_storage_client():
+    global _storage_client, _storage_client_lock
+    # the connections of the parent process cannot be shared with a forked worker
+    _storage_client = None
+    _storage_client_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_storage_client)
+
+
+def get_http_session():
+    """Returns the HTTP session of the shared storage client, for plain requests to the public endpoint."""
+    return get_storage_client()._http
 
 
+@traced("gcs.download")
 def download_public_file(bucket_name, source_blob_name, destination_file_name):
-    """Downloads a public blob from the bucket."""
+    """Downloads a public blob from the bucket.
 
-    storage_client = storage.Client.create_anonymous_client()
+    The blob is downloaded in parallel ranged requests when GCS_DOWNLOAD_WORKERS is more than 1 (see
+    get_ranged_download).
+    """
+
+    if int(os.environ.get("GCS_DOWNLOAD_WORKERS", 1)) > 1:
+        download = get_ranged_download(bucket_name, source_blob_name, destination_file_name)
+        try:
+            download.start().wait()
+        finally:
+            download.close()
+        return
+
+    storage_client = get_storage_client()
 
     bucket = storage_client.bucket(bucket_name)
     blob = bucket.blob(source_blob_name)
     blob.download_to_filename(destination_file_name)
 
 
+def get_public_url(bucket_name, source_blob_name):
+    """Returns the HTTP URL of a public blob."""
+
+    return f"{PUBLIC_ENDPOINT}/{bucket_name}/{quote(source_blob_name)}"
+
+
+@traced("gcs.ranged_download")
+def get_ranged_download(bucket_name, source_blob_name, destination_file_name, on_demand=False):
+    """Returns the ranged download of a public blob, not started yet.
+
+    GCS_DOWNLOAD_WORKERS chunks of GCS_CHUNK_SIZE bytes (8MB by default) are fetched concurrently, the checksums of
+    the blob are verified once it is complete and a partial download to the same destination is resumed. With
+    `on_demand`, only the chunks that are read are fetched (see RangedDownload).
+    """
+
+    blob = get_storage_client().bucket(bucket_name).get_blob(source_blob_name)
+    if blob is None:
+        raise FileNotFoundError(f"gs://{bucket_name}/{source_blob_name}")
+    return RangedDownload(
+        get_public_url(bucket_name, source_blob_name),
+        destination_file_name,
+        chunk_size=int(os.environ.get("GCS_CHUNK_SIZE", 8 << 20)),
+        session=get_http_session(),
+        workers=int(os.environ.get("GCS_DOWNLOAD_WORKERS", 1)),
+        crc32c=blob.crc32c,
+        md5=blob.md5_hash,
+        on_demand=on_demand,
+    )
+
+
+@traced("gcs.get_blob")
+def get_object_identity(bucket_name, source_blob_name):
+    """Returns the identity of a public blob, which changes whenever the object is overwritten."""
+
+    storage_client = get_storage_client()
+
+    blob = storage_client.bucket(bucket_name).get_blob(source_blob_name)
+    if blob is None:
+        raise FileNotFoundError(f"gs://{bucket_name}/{source_blob_name}")
+    return {
+        "bucket": bucket_name,
+        "name": source_blob_name,
+        "generation": blob.generation,
+        "etag": blob.etag,
+    }
+
+
 def get_metadata_from_url(url):
     paths = url.split("/")
     bucket_name = paths[2]
@@ -0,0 +1,296 @@
+import base64
+import hashlib
+import json
+import os
+import re
+import threading
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import google_crc32c
+import requests
+
+CONTENT_RANGE = re.compile(r"bytes (\d+)-(\d+)/(\d+)")
+RANGE = re.compile(r"bytes=(\d*)-(\d*)")
+
+
+def fetch_range(url, start, end, session=None, timeout=60):
+    """Fetches the bytes start to end (inclusive) of a URL with an HTTP range request.
+
+    :param session: the requests session reusing its connections, a new connection is opened if None
+    :return: the bytes and the total size of the object
+    """
+    response = (session or requests).get(url, headers={"Range": f"bytes={start}-{end}"}, timeout=timeout)
+    response.raise_for_status()
+    data = response.content
+    match = CONTENT_RANGE.match(response.headers.get("Content-Range", ""))
+    # servers ignoring the range answer with the whole object
+    size = int(match.group(3)) if match else len(data)
+    if not match:
+        data = data[start:end + 1]
+    return data, size
+
+
+class RangedDownload:
+    """Downloads an object in ranged chunks on background threads, while its downloaded parts can already be read.
+
+    The chunks are fetched in order by `workers` threads writing to a preallocated file, except that a read of a
+    missing chunk moves it to the front of the queue, so a decoder seeking to the index at the end of an MP4 does not
+    wait for the whole file. The completed chunks are recorded next to the destination, so that a partial download
+    of the same object to the same destination is resumed. The CRC32C and MD5 checksums, base64 encoded as in the GCS
+    object metadata, are verified once the download is complete.
+
+    :param url: the URL of the object, served with HTTP range requests.
+    :param destination: the file the object is written to.
+    :param chunk_size: the number of bytes fetched per request.
+    :param session: the requests session used for the chunk requests.
+    :param workers: the number of chunks fetched concurrently.
+    :param crc32c: the expected CRC32C of the object, not verified if None.
+    :param md5: the expected MD5 of the object, not verified if None.
+    :param retries: the number of attempts per chunk.
+    :param on_demand: whether only the chunks that are read are fetched, for reads of a part of the object. The
+      object is then never complete, wait() must not be called.
+    """
+
+    def __init__(self, url, destination, chunk_size=4 << 20, session=None, workers=1, crc32c=None, md5=None, retries=3,
+                 on_demand=False):
+        self.url = url
+        self.destination = Path(destination)
+        self.state_path = self.destination.with_name(self.destination.name + ".state")
+        self.chunk_size = chunk_size
+        self.session = session
+        self.workers = workers
+        self.crc32c = crc32c
+        self.md5 = md5
+        self.retries = retries
+        self.on_demand = on_demand
+        self.size = None
+        self.fd = None
+        self.error = None
+        self.closed = False
+        self.verified = False
+        self.done = set()
+        self.pending = deque()
+        self.condition = threading.Condition()
+        self.verify_lock = threading.Lock()
+        self.threads = []
+
+    def start(self):
+        """Fetches the size of the object and downloads its missing chunks in the background."""
+        if not self._resume():
+            data, self.size = fetch_range(self.url, 0, self.chunk_size - 1, self.session)
+            with open(self.destination, "wb") as f:
+                f.truncate(self.size)
+                f.write(data)
+            self.done = {0}
+            self._save_state()
+        self.fd = os.open(self.destination, os.O_RDWR)
+        if not self.on_demand:
+            self.pending.extend(chunk for chunk in range(self.chunks) if chunk not in self.done)
+        for _ in range(self.workers if self.on_demand else min(self.workers, len(self.pending))):
+            thread = threading.Thread(target=self._download, daemon=True)
+            thread.start()
+            self.threads.append(thread)
+        return self
+
+    @property
+    def chunks(self):
+        return -(-self.size // self.chunk_size)
+
+    @property
+    def fetched_bytes(self):
+        """Number of bytes of the chunks downloaded so far."""
+        with self.condition:
+            return sum(min(self.chunk_size, self.size - chunk * self.chunk_size) for chunk in self.done)
+
+    def _state(self):
+        return {"url": self.url, "size": self.size, "chunk_size": self.chunk_size, "crc32c": self.crc32c, "md5": self.md5}
+
+    def _resume(self):
+        """Loads the completed chunks of a previous download, returns whether there is one to resume."""
+        try:
+            state = json.loads(self.state_path.read_text())
+            self.size = state["size"]
+            if state != dict(self._state(), done=state["done"]) or self.destination.stat().st_size != self.size:
+                return False
+        except (FileNotFoundError, ValueError, KeyError):
+            return False
+        self.done = set(state["done"])
+        return True
+
+    def _save_state(self):
+        tmp_path = self.state_path.with_name(self.state_path.name + ".tmp")
+        tmp_path.write_text(json.dumps(dict(self._state(), done=sorted(self.done))))
+        os.replace(tmp_path, self.state_path)
+
+    def _download(self):
+        while True:
+            with self.condition:
+                while self.on_demand and not self.pending and not self.closed and self.error is None:
+                    self.condition.wait()
+                if self.closed or self.error is not None or not self.pending:
+                    return
+                chunk = self.pending.popleft()
+                if chunk in self.done:
+                    continue
+            start = chunk * self.chunk_size
+            end = min(start + self.chunk_size, self.size) - 1
+            for attempt in range(self.retries):
+                try:
+                    data, _ = fetch_range(self.url, start, end, self.session)
+                    os.pwrite(self.fd, data, start)
+                    break
+                except Exception as e:
+                    if attempt == self.retries - 1:
+                        with self.condition:
+                            self.error = e
+                            self.condition.notify_all()
+                        return
+            with self.condition:
+                self.done.add(chunk)
+                self._save_state()
+                self.condition.notify_all()
+
+    def read(self, offset, length):
+        """Returns up to `length` bytes at `offset`, waiting for the chunks holding them to be downloaded."""
+        end = min(offset + length, self.size)
+        if offset >= end:
+            return b""
+        needed = range(offset // self.chunk_size, (end - 1) // self.chunk_size + 1)
+        with self.condition:
+            # the missing chunks of the read are fetched next
+            for chunk in reversed(needed):
+                if chunk not in self.done:
+                    self.pending.appendleft(chunk)
+            self.condition.notify_all()
+            while not all(chunk in self.done for chunk in needed):
+                if self.error is not None:
+                    raise self.error
+                if self.closed:
+                    raise EOFError(f"{self.url} download closed")
+                self.condition.wait()
+        return os.pread(self.fd, end - offset, offset)
+
+    def wait(self):
+        """Waits for the whole object to be downloaded and verifies its checksums, once whatever the number of
+        threads waiting."""
+        with self.condition:
+            while len(self.done) < self.chunks:
+                if self.error is not None:
+                    raise self.error
+                if self.closed:
+                    raise EOFError(f"{self.url} download closed")
+                self.condition.wait()
+        with self.verify_lock:
+            if not self.verified:
+                self._verify()
+                self.verified = True
+                self.state_path.unlink(missing_ok=True)
+
+    def _verify(self):
+        crc32c = google_crc32c.Checksum() if self.crc32c is not None else None
+        md5 = hashlib.md5() if self.md5 is not None else None
+        with open(self.destination, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                if crc32c is not None:
+                    crc32c.update(block)
+                if md5 is not None:
+                    md5.update(block)
+        for name, checksum, expected in (("CRC32C", crc32c, self.crc32c), ("MD5", md5, self.md5)):
+            if checksum is not None and base64.b64encode(checksum.digest()).decode() != expected:
+                # the chunks are not trusted anymore, the next download starts over
+                self.state_path.unlink(missing_ok=True)
+                raise ValueError(f"{name} mismatch of {self.url}")
+
+    def close(self):
+        """Stops the download after the chunks being fetched."""
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+        for thread in self.threads:
+            thread.join()
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+
+class _RangeHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_HEAD(self):
+        self._respond(body=False)
+
+    def do_GET(self):
+        self._respond(body=True)
+
+    def _respond(self, body):
+        source = self.server.source
+        if self.path.lstrip("/") != self.server.name:
+            self.send_error(404)
+            return
+        start, end = 0, source.size - 1
+        match = RANGE.fullmatch(self.headers.get("Range", ""))
+        if match and match.group(1):
+            start = int(match.group(1))
+            end = min(int(match.group(2)), end) if match.group(2) else end
+        elif match and match.group(2):
+            # suffix range, the last bytes of the object
+            start = max(source.size - int(match.group(2)), 0)
+        if start > end:
+            self.send_response(416)
+            self.send_header("Content-Range", f"bytes */{source.size}")
+            self.end_headers()
+            return
+
+        self.send_response(206 if match else 200)
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("Content-Length", str(end - start + 1))
+        if match:
+            self.send_header("Content-Range", f"bytes {start}-{end}/{source.size}")
+        self.end_headers()
+        if not body:
+            return
+        try:
+            while start <= end:
+                data = source.read(start, min(self.server.chunk_size, end - start + 1))
+                self.wfile.write(data)
+                start += len(data)
+        except (ConnectionError, EOFError):
+            # the decoder closed the connection to seek elsewhere, or the download was stopped
+            pass
+
+
+class RangeServer:
+    """Serves an object over HTTP range requests on localhost, so that a video decoder can read it as it arrives.
+
+    :param source: the object, with a `size` and a `read(offset, length)` method, such as a RangedDownload.
+    :param name: the file name of the object in the URL, its extension tells the decoder the container format.
+    :param chunk_size: the number of bytes written per read of the source.
+    """
+
+    def __init__(self, source, name, chunk_size=1 << 20):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _RangeHandler)
+        self.server.daemon_threads = True
+        self.server.source = source
+        self.server.name = name
+        self.server.chunk_size = chunk_size
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/{self.server.name}"
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,121 @@
+import functools
+import json
+import os
+import random
+import threading
+import time
+import uuid
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from pathlib import Path
+
+# tracer of the trace being recorded in the current thread, None when the request is not traced
+_current_tracer = ContextVar("tracer", default=None)
+
+# span returned when there is no trace, so that untraced requests only pay for a context variable lookup
+_NO_SPAN = nullcontext()
+
+
+class Tracer:
+    """Records the spans of one trace as Chrome trace events, viewable in chrome://tracing or Perfetto.
+
+    Spans are complete ("X") events with wall clock timestamps, the spans of a thread nest by time.
+
+    :param name: the name of the trace.
+    :param max_events: the maximum number of events recorded, the following ones are counted as dropped.
+    """
+
+    def __init__(self, name, max_events=100_000):
+        self.name = name
+        self.max_events = max_events
+        self.events = []
+        self.dropped = 0
+        self.pid = os.getpid()
+        self.lock = threading.Lock()
+
+    def complete(self, name, start, duration, **args):
+        """Records a span that started at `start` (seconds since the epoch) and lasted `duration` seconds."""
+        event = {
+            "name": name,
+            "ph": "X",
+            "ts": start * 1e6,
+            "dur": duration * 1e6,
+            "pid": self.pid,
+            "tid": threading.get_ident(),
+            "args": args,
+        }
+        with self.lock:
+            if len(self.events) < self.max_events:
+                self.events.append(event)
+            else:
+                self.dropped += 1
+
+    @contextmanager
+    def span(self, name, **args):
+        """Records the block as a span, the yielded dict of arguments can be completed inside the block."""
+        start = time.time()
+        try:
+            yield args
+        finally:
+            self.complete(name, start, time.time() - start, **args)
+
+    def write(self, path):
+        """Writes the trace in the Chrome trace event JSON format."""
+        with open(path, "w") as f:
+            json.dump(
+                {"traceEvents": self.events, "displayTimeUnit": "ms", "otherData": {"name": self.name, "dropped": self.dropped}},
+                f,
+            )
+
+
+def current_tracer():
+    """Returns the tracer of the current request, None if it is not traced."""
+    return _current_tracer.get()
+
+
+def span(name, **args):
+    """Records the block as a span of the current trace, does nothing if the request is not traced."""
+    tracer = _current_tracer.get()
+    if tracer is None:
+        return _NO_SPAN
+    return tracer.span(name, **args)
+
+
+def traced(name):
+    """Decorator recording the calls of a function as spans of the current trace."""
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+@contextmanager
+def trace(name):
+    """Traces the block for a sample of the requests.
+
+    TRACE_SAMPLE_RATE is the fraction of the requests traced (0, tracing disabled, by default) and TRACE_DIR the
+    directory the traces are written to, one JSON file per traced request.
+
+    :param name: the name of the trace and of its root span.
+    """
+    sample_rate = float(os.environ.get("TRACE_SAMPLE_RATE", 0))
+    if sample_rate <= 0 or random.random() >= sample_rate:
+        yield None
+        return
+
+    tracer = Tracer(name)
+    token = _current_tracer.set(tracer)
+    try:
+        with tracer.span(name):
+            yield tracer
+    finally:
+        _current_tracer.reset(token)
+        directory = Path(os.environ.get("TRACE_DIR", "traces"))
+        directory.mkdir(parents=True, exist_ok=True)
+        tracer.write(directory / f"{time.strftime('%Y%m%d-%H%M%S')}-{name}-{uuid.uuid4().hex[:8]}.json")
@@ -0,0 +1,95 @@
+import cv2
+import numpy as np
+
+
+class AdaptiveStride:
+    """
+    Decides which frames go through the detector and fills in the tracks of the frames it skips.
+
+    A frame is skipped when all of the following hold:
+      - it differs little from the last detected frame: the mean absolute difference of the downscaled grayscale
+        frames is below `motion_threshold` (in fraction of the intensity range),
+      - the tracks are not expected to have drifted by more than `drift_threshold` of their size since the last
+        detected frame, given the velocity of each track between the two last detected frames,
+      - fewer than `max_skip` frames were skipped in a row.
+    The boxes of the tracks over the skipped frames are interpolated linearly between the two detected frames
+    around them, so the sequences built from the results have no gaps. The frames skipped at the end of the video are
+    given by flush().
+    """
+
+    def __init__(self, motion_threshold=0.02, drift_threshold=0.1, max_skip=5, size=(96, 54)):
+        self.motion_threshold = motion_threshold
+        self.drift_threshold = drift_threshold
+        self.max_skip = max_skip
+        self.size = size
+        self.reference = None  # downscaled grayscale last detected frame
+        self.last_frame = None  # number of the last detected frame
+        self.last_tracks = {}  # id: (xyxy, cls) of the tracks of the last detected frame
+        self.velocity = {}  # id: xyxy displacement per frame
+        self.skipped = []  # numbers of the frames skipped since the last detected frame
+
+    def _gray(self, im0):
+        small = cv2.resize(im0, self.size, interpolation=cv2.INTER_AREA)
+        return cv2.cvtColor(small, cv2.COLOR_BGR2GRAY) if small.ndim == 3 else small
+
+    def _drift(self, frames):
+        """Returns the largest displacement of a track after `frames` frames, in fraction of its size."""
+        drift = 0.0
+        for id, velocity in self.velocity.items():
+            xyxy = self.last_tracks[id][0]
+            size = max(xyxy[2] - xyxy[0], xyxy[3] - xyxy[1], 1.0)
+            drift = max(drift, float(np.abs(velocity).max()) * frames / size)
+        return drift
+
+    def detect(self, frame, im0):
+        """Returns whether the detector runs on a frame, the frame is recorded as skipped otherwise."""
+        gray = self._gray(im0)
+        if self.reference is not None and len(self.skipped) < self.max_skip:
+            motion = cv2.absdiff(gray, self.reference).mean() / 255
+            frames = frame - self.last_frame
+            if motion < self.motion_threshold and self._drift(frames) < self.drift_threshold:
+                self.skipped.append(frame)
+                return False
+        self.reference = gray
+        return True
+
+    def update(self, frame, outputs):
+        """
+        Records the tracks of a detected frame and interpolates them over the frames skipped before it.
+
+        :param frame: the number of the detected frame
+        :param outputs: the tracker outputs of the frame, rows starting with x1, y1, x2, y2, id, cls
+        :return: the (frame, id, xyxy, cls) records of the skipped frames, in frame order
+        """
+        tracks = {int(output[4]): (np.asarray(output[0:4], dtype=np.float64), output[5]) for output in outputs}
+        records = []
+        if self.last_frame is not None:
+            span = frame - self.last_frame
+            for skipped in self.skipped:
+                t = (skipped - self.last_frame) / span
+                for id, (xyxy, cls) in tracks.items():
+                    if id in self.last_tracks:
+                        previous = self.last_tracks[id][0]
+                        records.append((skipped, id, previous + t * (xyxy - previous), cls))
+            self.velocity = {
+                id: (xyxy - self.last_tracks[id][0]) / span for id, (xyxy, _) in tracks.items() if id in self.last_tracks
+            }
+        self.last_frame, self.last_tracks, self.skipped = frame, tracks, []
+        return records
+
+    def flush(self):
+        """
+        Returns the tracks over the frames skipped since the last detected frame, once the video has ended.
+
+        There is no detected frame after them to interpolate towards, so the boxes of the last detected frame are
+        extrapolated with the velocity of their track, or held where the velocity is unknown.
+
+        :return: the (frame, id, xyxy, cls) records of the skipped frames, in frame order
+        """
+        records = []
+        for skipped in self.skipped:
+            frames = skipped - self.last_frame
+            for id, (xyxy, cls) in self.last_tracks.items():
+                records.append((skipped, id, xyxy + frames * self.velocity.get(id, 0.0), cls))
+        self.skipped = []
+        return records
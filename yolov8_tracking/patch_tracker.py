@@ -0,0 +1,65 @@
+import cv2
+import numpy as np
+
+
+class PatchTracker:
+    """
+    Propagates the detections of a keyframe to the following frames by template matching each box.
+
+    reset() keeps a grayscale template of every detection of a keyframe, downscaled so that its longest side is at
+    most `template_size` pixels. propagate() looks for every template around its last position, in a window grown by
+    `search` times the box size on each side, and returns the moved boxes in the layout of the detections, so the
+    tracker updates its Kalman filters with them as if the detector had run. A box whose window leaves the frame is
+    dropped; propagate() returns None when the normalized correlation of a box falls below `min_score`, the boxes are
+    no longer trusted and the frame needs a full detection.
+    """
+
+    def __init__(self, min_score=0.5, search=0.5, template_size=32):
+        self.min_score = min_score
+        self.search = search
+        self.template_size = template_size
+        self.boxes = np.empty((0, 6), dtype=np.float32)  # x1, y1, x2, y2, conf, cls
+        self.templates = []  # (template, scale) per box
+
+    @staticmethod
+    def _gray(im0):
+        return cv2.cvtColor(im0, cv2.COLOR_BGR2GRAY) if im0.ndim == 3 else im0
+
+    def reset(self, im0, det):
+        """Keeps the detections (rows of x1, y1, x2, y2, conf, cls in im0 pixels) of a keyframe as the boxes to track."""
+        gray = self._gray(im0)
+        height, width = gray.shape
+        boxes, templates = [], []
+        for box in np.asarray(det, dtype=np.float32)[:, :6]:
+            x1, y1, x2, y2 = np.clip(np.round(box[:4]), 0, [width, height, width, height]).astype(int)
+            if x2 - x1 < 2 or y2 - y1 < 2:
+                continue
+            scale = min(1.0, self.template_size / max(x2 - x1, y2 - y1))
+            template = cv2.resize(gray[y1:y2, x1:x2], None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+            boxes.append((x1, y1, x2, y2, box[4], box[5]))
+            templates.append((template, scale))
+        self.boxes = np.array(boxes, dtype=np.float32).reshape(-1, 6)
+        self.templates = templates
+
+    def propagate(self, im0):
+        """Moves the boxes to their best match in im0, returns them or None if a match is too weak."""
+        gray = self._gray(im0)
+        height, width = gray.shape
+        keep = []
+        for k, (box, (template, scale)) in enumerate(zip(self.boxes, self.templates)):
+            x1, y1, x2, y2 = box[:4]
+            margin = self.search * max(x2 - x1, y2 - y1)
+            left, top = int(max(x1 - margin, 0)), int(max(y1 - margin, 0))
+            right, bottom = int(min(x2 + margin, width)), int(min(y2 + margin, height))
+            region = cv2.resize(gray[top:bottom, left:right], None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+            if region.shape[0] < template.shape[0] or region.shape[1] < template.shape[1]:
+                continue  # the box leaves the frame
+            _, score, _, (dx, dy) = cv2.minMaxLoc(cv2.matchTemplate(region, template, cv2.TM_CCOEFF_NORMED))
+            if score < self.min_score:
+                return None
+            new_x1, new_y1 = left + dx / scale, top + dy / scale
+            self.boxes[k, :4] = (new_x1, new_y1, new_x1 + x2 - x1, new_y1 + y2 - y1)
+            keep.append(k)
+        self.boxes = self.boxes[keep]
+        self.templates = [self.templates[k] for k in keep]
+        return self.boxes.copy()
@@ -0,0 +1,158 @@
+import queue
+import threading
+import time
+
+
+class _End:
+    """End of stream marker of the prefetch queue, with the exception that ended the stream if any."""
+
+    def __init__(self, error=None):
+        self.error = error
+
+
+class StageStats:
+    """
+    Time accounting of a pipeline stage.
+
+    `busy` is the time the stage spent working, `blocked` the time it waited on its full output queue (the next stage
+    is slower) and `starved` the time its consumer waited on its empty queue (this stage is slower).
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.busy = 0.0
+        self.blocked = 0.0
+        self.starved = 0.0
+        self.start = time.perf_counter()
+        self.end = None
+
+    @property
+    def wall(self):
+        return (self.end or time.perf_counter()) - self.start
+
+    @property
+    def occupancy(self):
+        """Fraction of the wall time the stage was busy."""
+        return self.busy / self.wall if self.wall else 0.0
+
+
+class Prefetcher:
+    """
+    Iterates an iterable in a background thread, at most `depth` items ahead of the consumer.
+
+    The bounded queue blocks the producer when the consumer falls behind, and an exception of the producer is
+    re-raised in the consumer. Iterating returns a generator that stops the producer when the iteration is over or
+    abandoned, by a break or an exception of the consumer, so the thread never outlives the loop.
+
+    OpenCV and FFmpeg release the GIL while reading and decoding, so decoding the next frames overlaps with the
+    inference of the current one.
+    """
+
+    def __init__(self, iterable, depth=4, name='decode'):
+        self.iterable = iterable
+        self.queue = queue.Queue(maxsize=depth)
+        self.stop = threading.Event()
+        self.stats = StageStats(name)
+        self.thread = threading.Thread(target=self._produce, name=f'{name}-prefetch', daemon=True)
+
+    def _put(self, item):
+        start = time.perf_counter()
+        while not self.stop.is_set():
+            try:
+                self.queue.put(item, timeout=0.1)
+                break
+            except queue.Full:
+                continue
+        self.stats.blocked += time.perf_counter() - start
+
+    def _produce(self):
+        error = None
+        try:
+            iterator = iter(self.iterable)
+            while not self.stop.is_set():
+                start = time.perf_counter()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    break
+                finally:
+                    self.stats.busy += time.perf_counter() - start
+                self._put(item)
+        except BaseException as e:
+            error = e
+        self._put(_End(error))
+
+    def __iter__(self):
+        self.stats.start = time.perf_counter()
+        self.thread.start()
+        try:
+            while True:
+                start = time.perf_counter()
+                item = self.queue.get()
+                self.stats.starved += time.perf_counter() - start
+                if isinstance(item, _End):
+                    if item.error is not None:
+                        raise item.error
+                    return
+                yield item
+        finally:
+            self.close()
+
+    def close(self):
+        """Stops the producer and waits for it, the item it is reading is discarded."""
+        self.stop.set()
+        if self.thread.is_alive():
+            self.thread.join()
+        if self.stats.end is None:
+            self.stats.end = time.perf_counter()
+
+
+class Worker:
+    """
+    Runs the submitted calls one after the other, in submission order, in a background thread.
+
+    At most `depth` calls wait in the queue, submit() blocks beyond that. An exception raised by a call stops the
+    following ones and is re-raised by the next submit() or by close(), which waits for the pending calls.
+    """
+
+    def __init__(self, depth=16, name='write'):
+        self.queue = queue.Queue(maxsize=depth)
+        self.error = None
+        self.stats = StageStats(name)
+        self.thread = threading.Thread(target=self._run, name=f'{name}-worker', daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        while True:
+            task = self.queue.get()
+            if task is None:
+                return
+            if self.error is not None:
+                continue  # drain the calls submitted before the error was noticed
+            func, args = task
+            start = time.perf_counter()
+            try:
+                func(*args)
+            except BaseException as e:
+                self.error = e
+            self.stats.busy += time.perf_counter() - start
+
+    def _raise(self):
+        if self.error is not None:
+            raise self.error
+
+    def submit(self, func, *args):
+        self._raise()
+        start = time.perf_counter()
+        self.queue.put((func, args))
+        self.stats.starved += time.perf_counter() - start  # the submitter waited on this stage
+
+    def close(self, raise_error=True):
+        """Waits for the pending calls and stops the thread, `raise_error=False` drops the error of a call for a
+        submitter that is already failing."""
+        if self.thread.is_alive():
+            self.queue.put(None)
+            self.thread.join()
+            self.stats.end = time.perf_counter()
+        if raise_error:
+            self._raise()
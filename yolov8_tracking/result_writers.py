@@ -0,0 +1,116 @@
+import numpy as np
+
+# columns of the MOT result rows, the label columns are appended to the standard MOT columns
+MOT_COLUMNS = (
+    ('frame', 'i4'),
+    ('id', 'i4'),
+    ('x', 'f8'),
+    ('y', 'f8'),
+    ('w', 'f8'),
+    ('h', 'f8'),
+    ('conf', 'i4'),
+    ('x3d', 'i4'),
+    ('y3d', 'i4'),
+    ('source', 'i4'),
+    ('label', 'U'),  # sized to the longest label when saved
+    ('label_id', 'i4'),
+)
+
+
+class ResultWriter:
+    """
+    Base class of the writers storing the MOT result rows of one source.
+
+    A writer keeps a single output per source for the whole stream, call close() (or use the writer as a
+    context manager) once the stream has ended.
+    """
+
+    suffix = ''
+
+    def __init__(self, path, names):
+        self.path = str(path) + self.suffix
+        self.names = names
+
+    def write(self, frame_idx, id, bbox, cls, source=0):
+        raise NotImplementedError
+
+    def close(self):
+        raise NotImplementedError
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class MOTWriter(ResultWriter):
+    """
+    Writes the rows to a MOT text file through a single file handle.
+
+    Rows are buffered in memory and written in blocks of `buffer_rows` instead of opening the file for every row.
+    """
+
+    suffix = '.txt'
+
+    def __init__(self, path, names, buffer_rows=4096):
+        super().__init__(path, names)
+        self.buffer_rows = buffer_rows
+        self.buffer = []
+        self.file = open(self.path, 'a')
+
+    def write(self, frame_idx, id, bbox, cls, source=0):
+        # Write MOT compliant results to file
+        # Modified to also have the label of the results
+        c = int(cls)
+        self.buffer.append(('%g,' * 10 + '%s,%s' + '\n') % (frame_idx, id, *bbox, -1, -1, -1, source, self.names[c], c))
+        if len(self.buffer) >= self.buffer_rows:
+            self.flush()
+
+    def flush(self):
+        self.file.write(''.join(self.buffer))
+        self.buffer = []
+
+    def close(self):
+        if not self.file.closed:
+            self.flush()
+            self.file.close()
+
+
+class NpyWriter(ResultWriter):
+    """
+    Writes the rows as a NumPy structured array with the MOT columns (see MOT_COLUMNS) to a .npy file.
+
+    Rows are collected column by column and saved once on close(), the result is loaded with np.load()
+    without any text parsing. The boxes are rounded to the 6 significant digits of the MOT text file, so that both
+    formats give the same results.
+    """
+
+    suffix = '.npy'
+
+    def __init__(self, path, names):
+        super().__init__(path, names)
+        self.columns = [[] for _ in MOT_COLUMNS]
+        self.closed = False
+
+    def write(self, frame_idx, id, bbox, cls, source=0):
+        c = int(cls)
+        row = (frame_idx, id, *(float('%g' % v) for v in bbox), -1, -1, -1, source, self.names[c], c)
+        for column, value in zip(self.columns, row):
+            column.append(value)
+
+    def close(self):
+        if self.closed:
+            return
+        columns = [np.array(column, dtype=dtype) for column, (_, dtype) in zip(self.columns, MOT_COLUMNS)]
+        rows = np.empty(len(columns[0]), dtype=[(name, column.dtype) for (name, _), column in zip(MOT_COLUMNS, columns)])
+        for (name, _), column in zip(MOT_COLUMNS, columns):
+            rows[name] = column
+        np.save(self.path, rows)
+        self.closed = True
+
+
+WRITERS = {
+    'txt': MOTWriter,
+    'npy': NpyWriter,
+}
@@ -10,7 +10,11 @@ os.environ["NUMEXPR_NUM_THREADS"] = "1"
 
 import sys
 import platform
+import itertools
+import threading
+import time
 import numpy as np
+from contextlib import nullcontext
 from pathlib import Path
 import torch
 import torch.backends.cudnn as cudnn
@@ -39,7 +43,22 @@ from yolov8.ultralytics.yolo.utils.torch_utils import select_device
 from yolov8.ultralytics.yolo.utils.ops import Profile, non_max_suppression, scale_boxes, process_mask, process_mask_native
 from yolov8.ultralytics.yolo.utils.plotting import Annotator, colors, save_one_box
 
-from trackers.multi_tracker_zoo import create_tracker
+from trackers.multi_tracker_zoo import create_tracker, create_reid_model, REID_TRACKERS
+from result_writers import WRITERS
+from video_loader import LoadVideo
+from adaptive_stride import AdaptiveStride
+from patch_tracker import PatchTracker
+from pipeline import Prefetcher, Worker
+
+
+def mot_bbox(xyxy, img_height, img_width):
+    # shape - (height, width) - modified to fit 100 x 100 scale of label studio
+    # drop bbox autoscaling
+    bbox_top = (xyxy[1] / img_height) * 100
+    bbox_left = (xyxy[0] / img_width) * 100
+    bbox_w = ((xyxy[2] - xyxy[0]) / img_width) * 100
+    bbox_h = ((xyxy[3] - xyxy[1]) / img_height) * 100
+    return bbox_left, bbox_top, bbox_w, bbox_h
 
 
 @torch.no_grad()
@@ -57,6 +76,7 @@ def run(
         show_vid=False,  # show results
         save_txt=False,  # save results to *.txt
         save_txt_path=None,  # save results to *.txt
+        save_format='txt',  # format of the saved results, txt (MOT text) or npy (NumPy structured array)
         save_conf=False,  # save confidences in --save-txt labels
         save_crop=False,  # save cropped prediction boxes
         save_trajectories=False,  # save trajectories for each track
@@ -79,6 +99,25 @@ def run(
         vid_stride=1,  # video frame-rate stride
         target_fps=None,  # output video fps
         retina_masks=False,
+        adaptive_stride=False,  # skip the detector on low-motion frames, their boxes are interpolated between detected frames
+        detect_every=1,  # run the detector every K frames, the detections are propagated by template matching in between
+        patch_min_score=0.5,  # template matching score below which a propagated frame falls back to a full detection
+        detect_batch=1,  # number of frames of a video file decoded ahead and detected in one forward pass (PyTorch weights)
+        reid_from_frame=None,  # crop the ReID inputs from the frame tensor on the device, by default off CPU only
+        reid_on_demand=False,  # run the ReID model only on the detections IoU does not associate unambiguously
+        prefetch=0,  # frames decoded ahead by a background thread, the results are then written by another one, 0 runs serially
+        stream_video=False,  # decode video URLs while they are received instead of downloading them first
+        start_frame=None,  # first frame (1-based) of the window to track, the results keep the frame numbers of the video
+        end_frame=None,  # last frame (inclusive) of the window to track
+        start_time=None,  # start of the window to track in seconds, instead of start_frame
+        end_time=None,  # end of the window to track in seconds, instead of end_frame
+        model=None,  # preloaded AutoBackend, skips loading yolo_weights
+        reid_model=None,  # preloaded ReID model shared by the trackers
+        sink=None,  # result sink receiving (frame_idx, id, bbox, cls) records as they are emitted
+        progress=None,  # callback receiving (frame, frames) after every processed frame
+        timings=None,  # callback receiving (stage, seconds) per frame and stage, and the number of tracks for 'tracker'
+        tracer=None,  # tracer recording a span per frame and stage, with complete(name, start, duration, **args)
+        occupancy=None,  # callback receiving (stage, busy fraction) for the decode, track and write stages when prefetching
 ):
 
     source = str(source)
@@ -86,7 +125,9 @@ def run(
     is_file = Path(source).suffix[1:] in (VID_FORMATS)
     is_url = source.lower().startswith(('rtsp://', 'rtmp://', 'http://', 'https://'))
     webcam = source.isnumeric() or source.endswith('.txt') or (is_url and not is_file)
-    if is_url and is_file:
+    window = dict(start_frame=start_frame, end_frame=end_frame, start_time=start_time, end_time=end_time)
+    windowed = any(value is not None for value in window.values())
+    if is_url and is_file and not stream_video:
         source = check_file(source)  # download
 
     # Directories
@@ -103,7 +144,9 @@ def run(
     # Load model
     device = select_device(device)
     is_seg = '-seg' in str(yolo_weights)
-    model = AutoBackend(yolo_weights, device=device, dnn=dnn, fp16=half)
+    warmup = model is None
+    if model is None:
+        model = AutoBackend(yolo_weights, device=device, dnn=dnn, fp16=half)
     stride, names, pt = model.stride, model.names, model.pt
     imgsz = check_imgsz(imgsz, stride=stride)  # check image size
 
@@ -120,6 +163,17 @@ def run(
             vid_stride=vid_stride
         )
         bs = len(dataset)
+    elif (is_url or windowed) and is_file:
+        dataset = LoadVideo(
+            source,
+            imgsz=imgsz,
+            stride=stride,
+            auto=pt,
+            transforms=getattr(model.model, 'transforms', None),
+            vid_stride=vid_stride,
+            target_fps=target_fps,
+            **window
+        )
     else:
         dataset = LoadImages(
             source,
@@ -131,196 +185,466 @@ def run(
             target_fps=target_fps
         )
     vid_path, vid_writer, txt_path = [None] * bs, [None] * bs, [None] * bs
-    model.warmup(imgsz=(1 if pt or model.triton else bs, 3, *imgsz))  # warmup
+    result_writers = {}  # one result writer per results path, kept open for the whole stream
+    frame_offset = getattr(dataset, 'offset', 0) // getattr(dataset, 'vid_stride', vid_stride)  # frame number of the video before the window
+    # ReID crops taken from the frame tensor avoid the host copies and uploads, roi_align is slower than cv2 on CPU
+    if reid_from_frame is None:
+        reid_from_frame = device.type != 'cpu'
+    reid_from_frame = reid_from_frame and tracking_method in REID_TRACKERS
+
+    # decides which frames of a single video go through the detector
+    stride_gate = AdaptiveStride() if adaptive_stride and bs == 1 else None
+    # propagates the detections of the keyframes of a single video to the frames in between
+    patch_tracker = PatchTracker(min_score=patch_min_score) if detect_every > 1 and bs == 1 else None
+    last_keyframe = None
+    if detect_batch > 1 and not (is_file and bs == 1 and stride_gate is None and patch_tracker is None):
+        LOGGER.warning('detect_batch only applies to video files without adaptive_stride or detect_every, ignoring it')
+        detect_batch = 1
+    if detect_batch > 1 and not (pt and not model.triton):
+        # exported backends (ONNX, TensorRT, ...) are built for a fixed batch size of 1
+        LOGGER.info('detect_batch only applies to PyTorch weights, detecting one frame at a time')
+        detect_batch = 1
+    if warmup:
+        model.warmup(imgsz=(1 if pt or model.triton else bs, 3, *imgsz))  # warmup
 
     # Create as many strong sort instances as there are video sources
     tracker_list = []
     for i in range(bs):
-        tracker = create_tracker(tracking_method, tracking_config, reid_weights, device, half)
+        tracker = create_tracker(tracking_method, tracking_config, reid_weights, device, half, reid_model=reid_model,
+                                 reid_on_demand=reid_on_demand)
         tracker_list.append(tracker, )
-        if hasattr(tracker_list[i], 'model'):
+        if reid_model is None and hasattr(tracker_list[i], 'model'):
             if hasattr(tracker_list[i].model, 'warmup'):
                 tracker_list[i].model.warmup()
     outputs = [None] * bs
+    # with reid_on_demand, the gates count the embeddings computed by the ReID model
+    reid_gates = [tracker.reid_gate for tracker in tracker_list if getattr(tracker, 'reid_gate', None) is not None]
+    reid_computed = 0  # embeddings computed by the gates before the current frame
+
+    def write_results(records):
+        for frame, id, bbox, c, i, txt_path in records:
+            if sink is not None:
+                # stream the record straight to the sink, skipping the MOT file
+                sink.write(frame, id, bbox, c)
+            else:
+                # buffered MOT writer, the file is opened once per results path
+                if txt_path not in result_writers:
+                    result_writers[txt_path] = WRITERS[save_format](txt_path, names)
+                result_writers[txt_path].write(frame, id, bbox, c, source=i)
+
+    # with prefetch, frames are decoded by the decode stage and written by the write stage, in their own threads
+    write_stage = None
+
+    def write_out(func, *args):
+        if write_stage is not None:
+            write_stage.submit(func, *args)
+        else:
+            func(*args)
+
+    def stop_stages(completed):
+        # the pending writes are waited for, their error is only raised if the loop over the frames did not fail first
+        prefetcher.close()
+        write_stage.close(raise_error=completed)
+        wall = prefetcher.stats.wall
+        busy = {
+            'decode': prefetcher.stats.occupancy,
+            'track': (wall - prefetcher.stats.starved - write_stage.stats.starved) / wall if wall else 0.0,
+            'write': write_stage.stats.busy / wall if wall else 0.0,
+        }
+        LOGGER.info('Stage occupancy: ' + ', '.join(f'{stage} {fraction:.0%}' for stage, fraction in busy.items()))
+        if occupancy is not None:
+            for stage, fraction in busy.items():
+                occupancy(stage, fraction)
 
     # Run tracking
     #model.warmup(imgsz=(1 if pt else bs, 3, *imgsz))  # warmup
     seen, windows, dt = 0, [], (Profile(), Profile(), Profile(), Profile())
     curr_frames, prev_frames = [None] * bs, [None] * bs
-    for frame_idx, batch in enumerate(dataset):
-        path, im, im0s, vid_cap, s = batch
-        visualize = increment_path(save_dir / Path(path[0]).stem, mkdir=True) if visualize else False
-        with dt[0]:
-            im = torch.from_numpy(im).to(device)
-            im = im.half() if half else im.float()  # uint8 to fp16/32
-            im /= 255.0  # 0 - 255 to 0.0 - 1.0
-            if len(im.shape) == 3:
-                im = im[None]  # expand for batch dim
-
-        # Inference
-        with dt[1]:
-            preds = model(im, augment=augment, visualize=visualize)
-
-        # Apply NMS
-        with dt[2]:
-            if is_seg:
+
+    def detect_ahead(frames):
+        """
+        Decodes detect_batch frames ahead and detects them with one forward pass and one NMS, then yields the frames
+        in order with their detections, so the trackers are still updated one frame after the other. The time of the
+        stages of a batch is shared equally by its frames.
+        """
+        while True:
+            decode_start, decode_wall_start = time.perf_counter(), time.time()
+            chunk = list(itertools.islice(frames, detect_batch))
+            if not chunk:
+                return
+            n, decode_time = len(chunk), time.perf_counter() - decode_start
+            with dt[0]:
+                im = torch.from_numpy(np.stack([batch[1] for _, batch in chunk])).to(device)
+                im = im.half() if half else im.float()  # uint8 to fp16/32
+                im /= 255.0  # 0 - 255 to 0.0 - 1.0
+            with dt[1]:
+                preds = model(im, augment=augment)
+            with dt[2]:
+                if is_seg:
+                    p = non_max_suppression(preds[0], conf_thres, iou_thres, classes, agnostic_nms, max_det=max_det, nm=32)
+                    proto = preds[1][-1]
+                else:
+                    p, proto = non_max_suppression(preds, conf_thres, iou_thres, classes, agnostic_nms, max_det=max_det), None
+            if tracer is not None:
+                tracer.complete('decode', decode_wall_start, decode_time, frames=n)
+                for stage, profile in zip(('preprocess', 'inference', 'nms'), dt):
+                    tracer.complete(stage, profile.start, profile.dt, frames=n)
+            stages = (('decode', decode_time / n), ('preprocess', dt[0].dt / n), ('inference', dt[1].dt / n),
+                      ('nms', dt[2].dt / n))
+            for j, (frame_idx, batch) in enumerate(chunk):
+                yield frame_idx, batch, (im[j:j + 1], p[j:j + 1], None if proto is None else proto[j:j + 1], stages)
+
+    frames = prefetcher = Prefetcher(enumerate(dataset), depth=prefetch) if prefetch > 0 else enumerate(dataset)
+    frames = detect_ahead(frames) if detect_batch > 1 else ((frame_idx, batch, None) for frame_idx, batch in frames)
+    if prefetch > 0:
+        write_stage = Worker(depth=2 * prefetch)
+    frame_records = []  # (frame, id, bbox, cls, source, txt_path) results of the current frame
+    decode_start, frame_start = time.perf_counter(), time.time()
+    # the loop owns the stages, they are stopped as soon as it is over or left by an exception
+    completed = False
+    try:
+        for frame_idx, batch, detected in frames:
+            decode_time = time.perf_counter() - decode_start  # reading, decoding and letterboxing the frame
+            path, im, im0s, vid_cap, s = batch
+            if stride_gate is not None and not stride_gate.detect(frame_offset + frame_idx + 1, im0s):
+                # low-motion frame, its boxes are written once the next detected frame has been tracked
+                if timings is not None:
+                    timings('decode', decode_time)
+                if progress is not None:
+                    progress(frame_idx + 1, getattr(dataset, 'frames', 0))
+                if tracer is not None:
+                    tracer.complete('frame', frame_start, time.time() - frame_start, frame=frame_offset + frame_idx + 1,
+                                    skipped=True)
+                decode_start, frame_start = time.perf_counter(), time.time()
+                continue
+            visualize = increment_path(save_dir / Path(path[0]).stem, mkdir=True) if visualize else False
+
+            # Propagate the detections of the last keyframe, or fall back to a full detection if they are lost
+            keyframe = patch_tracker is None or last_keyframe is None or frame_idx - last_keyframe >= detect_every
+            if not keyframe:
+                propagate_start, propagate_wall_start = time.perf_counter(), time.time()
+                propagated = patch_tracker.propagate(im0s)
+                propagate_time = time.perf_counter() - propagate_start
+                keyframe = propagated is None
+
+            if detected is not None:
+                # detected ahead with the following frames of its batch
+                im, p, proto, stages = detected
                 masks = []
-                p = non_max_suppression(preds[0], conf_thres, iou_thres, classes, agnostic_nms, max_det=max_det, nm=32)
-                proto = preds[1][-1]
-            else:
-                p = non_max_suppression(preds, conf_thres, iou_thres, classes, agnostic_nms, max_det=max_det)
-            
-        # Process detections
-        for i, det in enumerate(p):  # detections per image
-            seen += 1
-            if webcam:  # bs >= 1
-                p, im0, _ = path[i], im0s[i].copy(), dataset.count
-                p = Path(p)  # to Path
-                s += f'{i}: '
-                txt_file_name = p.name
-                save_path = str(save_dir / p.name)  # im.jpg, vid.mp4, ...
+            elif keyframe:
+                last_keyframe = frame_idx
+                with dt[0]:
+                    im = torch.from_numpy(im).to(device)
+                    im = im.half() if half else im.float()  # uint8 to fp16/32
+                    im /= 255.0  # 0 - 255 to 0.0 - 1.0
+                    if len(im.shape) == 3:
+                        im = im[None]  # expand for batch dim
+
+                # Inference
+                with dt[1]:
+                    preds = model(im, augment=augment, visualize=visualize)
+
+                # Apply NMS
+                with dt[2]:
+                    if is_seg:
+                        masks = []
+                        p = non_max_suppression(preds[0], conf_thres, iou_thres, classes, agnostic_nms, max_det=max_det, nm=32)
+                        proto = preds[1][-1]
+                    else:
+                        p = non_max_suppression(preds, conf_thres, iou_thres, classes, agnostic_nms, max_det=max_det)
+                stages = (('decode', decode_time), ('preprocess', dt[0].dt), ('inference', dt[1].dt), ('nms', dt[2].dt))
             else:
-                p, im0, _ = path, im0s.copy(), getattr(dataset, 'frame', 0)
-                p = Path(p)  # to Path
-                # video file
-                if source.endswith(VID_FORMATS):
-                    txt_file_name = p.stem
+                p = [torch.from_numpy(propagated)]  # already in im0 coordinates
+                stages = (('decode', decode_time), ('propagate', propagate_time))
+
+            if timings is not None:
+                for stage, seconds in stages:
+                    timings(stage, seconds)
+            detections, tracks = sum(len(d) for d in p if d is not None), 0
+
+            # Process detections
+            for i, det in enumerate(p):  # detections per image
+                seen += 1
+                if webcam:  # bs >= 1
+                    p, im0, _ = path[i], im0s[i].copy(), dataset.count
+                    p = Path(p)  # to Path
+                    s += f'{i}: '
+                    txt_file_name = p.name
                     save_path = str(save_dir / p.name)  # im.jpg, vid.mp4, ...
-                # folder with imgs
                 else:
-                    txt_file_name = p.parent.name  # get folder name containing current img
-                    save_path = str(save_dir / p.parent.name)  # im.jpg, vid.mp4, ...
-            curr_frames[i] = im0
+                    p, im0, _ = path, im0s.copy(), getattr(dataset, 'frame', 0)
+                    p = Path(p)  # to Path
+                    # video file
+                    if source.endswith(VID_FORMATS):
+                        txt_file_name = p.stem
+                        save_path = str(save_dir / p.name)  # im.jpg, vid.mp4, ...
+                    # folder with imgs
+                    else:
+                        txt_file_name = p.parent.name  # get folder name containing current img
+                        save_path = str(save_dir / p.parent.name)  # im.jpg, vid.mp4, ...
+                curr_frames[i] = im0
 
-            txt_path =  str(save_txt_path) if save_txt_path else str(save_dir / 'tracks' / txt_file_name)
-            s += '%gx%g ' % im.shape[2:]  # print string
-            imc = im0.copy() if save_crop else im0  # for save_crop
+                txt_path =  str(save_txt_path) if save_txt_path else str(save_dir / 'tracks' / txt_file_name)
+                s += '%gx%g ' % im.shape[-2:]  # print string
+                imc = im0.copy() if save_crop else im0  # for save_crop
 
-            annotator = Annotator(im0, line_width=line_thickness, example=str(names))
+                annotator = Annotator(im0, line_width=line_thickness, example=str(names))
             
-            if hasattr(tracker_list[i], 'tracker') and hasattr(tracker_list[i].tracker, 'camera_update'):
-                if prev_frames[i] is not None and curr_frames[i] is not None:  # camera motion compensation
-                    tracker_list[i].tracker.camera_update(prev_frames[i], curr_frames[i])
-
-            if det is not None and len(det):
-                if is_seg:
-                    shape = im0.shape
-                    img_height, img_width = shape[:2]
-                    # scale bbox first the crop masks
-                    if retina_masks:
-                        det[:, :4] = scale_boxes(im.shape[2:], det[:, :4], shape).round()  # rescale boxes to im0 size
-                        masks.append(process_mask_native(proto[i], det[:, 6:], det[:, :4], im0.shape[:2]))  # HWC
+                if hasattr(tracker_list[i], 'tracker') and hasattr(tracker_list[i].tracker, 'camera_update'):
+                    if prev_frames[i] is not None and curr_frames[i] is not None:  # camera motion compensation
+                        tracker_list[i].tracker.camera_update(prev_frames[i], curr_frames[i])
+
+                if det is not None and len(det):
+                    if not keyframe:
+                        pass  # the propagated boxes are in im0 coordinates already
+                    elif is_seg:
+                        shape = im0.shape
+                        img_height, img_width = shape[:2]
+                        # scale bbox first the crop masks
+                        if retina_masks:
+                            det[:, :4] = scale_boxes(im.shape[2:], det[:, :4], shape).round()  # rescale boxes to im0 size
+                            masks.append(process_mask_native(proto[i], det[:, 6:], det[:, :4], im0.shape[:2]))  # HWC
+                        else:
+                            masks.append(process_mask(proto[i], det[:, 6:], det[:, :4], im.shape[2:], upsample=True))  # HWC
+                            det[:, :4] = scale_boxes(im.shape[2:], det[:, :4], shape).round()  # rescale boxes to im0 size
                     else:
-                        masks.append(process_mask(proto[i], det[:, 6:], det[:, :4], im.shape[2:], upsample=True))  # HWC
-                        det[:, :4] = scale_boxes(im.shape[2:], det[:, :4], shape).round()  # rescale boxes to im0 size
-                else:
-                    det[:, :4] = scale_boxes(im.shape[2:], det[:, :4], im0.shape).round()  # rescale boxes to im0 size
-
-                # Print results
-                for c in det[:, 5].unique():
-                    n = (det[:, 5] == c).sum()  # detections per class
-                    s += f"{n} {names[int(c)]}{'s' * (n > 1)}, "  # add to string
-
-                # pass detections to strongsort
-                with dt[3]:
-                    outputs[i] = tracker_list[i].update(det.cpu(), im0)
+                        det[:, :4] = scale_boxes(im.shape[2:], det[:, :4], im0.shape).round()  # rescale boxes to im0 size
+                    if patch_tracker is not None and keyframe:
+                        patch_tracker.reset(im0, det[:, :6].cpu().numpy())
+
+                    # Print results
+                    for c in det[:, 5].unique():
+                        n = (det[:, 5] == c).sum()  # detections per class
+                        s += f"{n} {names[int(c)]}{'s' * (n > 1)}, "  # add to string
+
+                    # pass detections to strongsort
+                    with dt[3]:
+                        if reid_from_frame and keyframe:
+                            outputs[i] = tracker_list[i].update(det.cpu(), im0, frame=im[i:i + 1])
+                        else:
+                            outputs[i] = tracker_list[i].update(det.cpu(), im0)
+                    tracks += len(outputs[i])
+                    if timings is not None:
+                        timings('tracker', dt[3].dt, len(outputs[i]))
+                    if tracer is not None:
+                        tracer.complete(tracking_method, dt[3].start, dt[3].dt, tracks=len(outputs[i]))
+                    if stride_gate is not None:
+                        # fill in the frames skipped since the previous detected frame, before the records of this one
+                        for frame, id, xyxy, c in stride_gate.update(frame_offset + frame_idx + 1, outputs[i]):
+                            if save_txt or sink is not None:
+                                frame_records.append((frame, id, mot_bbox(xyxy, *im0.shape[:2]), int(c), i, txt_path))
                 
-                # draw boxes for visualization
-                if len(outputs[i]) > 0:
+                    # draw boxes for visualization
+                    if len(outputs[i]) > 0:
                     
-                    if is_seg:
-                        # Mask plotting
-                        annotator.masks(
-                            masks[i],
-                            colors=[colors(x, True) for x in det[:, 5]],
-                            im_gpu=torch.as_tensor(im0, dtype=torch.float16).to(device).permute(2, 0, 1).flip(0).contiguous() /
-                            255 if retina_masks else im[i]
-                        )
+                        if is_seg and keyframe:
+                            # Mask plotting
+                            annotator.masks(
+                                masks[i],
+                                colors=[colors(x, True) for x in det[:, 5]],
+                                im_gpu=torch.as_tensor(im0, dtype=torch.float16).to(device).permute(2, 0, 1).flip(0).contiguous() /
+                                255 if retina_masks else im[i]
+                            )
                     
-                    for j, (output) in enumerate(outputs[i]):
+                        for j, (output) in enumerate(outputs[i]):
                         
-                        bbox = output[0:4]
-                        id = output[4]
-                        cls = output[5]
-                        conf = output[6]
-
-                        if save_txt:
-                            # to MOT format
-                            c = int(cls)
-                            # shape - (height, width) - modified to fit 100 x 100 scale of label studio
-                            # drop bbox autoscaling
-                            bbox_top = (output[1] / img_height) * 100
-                            bbox_left = (output[0] / img_width) * 100
-                            bbox_w = ((output[2] - output[0]) / img_width) * 100
-                            bbox_h = ((output[3] - output[1]) / img_height) * 100
-                            label  = f'{names[c]}' 
-                            # Write MOT compliant results to file
-                            # Modified to also have the label of the results
-                            with open(txt_path + '.txt', 'a') as f:
-                                f.write(('%g,' * 10 + '%s,%s' + '\n') % (frame_idx + 1, id, bbox_left,  # MOT format
-                                                               bbox_top, bbox_w, bbox_h, -1, -1, -1, i, label, c))
-
-                        if save_vid or save_crop or show_vid:  # Add bbox/seg to image
-                            c = int(cls)  # integer class
-                            id = int(id)  # integer id
-                            label = None if hide_labels else (f'{id} {names[c]}' if hide_conf else \
-                                (f'{id} {conf:.2f}' if hide_class else f'{id} {names[c]} {conf:.2f}'))
-                            color = colors(c, True)
-                            annotator.box_label(bbox, label, color=color)
+                            bbox = output[0:4]
+                            id = output[4]
+                            cls = output[5]
+                            conf = output[6]
+
+                            if save_txt or sink is not None:
+                                # to MOT format
+                                c = int(cls)
+                                frame_records.append((frame_offset + frame_idx + 1, id, mot_bbox(output, *im0.shape[:2]), c, i, txt_path))
+
+                            if save_vid or save_crop or show_vid:  # Add bbox/seg to image
+                                c = int(cls)  # integer class
+                                id = int(id)  # integer id
+                                label = None if hide_labels else (f'{id} {names[c]}' if hide_conf else \
+                                    (f'{id} {conf:.2f}' if hide_class else f'{id} {names[c]} {conf:.2f}'))
+                                color = colors(c, True)
+                                annotator.box_label(bbox, label, color=color)
                             
-                            if save_trajectories and tracking_method == 'strongsort':
-                                q = output[7]
-                                tracker_list[i].trajectory(im0, q, color=color)
-                            if save_crop:
-                                txt_file_name = txt_file_name if (isinstance(path, list) and len(path) > 1) else ''
-                                save_one_box(np.array(bbox, dtype=np.int16), imc, file=save_dir / 'crops' / txt_file_name / names[c] / f'{id}' / f'{p.stem}.jpg', BGR=True)
+                                if save_trajectories and tracking_method == 'strongsort':
+                                    q = output[7]
+                                    tracker_list[i].trajectory(im0, q, color=color)
+                                if save_crop:
+                                    txt_file_name = txt_file_name if (isinstance(path, list) and len(path) > 1) else ''
+                                    save_one_box(np.array(bbox, dtype=np.int16), imc, file=save_dir / 'crops' / txt_file_name / names[c] / f'{id}' / f'{p.stem}.jpg', BGR=True)
                             
-            else:
-                pass
-                #tracker_list[i].tracker.pred_n_update_all_tracks()
+                else:
+                    pass
+                    #tracker_list[i].tracker.pred_n_update_all_tracks()
+                    if patch_tracker is not None and keyframe:
+                        patch_tracker.reset(im0, np.empty((0, 6)))
+                    if stride_gate is not None:
+                        stride_gate.update(frame_offset + frame_idx + 1, [])  # the tracks are lost, nothing to interpolate
                 
-            # Stream results
-            im0 = annotator.result()
-            if show_vid:
-                if platform.system() == 'Linux' and p not in windows:
-                    windows.append(p)
-                    cv2.namedWindow(str(p), cv2.WINDOW_NORMAL | cv2.WINDOW_KEEPRATIO)  # allow window resize (Lin`ux)
-                    cv2.resizeWindow(str(p), im0.shape[1], im0.shape[0])
-                cv2.imshow(str(p), im0)
-                if cv2.waitKey(1) == ord('q'):  # 1 millisecond
-                    exit()
-
-            # Save results (image with detections)
-            if save_vid:
-                if vid_path[i] != save_path:  # new video
-                    vid_path[i] = save_path
-                    if isinstance(vid_writer[i], cv2.VideoWriter):
-                        vid_writer[i].release()  # release previous video writer
-                    if vid_cap:  # video
-                        fps = vid_cap.get(cv2.CAP_PROP_FPS)
-                        w = int(vid_cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-                        h = int(vid_cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-                    else:  # stream
-                        fps, w, h = 30, im0.shape[1], im0.shape[0]
-                    save_path = str(Path(save_path).with_suffix('.mp4'))  # force *.mp4 suffix on results videos
-                    vid_writer[i] = cv2.VideoWriter(save_path, cv2.VideoWriter_fourcc(*'mp4v'), fps, (w, h))
-                vid_writer[i].write(im0)
-
-            prev_frames[i] = curr_frames[i]
+                # Stream results
+                im0 = annotator.result()
+                if show_vid:
+                    if platform.system() == 'Linux' and p not in windows:
+                        windows.append(p)
+                        cv2.namedWindow(str(p), cv2.WINDOW_NORMAL | cv2.WINDOW_KEEPRATIO)  # allow window resize (Lin`ux)
+                        cv2.resizeWindow(str(p), im0.shape[1], im0.shape[0])
+                    cv2.imshow(str(p), im0)
+                    if cv2.waitKey(1) == ord('q'):  # 1 millisecond
+                        exit()
+
+                # Save results (image with detections)
+                if save_vid:
+                    if vid_path[i] != save_path:  # new video
+                        vid_path[i] = save_path
+                        if isinstance(vid_writer[i], cv2.VideoWriter):
+                            write_out(vid_writer[i].release)  # release previous video writer
+                        if vid_cap:  # video
+                            fps = vid_cap.get(cv2.CAP_PROP_FPS)
+                            w = int(vid_cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+                            h = int(vid_cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+                        else:  # stream
+                            fps, w, h = 30, im0.shape[1], im0.shape[0]
+                        save_path = str(Path(save_path).with_suffix('.mp4'))  # force *.mp4 suffix on results videos
+                        vid_writer[i] = cv2.VideoWriter(save_path, cv2.VideoWriter_fourcc(*'mp4v'), fps, (w, h))
+                    write_out(vid_writer[i].write, im0)
+
+                prev_frames[i] = curr_frames[i]
             
-        # Print total time (preprocessing + inference + NMS + tracking)
-        LOGGER.info(f"{s}{'' if len(det) else '(no detections), '}{sum([dt.dt for dt in dt if hasattr(dt, 'dt')]) * 1E3:.1f}ms")
+            if frame_records:
+                write_out(write_results, frame_records)
+                frame_records = []
+
+            # Print total time (preprocessing + inference + NMS + tracking)
+            LOGGER.info(f"{s}{'' if len(det) else '(no detections), '}{sum([dt.dt for dt in dt if hasattr(dt, 'dt')]) * 1E3:.1f}ms")
+            if progress is not None:
+                # frames processed so far, with prefetch the dataset has decoded further
+                progress(frame_idx + 1, getattr(dataset, 'frames', 0))
+            if tracer is not None:
+                if reid_gates:
+                    reid_crops = sum(gate.computed for gate in reid_gates) - reid_computed
+                    reid_computed += reid_crops
+                else:
+                    reid_crops = detections if tracking_method in REID_TRACKERS else 0
+                tracer.complete('frame', frame_start, time.time() - frame_start, frame=frame_offset + frame_idx + 1,
+                                detections=detections, tracks=tracks, reid_crops=reid_crops)
+                if detected is not None:
+                    pass  # the stages of the batch were recorded once by detect_ahead
+                elif keyframe:
+                    tracer.complete('decode', frame_start, decode_time)
+                    for stage, profile in zip(('preprocess', 'inference', 'nms'), dt):
+                        tracer.complete(stage, profile.start, profile.dt)
+                else:
+                    tracer.complete('decode', frame_start, decode_time)
+                    tracer.complete('propagate', propagate_wall_start, propagate_time)
+            decode_start, frame_start = time.perf_counter(), time.time()
+        completed = True
+    finally:
+        if prefetch > 0:
+            stop_stages(completed)
+
+    if stride_gate is not None and stride_gate.skipped and (save_txt or sink is not None):
+        # the video ended during a run of skipped frames, the last boxes are carried over them (the write stage is
+        # closed by now, the records are written in this thread after all the others)
+        write_results([(frame, id, mot_bbox(xyxy, *im0.shape[:2]), int(c), 0, txt_path)
+                       for frame, id, xyxy, c in stride_gate.flush()])
+
+    # flush the buffered results at the end of the stream
+    for result_writer in result_writers.values():
+        result_writer.close()
 
     # Print results
     t = tuple(x.t / seen * 1E3 for x in dt)  # speeds per image
     LOGGER.info(f'Speed: %.1fms pre-process, %.1fms inference, %.1fms NMS, %.1fms {tracking_method} update per image at shape {(1, 3, *imgsz)}' % t)
+    if reid_gates:
+        computed, reused = sum(gate.computed for gate in reid_gates), sum(gate.reused for gate in reid_gates)
+        LOGGER.info(f'ReID: {computed} embeddings computed, {reused} reused ({reused / max(computed + reused, 1):.1%} saved)')
     if save_txt or save_vid:
-        s = f"\n{len(list((save_dir / 'tracks').glob('*.txt')))} tracks saved to {save_dir / 'tracks'}" if save_txt else ''
+        s = f"\n{len(list((save_dir / 'tracks').glob('*.' + save_format)))} tracks saved to {save_dir / 'tracks'}" if save_txt else ''
         LOGGER.info(f"Results saved to {colorstr('bold', save_dir)}{s}")
     if update:
         strip_optimizer(yolo_weights)  # update model (to fix SourceChangeWarning)
 
 
+class TrackingEngine:
+    """
+    Resident tracking engine that loads the YOLO and ReID weights once and reuses them for every video.
+
+    Running `python3 track.py` per video pays for the interpreter start, the torch import, the weight loading and
+    the model warmup before the first frame is processed. The engine keeps the models in memory so that
+    track() only pays for the tracking itself. Tracker state is still created fresh for every video.
+
+    Calls to track() from several threads run one after the other: the trackers number their tracks with
+    class-level counters that are reset for every video, so two videos cannot be tracked at the same time
+    in one process.
+    """
+
+    def __init__(
+            self,
+            yolo_weights=WEIGHTS / 'yolov8s-seg.pt',
+            reid_weights=WEIGHTS / 'osnet_x0_25_msmt17.pt',
+            tracking_method='deepocsort',
+            tracking_config=None,
+            imgsz=(640, 640),
+            device='',
+            half=False,
+            dnn=False,
+            **kwargs  # forwarded to run(), e.g. conf_thres, iou_thres, classes
+    ):
+        self.yolo_weights = Path(yolo_weights)
+        self.reid_weights = Path(reid_weights)
+        self.tracking_method = tracking_method
+        self.tracking_config = tracking_config or \
+            ROOT / 'trackers' / tracking_method / 'configs' / (tracking_method + '.yaml')
+        self.device = select_device(device)
+        self.half = half
+        self.kwargs = dict(conf_thres=0.5, iou_thres=0.5)
+        self.kwargs.update(kwargs)
+
+        self.model = AutoBackend(self.yolo_weights, device=self.device, dnn=dnn, fp16=half)
+        self.imgsz = check_imgsz(imgsz, stride=self.model.stride)
+        self.model.warmup(imgsz=(1, 3, *self.imgsz))
+        self.reid_model = create_reid_model(tracking_method, self.reid_weights, self.device, half)
+        if self.reid_model is not None:
+            self.reid_model.warmup()
+        self.lock = threading.Lock()
+
+    @property
+    def names(self):
+        return self.model.names
+
+    def track(self, source, sink, slots=None, **kwargs):
+        """
+        Tracks the objects in the given source with the resident models.
+
+        :param source: path of the video (or any other source supported by run())
+        :param sink: result sink, its write(frame_idx, id, bbox, cls) is called for every track record
+        :param slots: optional semaphore bounding the videos tracked at the same time across processes, acquired once
+          the engine is free so that the threads waiting for the engine do not hold a slot
+        :param kwargs: additional run() arguments overriding the engine defaults
+        :return: the given sink
+        """
+        params = dict(self.kwargs)
+        params.update(kwargs)
+        with self.lock, slots if slots is not None else nullcontext():
+            run(
+                source=source,
+                yolo_weights=self.yolo_weights,
+                reid_weights=self.reid_weights,
+                tracking_method=self.tracking_method,
+                tracking_config=self.tracking_config,
+                imgsz=self.imgsz,
+                device=self.device,
+                half=self.half,
+                nosave=True,
+                exist_ok=True,
+                model=self.model,
+                reid_model=self.reid_model,
+                sink=sink,
+                **params
+            )
+        return sink
+
+
 def parse_opt():
     parser = argparse.ArgumentParser()
     parser.add_argument('--yolo-weights', nargs='+', type=Path, default=WEIGHTS / 'yolov8s-seg.pt', help='model.pt path(s)')
@@ -336,6 +660,7 @@ def parse_opt():
     parser.add_argument('--show-vid', action='store_true', help='display tracking video results')
     parser.add_argument('--save-txt', action='store_true', help='save results to *.txt')
     parser.add_argument('--save-txt-path', type=Path, default=None, help='path to save *.txt labels')
+    parser.add_argument('--save-format', type=str, default='txt', choices=('txt', 'npy'), help='format of the saved labels')
     parser.add_argument('--save-conf', action='store_true', help='save confidences in --save-txt labels')
     parser.add_argument('--save-crop', action='store_true', help='save cropped prediction boxes')
     parser.add_argument('--save-trajectories', action='store_true', help='save trajectories for each track')
@@ -359,6 +684,18 @@ def parse_opt():
     parser.add_argument('--vid-stride', type=int, default=1, help='video frame-rate stride')
     parser.add_argument('--target-fps',  type=int, default=None, help='specify target FPS for video')
     parser.add_argument('--retina-masks', action='store_true', help='whether to plot masks in native resolution')
+    parser.add_argument('--detect-every', type=int, default=1, help='run the detector every K frames and propagate the boxes in between')
+    parser.add_argument('--patch-min-score', type=float, default=0.5, help='propagation score below which the detector runs')
+    parser.add_argument('--detect-batch', type=int, default=1, help='number of video frames detected in one forward pass')
+    parser.add_argument('--reid-from-frame', action='store_true', default=None, help='crop the ReID inputs from the frame tensor on the device')
+    parser.add_argument('--reid-on-demand', action='store_true', help='run ReID only on the detections IoU does not associate unambiguously')
+    parser.add_argument('--prefetch', type=int, default=0, help='frames decoded ahead in a background thread, 0 decodes serially')
+    parser.add_argument('--adaptive-stride', action='store_true', help='skip the detector on low-motion frames and interpolate their boxes')
+    parser.add_argument('--stream-video', action='store_true', help='decode video URLs while they are received instead of downloading them first')
+    parser.add_argument('--start-frame', type=int, default=None, help='first frame of the window to track')
+    parser.add_argument('--end-frame', type=int, default=None, help='last frame of the window to track')
+    parser.add_argument('--start-time', type=float, default=None, help='start of the window to track in seconds')
+    parser.add_argument('--end-time', type=float, default=None, help='end of the window to track in seconds')
     opt = parser.parse_args()
     opt.imgsz *= 2 if len(opt.imgsz) == 1 else 1  # expand
     opt.tracking_config = ROOT / 'trackers' / opt.tracking_method / 'configs' / (opt.tracking_method + '.yaml')
@@ -11,6 +11,7 @@ from trackers.botsort.kalman_filter import KalmanFilter
 # from fast_reid.fast_reid_interfece import FastReIDInterface
 
 from reid_multibackend import ReIDDetectMultiBackend
+from trackers.reid_crops import crop_rois
 from yolov8.ultralytics.yolo.utils.ops import xyxy2xywh, xywh2xyxy
 
 
@@ -241,7 +242,9 @@ class BoTSORT(object):
                 appearance_thresh:float = 0.25,
                 cmc_method:str = 'sparseOptFlow',
                 frame_rate=30,
-                lambda_=0.985
+                lambda_=0.985,
+                reid_model=None,
+                reid_gate=None
                 ):
 
         self.tracked_stracks = []  # type: list[STrack]
@@ -264,11 +267,14 @@ class BoTSORT(object):
         self.appearance_thresh = appearance_thresh
         self.match_thresh = match_thresh
 
-        self.model = ReIDDetectMultiBackend(weights=model_weights, device=device, fp16=fp16)
+        self.model = reid_model if reid_model is not None else \
+            ReIDDetectMultiBackend(weights=model_weights, device=device, fp16=fp16)
 
         self.gmc = GMC(method=cmc_method, verbose=[None,False])
+        # runs the ReID model only on the detections IoU does not associate unambiguously, when set
+        self.reid_gate = reid_gate
 
-    def update(self, output_results, img):
+    def update(self, output_results, img, frame=None):
         self.frame_id += 1
         activated_starcks = []
         refind_stracks = []
@@ -302,7 +308,13 @@ class BoTSORT(object):
         self.height, self.width = img.shape[:2]
 
         '''Extract embeddings '''
-        features_keep = self._get_features(dets, img)
+        if self.reid_gate is not None:
+            tracks = [t for t in joint_stracks(self.tracked_stracks, self.lost_stracks) if t.smooth_feat is not None]
+            features_keep = self.reid_gate.features(
+                lambda indices: self._get_features(dets[indices], img, frame), xyxys[remain_inds],
+                [t.tlbr for t in tracks], [t.track_id for t in tracks], [t.smooth_feat for t in tracks])
+        else:
+            features_keep = self._get_features(dets, img, frame)
 
         if len(dets) > 0:
             '''Detections'''
@@ -481,7 +493,11 @@ class BoTSORT(object):
         y2 = min(int(y + h / 2), self.height - 1)
         return x1, y1, x2, y2
 
-    def _get_features(self, bbox_xywh, ori_img):
+    def _get_features(self, bbox_xywh, ori_img, frame=None):
+        if frame is not None and len(bbox_xywh):
+            # crop on the device from the frame tensor the detector ran on
+            boxes = [self._xywh_to_xyxy(box) for box in bbox_xywh]
+            return self.model(crop_rois(frame, boxes, ori_img.shape[:2], self.model.image_size))
         im_crops = []
         for box in bbox_xywh:
             x1, y1, x2, y2 = self._xywh_to_xyxy(box)
@@ -15,6 +15,8 @@ from .association import *
 from .embedding import EmbeddingComputer
 from .cmc import CMCComputer
 from reid_multibackend import ReIDDetectMultiBackend
+from trackers.reid_crops import crop_rois
+from yolov8.ultralytics.yolo.utils.ops import xyxy2xywh
 
 
 def k_previous_obs(observations, cur_age, k):
@@ -338,6 +340,8 @@ class OCSort(object):
         cmc_off=False,
         aw_off=False,
         new_kf_off=False,
+        reid_model=None,
+        reid_gate=None,
         **kwargs
     ):
         """
@@ -357,14 +361,17 @@ class OCSort(object):
         self.aw_param = aw_param
         KalmanBoxTracker.count = 0
 
-        self.embedder = ReIDDetectMultiBackend(weights=model_weights, device=device, fp16=fp16)
+        self.embedder = reid_model if reid_model is not None else \
+            ReIDDetectMultiBackend(weights=model_weights, device=device, fp16=fp16)
         self.cmc = CMCComputer()
         self.embedding_off = embedding_off
         self.cmc_off = cmc_off
         self.aw_off = aw_off
         self.new_kf_off = new_kf_off
+        # runs the ReID model only on the detections IoU does not associate unambiguously, when set
+        self.reid_gate = reid_gate
 
-    def update(self, dets, img_numpy, tag='blub'):
+    def update(self, dets, img_numpy, tag='blub', frame=None):
         """
         Params:
           dets - a numpy array of detections in the format [[x1,y1,x2,y2,score],[x1,y1,x2,y2,score],...]
@@ -395,7 +402,15 @@ class OCSort(object):
         else:
             # (Ndets x X) [512, 1024, 2048]
             #dets_embs = self.embedder.compute_embedding(img_numpy, dets[:, :4], tag)
-            dets_embs = self._get_features(dets[:, :4], img_numpy)
+            dets_xywh = xyxy2xywh(dets[:, :4])
+            if self.reid_gate is not None:
+                # the boxes of the tracks are their last estimates, they are predicted for this frame below
+                dets_embs = self.reid_gate.features(
+                    lambda indices: self._get_features(dets_xywh[indices], img_numpy, frame), dets[:, :4],
+                    [trk.get_state()[0] for trk in self.trackers], [trk.id for trk in self.trackers],
+                    [trk.get_emb() for trk in self.trackers])
+            else:
+                dets_embs = self._get_features(dets_xywh, img_numpy, frame)
 
         # CMC
         if not self.cmc_off:
@@ -531,7 +546,11 @@ class OCSort(object):
         y2 = min(int(y + h / 2), self.height - 1)
         return x1, y1, x2, y2
     
-    def _get_features(self, bbox_xywh, ori_img):
+    def _get_features(self, bbox_xywh, ori_img, frame=None):
+        if frame is not None and len(bbox_xywh):
+            # crop on the device from the frame tensor the detector ran on
+            boxes = [self._xywh_to_xyxy(box) for box in bbox_xywh]
+            return self.embedder(crop_rois(frame, boxes, ori_img.shape[:2], self.embedder.image_size)).cpu()
         im_crops = []
         for box in bbox_xywh:
             x1, y1, x2, y2 = self._xywh_to_xyxy(box)
@@ -51,6 +51,10 @@ class ReIDDetectMultiBackend(nn.Module):
         self.transforms += [T.Normalize(mean=self.pixel_mean, std=self.pixel_std)]
         self.preprocess = T.Compose(self.transforms)
         self.to_pil = T.ToPILImage()
+        # batched preprocessing: the crops are resized into a reused (pinned on CUDA) uint8 buffer
+        self.crop_buffer = None
+        self.mean = torch.tensor(self.pixel_mean, device=device).view(1, 3, 1, 1) * 255
+        self.inv_std = 1 / (torch.tensor(self.pixel_std, device=device).view(1, 3, 1, 1) * 255)
 
         model_name = get_model_name(w)
 
@@ -171,15 +175,28 @@ class ReIDDetectMultiBackend(nn.Module):
         return types
 
     def _preprocess(self, im_batch):
-
-        images = []
-        for element in im_batch:
-            image = self.to_pil(element)
-            image = self.preprocess(image)
-            images.append(image)
-
-        images = torch.stack(images, dim=0)
-        images = images.to(self.device)
+        if isinstance(im_batch, torch.Tensor):
+            # crops already extracted on the device in [0, 1], see trackers.reid_crops
+            return im_batch.to(self.device).float().mul_(255).sub_(self.mean).mul_(self.inv_std)
+
+        # same result as self.preprocess on every crop (within about one intensity level), without the PIL round
+        # trips: one cv2.resize per crop into the buffer, then one conversion and normalization for the batch
+        n = len(im_batch)
+        height, width = self.image_size
+        if self.crop_buffer is None or len(self.crop_buffer) < n:
+            capacity = 1 << max(n - 1, 0).bit_length()
+            self.crop_buffer = torch.empty((capacity, height, width, 3), dtype=torch.uint8,
+                                           pin_memory=self.device.type == 'cuda')
+        buffer = self.crop_buffer.numpy()
+        for k, element in enumerate(im_batch):
+            # area interpolation when shrinking by 2 or more, where the antialiased PIL resize differs from bilinear
+            shrink = element.shape[0] >= 2 * height or element.shape[1] >= 2 * width
+            cv2.resize(element, (width, height), dst=buffer[k],
+                       interpolation=cv2.INTER_AREA if shrink else cv2.INTER_LINEAR)
+
+        images = self.crop_buffer[:n].to(self.device, non_blocking=True)
+        images = images.permute(0, 3, 1, 2).float()  # NHWC uint8 to NCHW float
+        images.sub_(self.mean).mul_(self.inv_std)
 
         return images
     
@@ -1,9 +1,24 @@
 from trackers.strongsort.utils.parser import get_config
+from trackers.reid_gate import ReIDGate
 
-def create_tracker(tracker_type, tracker_config, reid_weights, device, half):
+# trackers that extract appearance features with a ReID model
+REID_TRACKERS = ('strongsort', 'botsort', 'deepocsort')
+
+
+def create_reid_model(tracker_type, reid_weights, device, half):
+    # load the ReID model once so that it can be shared between tracker instances
+    if tracker_type not in REID_TRACKERS:
+        return None
+    from reid_multibackend import ReIDDetectMultiBackend
+    return ReIDDetectMultiBackend(weights=reid_weights, device=device, fp16=half)
+
+
+def create_tracker(tracker_type, tracker_config, reid_weights, device, half, reid_model=None, reid_on_demand=False):
     
     cfg = get_config()
     cfg.merge_from_file(tracker_config)
+    # ReID only on the detections whose association IoU does not settle, for the trackers with a ReID model
+    reid_gate = ReIDGate() if reid_on_demand and tracker_type in REID_TRACKERS else None
     
     if tracker_type == 'strongsort':
         from trackers.strongsort.strong_sort import StrongSORT
@@ -19,7 +34,8 @@ def create_tracker(tracker_type, tracker_config, reid_weights, device, half):
             nn_budget=cfg.strongsort.nn_budget,
             mc_lambda=cfg.strongsort.mc_lambda,
             ema_alpha=cfg.strongsort.ema_alpha,
-
+            reid_model=reid_model,
+            reid_gate=reid_gate,
         )
         return strongsort
     
@@ -61,7 +77,9 @@ def create_tracker(tracker_type, tracker_config, reid_weights, device, half):
             appearance_thresh=cfg.botsort.appearance_thresh,
             cmc_method =cfg.botsort.cmc_method,
             frame_rate=cfg.botsort.frame_rate,
-            lambda_=cfg.botsort.lambda_
+            lambda_=cfg.botsort.lambda_,
+            reid_model=reid_model,
+            reid_gate=reid_gate,
         )
         return botsort
     elif tracker_type == 'deepocsort':
@@ -77,6 +95,8 @@ def create_tracker(tracker_type, tracker_config, reid_weights, device, half):
             delta_t=cfg.deepocsort.delta_t,
             asso_func=cfg.deepocsort.asso_func,
             inertia=cfg.deepocsort.inertia,
+            reid_model=reid_model,
+            reid_gate=reid_gate,
         )
         return botsort
     else:
@@ -0,0 +1,26 @@
+import torch
+from torchvision.ops import roi_align
+
+
+def crop_rois(frame, boxes, img0_shape, size=(256, 128)):
+    """
+    Extracts the ReID crops of the boxes from the frame tensor the detector ran on, without going through the host.
+
+    The boxes are mapped from the original image to the letterboxed frame with the inverse of scale_boxes, then
+    resized to `size` in one roi_align call. The crops are flipped to BGR, the channel order of the crops sliced out
+    of the original image that the trackers feed to the ReID models otherwise.
+
+    :param frame: the letterboxed frame, a (1, 3, H, W) RGB tensor in [0, 1] on any device
+    :param boxes: the (N, 4) x1, y1, x2, y2 boxes in the pixels of the original image
+    :param img0_shape: the (height, width) of the original image
+    :param size: the (height, width) of the crops
+    :return: a (N, 3, height, width) BGR tensor in [0, 1] on the device of the frame
+    """
+    img1_shape = frame.shape[2:]
+    gain = min(img1_shape[0] / img0_shape[0], img1_shape[1] / img0_shape[1])
+    pad = (img1_shape[1] - img0_shape[1] * gain) / 2, (img1_shape[0] - img0_shape[0] * gain) / 2
+    rois = torch.as_tensor(boxes, dtype=frame.dtype, device=frame.device).reshape(-1, 4) * gain
+    rois[:, [0, 2]] += pad[0]
+    rois[:, [1, 3]] += pad[1]
+    crops = roi_align(frame, [rois], output_size=size, spatial_scale=1.0, sampling_ratio=-1, aligned=True)
+    return crops.flip(1)
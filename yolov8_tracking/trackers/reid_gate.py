@@ -0,0 +1,77 @@
+import numpy as np
+import torch
+
+
+def iou_matrix(boxes_a, boxes_b):
+    """Returns the (len(boxes_a), len(boxes_b)) IoU of two sets of x1, y1, x2, y2 boxes."""
+    a = np.asarray(boxes_a, dtype=np.float64).reshape(-1, 4)[:, None]
+    b = np.asarray(boxes_b, dtype=np.float64).reshape(-1, 4)[None]
+    w = np.clip(np.minimum(a[..., 2], b[..., 2]) - np.maximum(a[..., 0], b[..., 0]), 0, None)
+    h = np.clip(np.minimum(a[..., 3], b[..., 3]) - np.maximum(a[..., 1], b[..., 1]), 0, None)
+    inter = w * h
+    area_a = (a[..., 2] - a[..., 0]) * (a[..., 3] - a[..., 1])
+    area_b = (b[..., 2] - b[..., 0]) * (b[..., 3] - b[..., 1])
+    return inter / np.maximum(area_a + area_b - inter, 1e-9)
+
+
+class ReIDGate:
+    """
+    Appearance on demand: runs the ReID model only on the detections whose association is not settled by IoU.
+
+    A detection reuses the embedding of a track when they match unambiguously: their IoU is at least `iou_threshold`,
+    and no other track for the detection, nor other detection for the track, comes within `margin` of it. The other
+    detections (ambiguous, unmatched or starting a new track) go through the ReID model, and so does the detection of
+    a track that reused its embedding for `refresh` frames in a row. A reused embedding is the current embedding of
+    the track, so the appearance update of the track keeps it as it is.
+    """
+
+    def __init__(self, iou_threshold=0.5, margin=0.2, refresh=10):
+        self.iou_threshold = iou_threshold
+        self.margin = margin
+        self.refresh = refresh
+        self.reused_frames = {}  # track id: frames in a row the track reused its embedding
+        self.computed = 0
+        self.reused = 0
+
+    def select(self, det_boxes, track_boxes, track_ids):
+        """Returns, per detection, the index of the track whose embedding it reuses, or -1 to compute it."""
+        reuse = np.full(len(det_boxes), -1)
+        if len(det_boxes) and len(track_boxes):
+            iou = iou_matrix(det_boxes, track_boxes)
+            best = iou.argmax(1)
+            for d, t in enumerate(best):
+                score = iou[d, t]
+                if score < self.iou_threshold or self.reused_frames.get(track_ids[t], 0) >= self.refresh:
+                    continue
+                others = np.concatenate((np.delete(iou[d], t), np.delete(iou[:, t], d)))
+                if not len(others) or others.max() < score - self.margin:
+                    reuse[d] = t
+        reused_tracks = {track_ids[t] for t in reuse[reuse >= 0]}
+        self.reused_frames = {id: self.reused_frames.get(id, 0) + 1 for id in reused_tracks}
+        return reuse
+
+    def features(self, extract, det_boxes, track_boxes, track_ids, track_features):
+        """
+        Returns the embeddings of the detections, computed or reused.
+
+        :param extract: function computing the embeddings of the detections at the given indices with the ReID model
+        :param det_boxes: the x1, y1, x2, y2 boxes of the detections
+        :param track_boxes: the x1, y1, x2, y2 boxes of the tracks, as predicted for this frame
+        :param track_ids: the ids of the tracks
+        :param track_features: the current embeddings of the tracks
+        :return: a (len(det_boxes), D) float32 CPU tensor
+        """
+        if not len(det_boxes):
+            return torch.empty((0, 0))
+        reuse = self.select(det_boxes, track_boxes, track_ids)
+        compute = np.flatnonzero(reuse < 0)
+        computed = extract(compute).cpu().numpy() if len(compute) else None
+        dim = computed.shape[1] if computed is not None else len(np.asarray(track_features[0]))
+        features = np.empty((len(det_boxes), dim), dtype=np.float32)
+        if computed is not None:
+            features[compute] = computed
+        for d in np.flatnonzero(reuse >= 0):
+            features[d] = np.asarray(track_features[reuse[d]], dtype=np.float32).reshape(-1)
+        self.computed += len(compute)
+        self.reused += len(det_boxes) - len(compute)
+        return torch.from_numpy(features)
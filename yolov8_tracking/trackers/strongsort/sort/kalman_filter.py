@@ -110,6 +110,37 @@ class KalmanFilter(object):
 
         return mean, covariance
 
+    def multi_predict(self, mean, covariance):
+        """Run Kalman filter prediction step (Vectorized version).
+        Parameters
+        ----------
+        mean : ndarray
+            The Nx8 dimensional mean matrix of the object states at the previous
+            time step.
+        covariance : ndarray
+            The Nx8x8 dimensional covariance matrices of the object states at the
+            previous time step.
+        Returns
+        -------
+        (ndarray, ndarray)
+            Returns the mean matrix and covariance matrices of the predicted
+            states.
+        """
+        std = np.stack([
+            self._std_weight_position * mean[:, 0],
+            self._std_weight_position * mean[:, 1],
+            1 * mean[:, 2],
+            self._std_weight_position * mean[:, 3],
+            self._std_weight_velocity * mean[:, 0],
+            self._std_weight_velocity * mean[:, 1],
+            0.1 * mean[:, 2],
+            self._std_weight_velocity * mean[:, 3]], axis=1)
+        motion_cov = _diag(np.square(std))
+
+        mean = np.dot(mean, self._motion_mat.T)
+        covariance = self._motion_mat @ covariance @ self._motion_mat.T + motion_cov
+        return mean, covariance
+
     def project(self, mean, covariance, confidence=.0):
         """Project state distribution to measurement space.
         Parameters
@@ -141,6 +172,34 @@ class KalmanFilter(object):
             self._update_mat, covariance, self._update_mat.T))
         return mean, covariance + innovation_cov
 
+    def multi_project(self, mean, covariance, confidence=.0):
+        """Project state distributions to measurement space (Vectorized version).
+        Parameters
+        ----------
+        mean : ndarray
+            The Nx8 dimensional mean matrix of the states.
+        covariance : ndarray
+            The Nx8x8 dimensional covariance matrices of the states.
+        confidence : float or ndarray
+            The detection confidence, one for all the states or one per state.
+        Returns
+        -------
+        (ndarray, ndarray)
+            Returns the Nx4 projected means and Nx4x4 covariance matrices of the
+            given state estimates.
+        """
+        std = np.stack([
+            self._std_weight_position * mean[:, 3],
+            self._std_weight_position * mean[:, 3],
+            np.full(len(mean), 1e-1),
+            self._std_weight_position * mean[:, 3]], axis=1)
+        std *= (1 - np.asarray(confidence, dtype=float)).reshape(-1, 1)
+        innovation_cov = _diag(np.square(std))
+
+        mean = np.dot(mean, self._update_mat.T)
+        covariance = self._update_mat @ covariance @ self._update_mat.T
+        return mean, covariance + innovation_cov
+
     def update(self, mean, covariance, measurement, confidence=.0):
         """Run Kalman filter correction step.
         Parameters
@@ -173,6 +232,34 @@ class KalmanFilter(object):
             kalman_gain, projected_cov, kalman_gain.T))
         return new_mean, new_covariance
 
+    def multi_update(self, mean, covariance, measurement, confidence=.0):
+        """Run Kalman filter correction step (Vectorized version).
+        Parameters
+        ----------
+        mean : ndarray
+            The Nx8 dimensional mean matrix of the predicted states.
+        covariance : ndarray
+            The Nx8x8 dimensional covariance matrices of the states.
+        measurement : ndarray
+            The Nx4 dimensional measurements (x, y, a, h), one per state.
+        confidence : float or ndarray
+            The detection confidence, one for all the states or one per state.
+        Returns
+        -------
+        (ndarray, ndarray)
+            Returns the measurement-corrected state distributions.
+        """
+        projected_mean, projected_cov = self.multi_project(mean, covariance, confidence)
+
+        # K = P H^T S^-1, solved as S K^T = H P^T for all the states at once
+        kalman_gain = np.linalg.solve(
+            projected_cov, self._update_mat @ covariance.transpose(0, 2, 1)).transpose(0, 2, 1)
+        innovation = measurement - projected_mean
+
+        new_mean = mean + np.einsum('nij,nj->ni', kalman_gain, innovation)
+        new_covariance = covariance - kalman_gain @ projected_cov @ kalman_gain.transpose(0, 2, 1)
+        return new_mean, new_covariance
+
     def gating_distance(self, mean, covariance, measurements,
                         only_position=False):
         """Compute gating distance between state distribution and measurements.
@@ -211,4 +298,47 @@ class KalmanFilter(object):
             cholesky_factor, d.T, lower=True, check_finite=False,
             overwrite_b=True)
         squared_maha = np.sum(z * z, axis=0)
-        return squared_maha
\ No newline at end of file
+        return squared_maha
+
+    def multi_gating_distance(self, mean, covariance, measurements,
+                              only_position=False):
+        """Compute gating distance between state distributions and measurements
+        (Vectorized version).
+        Parameters
+        ----------
+        mean : ndarray
+            The Nx8 dimensional mean matrix of the state distributions.
+        covariance : ndarray
+            The Nx8x8 dimensional covariance matrices of the state distributions.
+        measurements : ndarray
+            An Mx4 dimensional matrix of M measurements, each in
+            format (x, y, a, h).
+        only_position : Optional[bool]
+            If True, distance computation is done with respect to the bounding
+            box center position only.
+        Returns
+        -------
+        ndarray
+            Returns an NxM matrix, where element (i, j) contains the squared
+            Mahalanobis distance between state distribution i and
+            `measurements[j]`.
+        """
+        mean, covariance = self.multi_project(mean, covariance)
+
+        if only_position:
+            mean, covariance = mean[:, :2], covariance[:, :2, :2]
+            measurements = measurements[:, :2]
+
+        cholesky_factor = np.linalg.cholesky(covariance)
+        d = measurements[None, :, :] - mean[:, None, :]
+        z = np.linalg.solve(cholesky_factor, d.transpose(0, 2, 1))
+        squared_maha = np.sum(z * z, axis=1)
+        return squared_maha
+
+
+def _diag(values):
+    """Returns the NxDxD diagonal matrices of the NxD `values`."""
+    n, d = values.shape
+    matrices = np.zeros((n, d, d))
+    matrices[:, np.arange(d), np.arange(d)] = values
+    return matrices
\ No newline at end of file
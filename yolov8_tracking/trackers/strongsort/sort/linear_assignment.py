@@ -166,9 +166,10 @@ def gate_cost_matrix(
     gating_threshold = kalman_filter.chi2inv95[gating_dim]
     measurements = np.asarray(
         [detections[i].to_xyah() for i in detection_indices])
-    for row, track_idx in enumerate(track_indices):
-        track = tracks[track_idx]
-        gating_distance = track.kf.gating_distance(track.mean, track.covariance, measurements, only_position)
-        cost_matrix[row, gating_distance > gating_threshold] = gated_cost
-        cost_matrix[row] = mc_lambda * cost_matrix[row] + (1 - mc_lambda) *  gating_distance
+    kf = tracks[track_indices[0]].kf  # shared by all the tracks
+    gating_distance = kf.multi_gating_distance(
+        np.asarray([tracks[i].mean for i in track_indices]),
+        np.asarray([tracks[i].covariance for i in track_indices]), measurements, only_position)
+    cost_matrix[gating_distance > gating_threshold] = gated_cost
+    cost_matrix = mc_lambda * cost_matrix + (1 - mc_lambda) * gating_distance
     return cost_matrix
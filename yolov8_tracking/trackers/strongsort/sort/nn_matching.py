@@ -1,100 +1,62 @@
 # vim: expandtab:ts=4:sw=4
 import numpy as np
-import sys
-import torch
 
 
-def _pdist(a, b):
-    """Compute pair-wise squared distance between points in `a` and `b`.
-    Parameters
-    ----------
-    a : array_like
-        An NxM matrix of N samples of dimensionality M.
-    b : array_like
-        An LxM matrix of L samples of dimensionality M.
-    Returns
-    -------
-    ndarray
-        Returns a matrix of size len(a), len(b) such that eleement (i, j)
-        contains the squared distance between `a[i]` and `b[j]`.
-    """
-    a, b = np.asarray(a), np.asarray(b)
-    if len(a) == 0 or len(b) == 0:
-        return np.zeros((len(a), len(b)))
-    a2, b2 = np.square(a).sum(axis=1), np.square(b).sum(axis=1)
-    r2 = -2. * np.dot(a, b.T) + a2[:, None] + b2[None, :]
-    r2 = np.clip(r2, 0., float(np.inf))
-    return r2
-
-
-def _cosine_distance(a, b, data_is_normalized=False):
-    """Compute pair-wise cosine distance between points in `a` and `b`.
-    Parameters
-    ----------
-    a : array_like
-        An NxM matrix of N samples of dimensionality M.
-    b : array_like
-        An LxM matrix of L samples of dimensionality M.
-    data_is_normalized : Optional[bool]
-        If True, assumes rows in a and b are unit length vectors.
-        Otherwise, a and b are explicitly normalized to lenght 1.
-    Returns
-    -------
-    ndarray
-        Returns a matrix of size len(a), len(b) such that eleement (i, j)
-        contains the squared distance between `a[i]` and `b[j]`.
-    """
-    if not data_is_normalized:
-        a = np.asarray(a) / np.linalg.norm(a, axis=1, keepdims=True)
-        b = np.asarray(b) / np.linalg.norm(b, axis=1, keepdims=True)
-    return 1. - np.dot(a, b.T)
+def _matmul(gallery, queries):
+    """Products of the LxBxM samples of `gallery` with the NxM `queries`, as one
+    (L * B)xM by MxN matrix product."""
+    return (gallery.reshape(-1, gallery.shape[2]) @ queries.T).reshape(gallery.shape[0], gallery.shape[1], -1)
 
 
-def _nn_euclidean_distance(x, y):
+def _nn_euclidean_distance(gallery, queries):
     """ Helper function for nearest neighbor distance metric (Euclidean).
     Parameters
     ----------
-    x : ndarray
-        A matrix of N row-vectors (sample points).
-    y : ndarray
-        A matrix of M row-vectors (query points).
+    gallery : ndarray
+        An LxBxM array of B samples of dimensionality M for each of L targets.
+    queries : ndarray
+        An NxM matrix of N query points.
     Returns
     -------
     ndarray
-        A vector of length M that contains for each entry in `y` the
-        smallest Euclidean distance to a sample in `x`.
+        An LxBxN array such that element (i, j, k) contains the squared
+        distance between sample j of target i and `queries[k]`.
     """
-    # x_ = torch.from_numpy(np.asarray(x) / np.linalg.norm(x, axis=1, keepdims=True))
-    # y_ = torch.from_numpy(np.asarray(y) / np.linalg.norm(y, axis=1, keepdims=True))
-    distances = distances = _pdist(x, y)
-    return np.maximum(0.0, torch.min(distances, axis=0)[0].numpy())
+    g2 = np.square(gallery).sum(axis=2)
+    q2 = np.square(queries).sum(axis=1)
+    r2 = -2. * _matmul(gallery, queries) + g2[:, :, None] + q2[None, None, :]
+    return np.clip(r2, 0., None)
 
 
-def _nn_cosine_distance(x, y):
+def _nn_cosine_distance(gallery, queries):
     """ Helper function for nearest neighbor distance metric (cosine).
     Parameters
     ----------
-    x : ndarray
-        A matrix of N row-vectors (sample points).
-    y : ndarray
-        A matrix of M row-vectors (query points).
+    gallery : ndarray
+        An LxBxM array of B unit length samples for each of L targets.
+    queries : ndarray
+        An NxM matrix of N query points.
     Returns
     -------
     ndarray
-        A vector of length M that contains for each entry in `y` the
-        smallest cosine distance to a sample in `x`.
+        An LxBxN array such that element (i, j, k) contains the cosine
+        distance between sample j of target i and `queries[k]`.
     """
-    x_ = torch.from_numpy(np.asarray(x))
-    y_ = torch.from_numpy(np.asarray(y))
-    distances = _cosine_distance(x_, y_)
-    distances = distances
-    return distances.min(axis=0)
+    queries = queries / np.linalg.norm(queries, axis=1, keepdims=True)
+    return 1. - _matmul(gallery, queries)
 
 
 class NearestNeighborDistanceMetric(object):
     """
     A nearest neighbor distance metric that, for each target, returns
     the closest distance to any sample that has been observed so far.
+
+    The samples live in one ring buffer array of shape
+    (capacity, budget, dimensionality): a row per target and, in each row,
+    the `budget` latest samples of the target, so that the distances of all
+    the targets to all the features are one matrix product and a masked
+    minimum. The rows of the targets that leave the scene are reused, the
+    array doubles when more targets are present at once.
     Parameters
     ----------
     metric : str
@@ -104,15 +66,18 @@ class NearestNeighborDistanceMetric(object):
         invalid match.
     budget : Optional[int]
         If not None, fix samples per class to at most this number. Removes
-        the oldest samples when the budget is reached.
+        the oldest samples when the budget is reached. Otherwise the samples
+        per class grow, doubling the ring buffer when a row is full.
+    capacity : int
+        Number of targets the ring buffer holds before it grows.
     Attributes
     ----------
-    samples : Dict[int -> List[ndarray]]
-        A dictionary that maps from target identities to the list of samples
-        that have been observed so far.
+    samples : Dict[int -> ndarray]
+        A dictionary that maps from target identities to the samples that have
+        been observed so far, oldest first.
     """
 
-    def __init__(self, metric, matching_threshold, budget=None):
+    def __init__(self, metric, matching_threshold, budget=None, capacity=64):
         if metric == "euclidean":
             self._metric = _nn_euclidean_distance
         elif metric == "cosine":
@@ -120,9 +85,53 @@ class NearestNeighborDistanceMetric(object):
         else:
             raise ValueError(
                 "Invalid metric; must be either 'euclidean' or 'cosine'")
+        self._normalize = metric == "cosine"
         self.matching_threshold = matching_threshold
         self.budget = budget
-        self.samples = {}
+        self._gallery = None  # capacity x budget x dimensionality, allocated on the first features
+        self._counts = np.zeros(capacity, dtype=np.int64)  # samples per row
+        self._heads = np.zeros(capacity, dtype=np.int64)  # next slot written per row
+        self._rows = {}  # target: row
+        self._free = list(range(capacity - 1, -1, -1))
+
+    @property
+    def samples(self):
+        samples = {}
+        for target, row in self._rows.items():
+            count, head = self._counts[row], self._heads[row]
+            order = (np.arange(head - count, head)) % self._gallery.shape[1]
+            samples[target] = self._gallery[row, order]
+        return samples
+
+    def _allocate(self, dimensionality):
+        self._gallery = np.zeros(
+            (len(self._counts), self.budget or 1, dimensionality), dtype=np.float32)
+
+    def _grow_rows(self):
+        old = len(self._counts)
+        self._gallery = np.concatenate((self._gallery, np.zeros_like(self._gallery)))
+        self._counts = np.concatenate((self._counts, np.zeros(old, dtype=np.int64)))
+        self._heads = np.concatenate((self._heads, np.zeros(old, dtype=np.int64)))
+        self._free = list(range(2 * old - 1, old - 1, -1)) + self._free
+
+    def _grow_samples(self):
+        # unbounded budget: unroll the full rows into a buffer twice as long
+        size = self._gallery.shape[1]
+        gallery = np.zeros((len(self._counts), 2 * size, self._gallery.shape[2]), dtype=np.float32)
+        for row in self._rows.values():
+            order = (np.arange(self._heads[row] - self._counts[row], self._heads[row])) % size
+            gallery[row, :self._counts[row]] = self._gallery[row, order]
+            self._heads[row] = self._counts[row]
+        self._gallery = gallery
+
+    def _row(self, target):
+        row = self._rows.get(target)
+        if row is None:
+            if not self._free:
+                self._grow_rows()
+            row = self._rows[target] = self._free.pop()
+            self._counts[row] = self._heads[row] = 0
+        return row
 
     def partial_fit(self, features, targets, active_targets):
         """Update the distance metric with new data.
@@ -135,11 +144,30 @@ class NearestNeighborDistanceMetric(object):
         active_targets : List[int]
             A list of targets that are currently present in the scene.
         """
-        for feature, target in zip(features, targets):
-            self.samples.setdefault(target, []).append(feature)
-            if self.budget is not None:
-                self.samples[target] = self.samples[target][-self.budget:]
-        self.samples = {k: self.samples[k] for k in active_targets}
+        if len(features):
+            features = np.asarray(features, dtype=np.float32).reshape(len(features), -1)
+            if self._normalize:
+                features = features / np.linalg.norm(features, axis=1, keepdims=True)
+            if self._gallery is None:
+                self._allocate(features.shape[1])
+            rows = np.array([self._row(target) for target in targets])
+            # a target with several features takes one of them per pass, a pass writes all its rows at once
+            passes = np.zeros(len(rows), dtype=np.int64)
+            if len(np.unique(rows)) < len(rows):
+                seen = {}
+                for i, row in enumerate(rows):
+                    passes[i] = seen[row] = seen.get(row, -1) + 1
+            for n in range(passes.max() + 1):
+                selected = passes == n
+                row = rows[selected]
+                if self.budget is None and (self._counts[row] == self._gallery.shape[1]).any():
+                    self._grow_samples()
+                size = self._gallery.shape[1]
+                self._gallery[row, self._heads[row]] = features[selected]
+                self._heads[row] = (self._heads[row] + 1) % size
+                self._counts[row] = np.minimum(self._counts[row] + 1, size)
+        for target in set(self._rows) - set(active_targets):
+            self._free.append(self._rows.pop(target))
 
     def distance(self, features, targets):
         """Compute distance between features and targets.
@@ -156,7 +184,12 @@ class NearestNeighborDistanceMetric(object):
             element (i, j) contains the closest squared distance between
             `targets[i]` and `features[j]`.
         """
-        cost_matrix = np.zeros((len(targets), len(features)))
-        for i, target in enumerate(targets):
-            cost_matrix[i, :] = self._metric(self.samples[target], features)
-        return cost_matrix
\ No newline at end of file
+        if len(targets) == 0 or len(features) == 0:
+            return np.zeros((len(targets), len(features)))
+        rows = np.array([self._rows[target] for target in targets])
+        features = np.asarray(features, dtype=np.float32).reshape(len(features), -1)
+        # until a row is full its samples are its first slots, the slots no row reached are left out
+        counts = self._counts[rows]
+        distances = self._metric(self._gallery[rows, :counts.max()], features)
+        distances[np.arange(distances.shape[1])[None, :] >= counts[:, None]] = np.inf
+        return distances.min(axis=1).astype(np.float64)
\ No newline at end of file
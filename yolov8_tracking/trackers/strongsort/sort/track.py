@@ -67,6 +67,8 @@ class Track:
 
     """
 
+    kf = KalmanFilter()  # the filter holds no track state, all the tracks share it
+
     def __init__(self, detection, track_id, class_id, conf, n_init, max_age, ema_alpha,
                  feature=None):
         self.track_id = track_id
@@ -88,7 +90,6 @@ class Track:
         self._n_init = n_init
         self._max_age = max_age
 
-        self.kf = KalmanFilter()
         self.mean, self.covariance = self.kf.initiate(detection)
         
         # Initializing trajectory queue
@@ -255,29 +256,48 @@ class Track:
             The Kalman filter.
 
         """
-        self.mean, self.covariance = self.kf.predict(self.mean, self.covariance)
+        self.mean, self.covariance = kf.predict(self.mean, self.covariance)
         self.age += 1
         self.time_since_update += 1
-        
-    def update_kf(self, bbox, confidence=0.5):
+
+    @staticmethod
+    def multi_predict(tracks, kf):
+        """Run the Kalman filter prediction step of all the tracks at once."""
+        if len(tracks) > 0:
+            multi_mean = np.asarray([t.mean for t in tracks])
+            multi_covariance = np.asarray([t.covariance for t in tracks])
+            multi_mean, multi_covariance = kf.multi_predict(multi_mean, multi_covariance)
+            for t, mean, covariance in zip(tracks, multi_mean, multi_covariance):
+                t.mean, t.covariance = mean, covariance
+                t.age += 1
+                t.time_since_update += 1
+
+    def update_kf(self, bbox, confidence=0.5, state=None):
+        """Update the Kalman filter with a measurement that is not a detection,
+        `state` is the (mean, covariance) of the update when already computed."""
         self.updates_wo_assignment = self.updates_wo_assignment + 1
-        self.mean, self.covariance = self.kf.update(self.mean, self.covariance, bbox, confidence)
+        self.mean, self.covariance = state if state is not None else \
+            self.kf.update(self.mean, self.covariance, bbox, confidence)
         tlbr = self.to_tlbr()
         x_c = int((tlbr[0] + tlbr[2]) / 2)
         y_c = int((tlbr[1] + tlbr[3]) / 2)
         self.q.append(('predupdate', (x_c, y_c)))
 
-    def update(self, detection, class_id, conf):
+    def update(self, detection, class_id, conf, state=None):
         """Perform Kalman filter measurement update step and update the feature
         cache.
         Parameters
         ----------
         detection : Detection
             The associated detection.
+        state : Optional[(ndarray, ndarray)]
+            The mean and covariance of the measurement update, when already
+            computed for all the matched tracks at once.
         """
         self.conf = conf
         self.class_id = class_id.int()
-        self.mean, self.covariance = self.kf.update(self.mean, self.covariance, detection.to_xyah(), detection.confidence)
+        self.mean, self.covariance = state if state is not None else \
+            self.kf.update(self.mean, self.covariance, detection.to_xyah(), detection.confidence)
 
         feature = detection.feature / np.linalg.norm(detection.feature)
 
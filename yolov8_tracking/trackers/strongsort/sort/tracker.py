@@ -55,8 +55,7 @@ class Tracker:
 
         This function should be called once every time step, before `update`.
         """
-        for track in self.tracks:
-            track.predict(self.kf)
+        Track.multi_predict(self.tracks, self.kf)
 
     def increment_ages(self):
         for track in self.tracks:
@@ -72,10 +71,20 @@ class Tracker:
 
         """
         self.predict()
-        for t in self.tracks:
-            if self.max_unmatched_preds != 0 and t.updates_wo_assignment < t.max_num_updates_wo_assignment:
-                bbox = t.to_tlwh()
-                t.update_kf(detection.to_xyah_ext(bbox))
+        tracks = [t for t in self.tracks
+                  if self.max_unmatched_preds != 0 and t.updates_wo_assignment < t.max_num_updates_wo_assignment]
+        measurements = [detection.to_xyah_ext(t.to_tlwh()) for t in tracks]
+        for t, measurement, state in zip(tracks, measurements, self._multi_update(tracks, measurements, 0.5)):
+            t.update_kf(measurement, state=state)
+
+    def _multi_update(self, tracks, measurements, confidences):
+        """Returns the (mean, covariance) of the Kalman filter update of each track with its measurement."""
+        if len(tracks) == 0:
+            return []
+        mean, covariance = self.kf.multi_update(
+            np.asarray([t.mean for t in tracks]), np.asarray([t.covariance for t in tracks]),
+            np.asarray(measurements), np.asarray(confidences, dtype=float))
+        return list(zip(mean, covariance))
 
     def update(self, detections, classes, confidences):
         """Perform measurement update and track management.
@@ -90,28 +99,33 @@ class Tracker:
         matches, unmatched_tracks, unmatched_detections = \
             self._match(detections)
 
-        # Update track set.
-        for track_idx, detection_idx in matches:
-            self.tracks[track_idx].update(
-                detections[detection_idx], classes[detection_idx], confidences[detection_idx])
+        # Update track set, with the Kalman filter updates of the matched tracks and of the unmatched tracks
+        # updated with their own prediction computed at once.
         for track_idx in unmatched_tracks:
             self.tracks[track_idx].mark_missed()
-            if self.max_unmatched_preds != 0 and self.tracks[track_idx].updates_wo_assignment < self.tracks[track_idx].max_num_updates_wo_assignment:
-                bbox = self.tracks[track_idx].to_tlwh()
-                self.tracks[track_idx].update_kf(detection.to_xyah_ext(bbox))
+        predicted = [
+            track_idx for track_idx in unmatched_tracks
+            if self.max_unmatched_preds != 0 and self.tracks[track_idx].updates_wo_assignment < self.tracks[track_idx].max_num_updates_wo_assignment]
+        measurements = [detections[detection_idx].to_xyah() for _, detection_idx in matches] + \
+            [detection.to_xyah_ext(self.tracks[track_idx].to_tlwh()) for track_idx in predicted]
+        kf_confidences = [detections[detection_idx].confidence for _, detection_idx in matches] + [0.5] * len(predicted)
+        states = self._multi_update(
+            [self.tracks[track_idx] for track_idx, _ in matches] + [self.tracks[track_idx] for track_idx in predicted],
+            measurements, kf_confidences)
+        for (track_idx, detection_idx), state in zip(matches, states):
+            self.tracks[track_idx].update(
+                detections[detection_idx], classes[detection_idx], confidences[detection_idx], state=state)
+        for track_idx, measurement, state in zip(predicted, measurements[len(matches):], states[len(matches):]):
+            self.tracks[track_idx].update_kf(measurement, state=state)
         for detection_idx in unmatched_detections:
             self._initiate_track(detections[detection_idx], classes[detection_idx].item(), confidences[detection_idx].item())
         self.tracks = [t for t in self.tracks if not t.is_deleted()]
 
-        # Update distance metric.
-        active_targets = [t.track_id for t in self.tracks if t.is_confirmed()]
-        features, targets = [], []
-        for track in self.tracks:
-            if not track.is_confirmed():
-                continue
-            features += track.features
-            targets += [track.track_id for _ in track.features]
-        self.metric.partial_fit(np.asarray(features), np.asarray(targets), active_targets)
+        # Update distance metric with the current feature of every confirmed track.
+        confirmed = [t for t in self.tracks if t.is_confirmed()]
+        active_targets = [t.track_id for t in confirmed]
+        features = np.array([t.features[-1] for t in confirmed], dtype=np.float32)
+        self.metric.partial_fit(features, active_targets, active_targets)
 
     def _full_cost_metric(self, tracks, dets, track_indices, detection_indices):
         """
@@ -126,14 +140,13 @@ class Tracker:
         is more intuitive in terms of values.
         """
         # Compute First the Position-based Cost Matrix
-        pos_cost = np.empty([len(track_indices), len(detection_indices)])
         msrs = np.asarray([dets[i].to_xyah() for i in detection_indices])
-        for row, track_idx in enumerate(track_indices):
-            pos_cost[row, :] = np.sqrt(
-                self.kf.gating_distance(
-                    tracks[track_idx].mean, tracks[track_idx].covariance, msrs, False
-                )
-            ) / self.GATING_THRESHOLD
+        pos_cost = np.sqrt(
+            self.kf.multi_gating_distance(
+                np.asarray([tracks[i].mean for i in track_indices]),
+                np.asarray([tracks[i].covariance for i in track_indices]), msrs, False
+            )
+        ) / self.GATING_THRESHOLD
         pos_gate = pos_cost > 1.0
         # Now Compute the Appearance-based Cost Matrix
         app_cost = self.metric.distance(
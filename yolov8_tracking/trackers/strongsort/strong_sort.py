@@ -11,6 +11,7 @@ from sort.detection import Detection
 from sort.tracker import Tracker
 
 from reid_multibackend import ReIDDetectMultiBackend
+from trackers.reid_crops import crop_rois
 
 from yolov8.ultralytics.yolo.utils.ops import xyxy2xywh
 
@@ -27,18 +28,24 @@ class StrongSORT(object):
                  n_init=3,
                  nn_budget=100,
                  mc_lambda=0.995,
-                 ema_alpha=0.9
+                 ema_alpha=0.9,
+                 reid_model=None,
+                 reid_gate=None
                 ):
 
-        self.model = ReIDDetectMultiBackend(weights=model_weights, device=device, fp16=fp16)
+        # reuse an already loaded ReID model when one is given (e.g. by a resident TrackingEngine)
+        self.model = reid_model if reid_model is not None else \
+            ReIDDetectMultiBackend(weights=model_weights, device=device, fp16=fp16)
         
         self.max_dist = max_dist
         metric = NearestNeighborDistanceMetric(
             "cosine", self.max_dist, nn_budget)
         self.tracker = Tracker(
             metric, max_iou_dist=max_iou_dist, max_age=max_age, n_init=n_init, max_unmatched_preds=max_unmatched_preds, mc_lambda=mc_lambda, ema_alpha=ema_alpha)
+        # runs the ReID model only on the detections IoU does not associate unambiguously, when set
+        self.reid_gate = reid_gate
 
-    def update(self, dets,  ori_img):
+    def update(self, dets,  ori_img, frame=None):
         
         xyxys = dets[:, 0:4]
         confs = dets[:, 4]
@@ -49,8 +56,17 @@ class StrongSORT(object):
         confs = confs.numpy()
         self.height, self.width = ori_img.shape[:2]
         
+        # predict first, the ReID gate matches the detections against the predicted tracks
+        self.tracker.predict()
+
         # generate detections
-        features = self._get_features(xywhs, ori_img)
+        if self.reid_gate is not None:
+            tracks = self.tracker.tracks
+            features = self.reid_gate.features(
+                lambda indices: self._get_features(xywhs[indices], ori_img, frame), xyxys.numpy(),
+                [t.to_tlbr() for t in tracks], [t.track_id for t in tracks], [t.features[-1] for t in tracks])
+        else:
+            features = self._get_features(xywhs, ori_img, frame)
         bbox_tlwh = self._xywh_to_tlwh(xywhs)
         detections = [Detection(bbox_tlwh[i], conf, features[i]) for i, conf in enumerate(
             confs)]
@@ -60,7 +76,6 @@ class StrongSORT(object):
         scores = np.array([d.confidence for d in detections])
 
         # update tracker
-        self.tracker.predict()
         self.tracker.update(detections, clss, confs)
 
         # output bbox identities
@@ -129,7 +144,11 @@ class StrongSORT(object):
         h = int(y2 - y1)
         return t, l, w, h
 
-    def _get_features(self, bbox_xywh, ori_img):
+    def _get_features(self, bbox_xywh, ori_img, frame=None):
+        if frame is not None and len(bbox_xywh):
+            # crop on the device from the frame tensor the detector ran on
+            boxes = [self._xywh_to_xyxy(box) for box in bbox_xywh]
+            return self.model(crop_rois(frame, boxes, ori_img.shape[:2], self.model.image_size))
         im_crops = []
         for box in bbox_xywh:
             x1, y1, x2, y2 = self._xywh_to_xyxy(box)
@@ -212,9 +212,10 @@ class Evaluator:
                     "--project", self.opt.project,
                     "--device", str(tracking_subprocess_device),
                     "--source", dst_seq_path,
+                    "--detect-every", str(self.opt.detect_every),
                     "--exist-ok",
                     "--save-txt",
-                ])
+                ] + (["--reid-on-demand"] if self.opt.reid_on_demand else []))
                 processes.append(p)
 
             for p in processes:
@@ -308,7 +309,7 @@ class Evaluator:
         return combined_results
 
 
-def parse_opt():
+def parse_opt(args=None):
     parser = argparse.ArgumentParser()
     parser.add_argument('--yolo-weights', type=str, default=WEIGHTS / 'yolov8n.pt', help='model.pt path(s)')
     parser.add_argument('--reid-weights', type=str, default=WEIGHTS / 'osnet_x1_0_dukemtmcreid.pt')
@@ -325,8 +326,10 @@ def parse_opt():
     parser.add_argument('--device', default='', help='cuda device, i.e. 0 or 0,1,2,3 or cpu')
     parser.add_argument('--processes-per-device', type=int, default=2,
                         help='how many subprocesses can be invoked per GPU (to manage memory consumption)')
+    parser.add_argument('--detect-every', type=int, default=1, help='run the detector every K frames and propagate the boxes in between')
+    parser.add_argument('--reid-on-demand', action='store_true', help='run ReID only on the detections IoU does not associate unambiguously')
 
-    opt = parser.parse_args()
+    opt = parser.parse_args(args)
     opt.tracking_config = ROOT / 'trackers' / opt.tracking_method / 'configs' / (opt.tracking_method + '.yaml')
     with open(opt.tracking_config, 'r') as f:
         params = yaml.load(f, Loader=yaml.loader.SafeLoader)
@@ -0,0 +1,76 @@
+import math
+
+import cv2
+import numpy as np
+
+from yolov8.ultralytics.yolo.data.augment import LetterBox
+
+
+class LoadVideo:
+    """
+    Dataloader decoding one video file or HTTP URL, optionally restricted to a window, with the interface of LoadImages.
+
+    URLs are read by FFmpeg with range requests, so the first frames are decoded as soon as the container index and
+    their bytes have arrived instead of after the whole file has been downloaded. A window is given in 1-based frame
+    numbers (inclusive) or in seconds, the decoder seeks to the keyframe before its first frame and decodes only up to
+    its last frame. `offset` is the 0-based index of the first frame of the window in the video.
+    """
+
+    def __init__(self, source, imgsz=640, stride=32, auto=True, transforms=None, vid_stride=1, target_fps=None,
+                 start_frame=None, end_frame=None, start_time=None, end_time=None):
+        self.source = str(source)
+        self.imgsz = imgsz
+        self.stride = stride
+        self.auto = auto
+        self.transforms = transforms
+        self.mode = 'video'
+        self.nf = 1
+        self.count = 0
+        self.frame = 0
+        self.cap = cv2.VideoCapture(self.source, cv2.CAP_FFMPEG)
+        if not self.cap.isOpened():
+            raise ConnectionError(f'Failed to open {self.source}')
+        fps = self.cap.get(cv2.CAP_PROP_FPS)
+        total = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        self.vid_stride = max(round(fps / target_fps), 1) if target_fps and fps else vid_stride
+
+        # window in 0-based frame indices, end excluded
+        if start_time is not None and fps:
+            start_frame = math.floor(start_time * fps) + 1
+        if end_time is not None and fps:
+            end_frame = math.ceil(end_time * fps)
+        self.offset = max(start_frame - 1, 0) if start_frame else 0
+        self.end = min(end_frame, total) if end_frame and total else end_frame or total
+        if self.offset:
+            # FFmpeg seeks to the previous keyframe and decodes up to the first frame of the window
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, self.offset)
+        self.position = self.offset
+        self.frames = max(self.end - self.offset, 0) // self.vid_stride
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self.end and self.position + self.vid_stride > self.end:
+            self.cap.release()
+            raise StopIteration
+        for _ in range(self.vid_stride):
+            self.cap.grab()
+        self.position += self.vid_stride
+        ret_val, im0 = self.cap.retrieve()
+        if not ret_val:
+            self.cap.release()
+            raise StopIteration
+        self.frame += 1
+        s = f'video {self.count + 1}/{self.nf} ({self.frame}/{self.frames}) {self.source}: '
+
+        if self.transforms:
+            im = self.transforms(im0)  # transforms
+        else:
+            im = LetterBox(self.imgsz, self.auto, stride=self.stride)(image=im0)
+            im = im.transpose((2, 0, 1))[::-1]  # HWC to CHW, BGR to RGB
+            im = np.ascontiguousarray(im)  # contiguous
+        return self.source, im, im0, self.cap, s
+
+    def __len__(self):
+        return self.nf